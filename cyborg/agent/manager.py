@@ -35,7 +35,7 @@ LOG = logging.getLogger(__name__)
 class AgentManager(periodic_task.PeriodicTasks):
     """Cyborg Agent manager main class."""
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.2'
     target = messaging.Target(version=RPC_API_VERSION)
 
     def __init__(self, topic, host=None):
@@ -66,6 +66,10 @@ class AgentManager(periodic_task.PeriodicTasks):
         LOG.info('Driver program() API returned code %s', ret)
         os.remove(download_path.name)
 
+    def report_ack(self, context, seq, applied, conductor=None):
+        """Handle the conductor acknowledgement of an async report."""
+        self._rt.report_ack(seq, applied, conductor=conductor)
+
     @periodic_task.periodic_task(run_immediately=True)
     def update_available_resource(self, context, startup=True):
         """Update all kinds of accelerator resources from their drivers."""
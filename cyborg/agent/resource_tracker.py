@@ -19,13 +19,17 @@ conductor with useful information about availability through the accelerator
 model.
 """
 
+import time
+
 from oslo_log import log as logging
+import oslo_messaging as messaging
 from stevedore import driver
 from stevedore.extension import ExtensionManager
 
 from cyborg.common import exception
 from cyborg.common import utils
 from cyborg.conf import CONF
+from cyborg.objects.driver_objects.driver_device import DriverDevice
 
 
 LOG = logging.getLogger(__name__)
@@ -42,6 +46,16 @@ class ResourceTracker(object):
         self.host = host
         self.conductor_api = cond_api
         self.acc_drivers = []
+        # The fingerprint of the last device list accepted by conductor.
+        self._last_report_fingerprint = None
+        # The sequence number of the last async report, seeded with the
+        # time so it keeps increasing when the agent restarts, and the
+        # (seq, fingerprint) of the report waiting for its ack.
+        self._report_seq = int(time.time() * 1000)
+        self._pending_report = None
+        # The conductor handling the reports of the host when the
+        # conductors shard them, None to let any conductor pick them up.
+        self._report_conductor = None
         self._initialize_drivers()
 
     def _initialize_drivers(self, enabled_drivers=None):
@@ -70,9 +84,78 @@ class ResourceTracker(object):
         acc_list = []
         for acc_driver in self.acc_drivers:
             acc_list.extend(acc_driver.discover())
-        # Call conductor_api here to diff and report acc data. Now, we actually
-        # do not have the method report_data.
+        fingerprint = DriverDevice.fingerprint(acc_list)
+        if CONF.agent.async_report:
+            self._report_async(context, acc_list, fingerprint)
+            return
+        # Call conductor_api here to diff and report acc data. If nothing
+        # changed since the last accepted report, only send the fingerprint
+        # and fall back to a full report if the conductor asks for it.
         try:
-            self.conductor_api.report_data(context, self.host, acc_list)
+            if (fingerprint == self._last_report_fingerprint and
+                    self._report(context, None, fingerprint)):
+                return
+            self._last_report_fingerprint = None
+            if self._report(context, acc_list, fingerprint):
+                self._last_report_fingerprint = fingerprint
         except exception.PlacementResourceProviderNotFound as e:
             LOG.error('Unable to report usage: %s', e)
+
+    def _report(self, context, acc_list, fingerprint):
+        """Call report_data on the conductor handling the host.
+
+        If the conductor answers that another one handles the host, the
+        report is sent again to that one, which is used from then on.
+        """
+        try:
+            return self.conductor_api.report_data(
+                context, self.host, acc_list, fingerprint=fingerprint,
+                server=self._report_conductor)
+        except exception.ConductorNotOwner as e:
+            LOG.info('Reports of host %(host)s are now sent to conductor '
+                     '%(owner)s.',
+                     {'host': self.host, 'owner': e.kwargs['owner']})
+            self._report_conductor = e.kwargs['owner']
+        except messaging.MessagingTimeout:
+            # The conductor may be gone, let any conductor pick up the
+            # next report.
+            self._report_conductor = None
+            raise
+        return self.conductor_api.report_data(
+            context, self.host, acc_list, fingerprint=fingerprint,
+            server=self._report_conductor)
+
+    def _report_async(self, context, acc_list, fingerprint):
+        """Cast the report to the conductor, the result is handled by
+        report_ack.
+        """
+        self._report_seq += 1
+        if self._pending_report is not None:
+            # The last report was never acknowledged, its conductor may be
+            # gone, so let any conductor pick up this one.
+            self._report_conductor = None
+        if fingerprint == self._last_report_fingerprint:
+            acc_list = None
+        # Set before the cast, the ack may come back at once.
+        self._pending_report = (self._report_seq, fingerprint)
+        self.conductor_api.report_data_async(context, self.host, acc_list,
+                                             self._report_seq,
+                                             fingerprint=fingerprint,
+                                             server=self._report_conductor)
+
+    def report_ack(self, seq, applied, conductor=None):
+        """Handle the conductor acknowledgement of an async report.
+
+        Acks of reports older than the last one sent are ignored. If the
+        report was not applied, the next report sends the full device list.
+        The next reports are sent to the conductor which processed this
+        one, if given.
+        """
+        if self._pending_report is None or self._pending_report[0] != seq:
+            LOG.debug("Ignore the ack of outdated report %s.", seq)
+            return
+        fingerprint = self._pending_report[1]
+        self._pending_report = None
+        self._last_report_fingerprint = fingerprint if applied else None
+        if conductor is not None:
+            self._report_conductor = conductor
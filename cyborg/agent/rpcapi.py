@@ -36,10 +36,12 @@ class AgentAPI(object):
     API version history:
 
     |    1.0 - Initial version.
+    |    1.1 - Add report_ack.
+    |    1.2 - Add conductor to report_ack.
 
     """
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.2'
 
     def __init__(self, topic=None):
         super(AgentAPI, self).__init__()
@@ -61,3 +63,20 @@ class AgentAPI(object):
                           controlpath_id=controlpath_id,
                           bitstream_uuid=bitstream_uuid,
                           driver_name=driver_name)
+
+    def report_ack(self, context, hostname, seq, applied, conductor=None):
+        """Acknowledge a report_data_async of the agent.
+
+        :param seq: the sequence number of the processed report.
+        :param applied: whether the conductor accepted the report, the agent
+        sends the full device list again if not.
+        :param conductor: the hostname of the conductor handling the
+        reports of the host, the agent sends its next reports to it.
+        """
+        version = '1.1'
+        msg_args = {'seq': seq, 'applied': applied}
+        if conductor is not None:
+            version = '1.2'
+            msg_args['conductor'] = conductor
+        cctxt = self.client.prepare(server=hostname, version=version)
+        cctxt.cast(context, 'report_ack', **msg_args)
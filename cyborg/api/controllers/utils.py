@@ -13,11 +13,19 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+
 import jsonpatch
+import pecan
+from six.moves.urllib import parse
 import wsme
 
 
+from cyborg.api.controllers import link
+from cyborg.common import exception
 from cyborg.common.i18n import _
+from cyborg.conf import CONF
+from cyborg.db import api as dbapi
 
 
 JSONPATCH_EXCEPTIONS = (jsonpatch.JsonPatchException,
@@ -33,3 +41,87 @@ def apply_jsonpatch(doc, patch):
                         ' the resource is not allowed')
                 raise wsme.exc.ClientSideError(msg % p['path'])
     return jsonpatch.apply_patch(doc, jsonpatch.JsonPatch(patch))
+
+
+def validate_limit(limit):
+    """Get the page size of a listing, capped by CONF.api.max_limit."""
+    if limit is None:
+        return CONF.api.max_limit
+    if limit <= 0:
+        raise exception.InvalidParameterValue(
+            err=_('Limit must be positive: %s') % limit)
+    return min(limit, CONF.api.max_limit)
+
+
+def validate_sort_dir(sort_dir):
+    if sort_dir not in ('asc', 'desc'):
+        raise exception.InvalidParameterValue(
+            err=_("Invalid sort direction: %s. Acceptable values are "
+                  "'asc' or 'desc'") % sort_dir)
+    return sort_dir
+
+
+def validate_pagination(limit, marker, sort_key, sort_dir, minor_version):
+    """Validate the pagination query parameters of a listing.
+
+    :param minor_version: the minor API version which added the pagination
+                          of the listing. The listings of the older versions
+                          are neither paginated nor capped by
+                          CONF.api.max_limit.
+    :returns: a tuple of the page size, None if the listing is not
+              paginated, the sort key and the sort direction.
+    :raises: InvalidParameterValue if a parameter is invalid, or given to
+             an older version.
+    """
+    version = pecan.request.version
+    if version.minor < minor_version:
+        params = {'limit': limit, 'marker': marker, 'sort_key': sort_key,
+                  'sort_dir': sort_dir}
+        given = sorted(key for key, value in params.items()
+                       if value is not None)
+        if given:
+            raise exception.InvalidParameterValue(
+                err=_('The query parameters %(params)s need the API '
+                      'version %(major)d.%(minor)d or later') %
+                {'params': ', '.join(given), 'major': version.major,
+                 'minor': minor_version})
+        return None, 'id', 'asc'
+    return (validate_limit(limit), sort_key or 'id',
+            validate_sort_dir(sort_dir or 'asc'))
+
+
+def get_next_link(resource, items, limit, **kwargs):
+    """Get the link to the next page of a listing.
+
+    :param resource: the resource of the listing, like 'device_profiles'.
+    :param items: the items of the current page, with a 'uuid'.
+    :param limit: the page size.
+    :param kwargs: the other query parameters of the listing, the ones set
+                   to None are left out.
+    :returns: the link, or None if this is the last page.
+    """
+    if not items or len(items) < limit:
+        return None
+    kwargs.update(limit=limit, marker=items[-1]['uuid'])
+    query = parse.urlencode(sorted(
+        (key, value) for key, value in kwargs.items() if value is not None))
+    return link.build_url(resource, '?' + query)
+
+
+def read_from_replica(fn):
+    """Decorate a read-only API handler to read from the replica DB.
+
+    The responses may then lag behind the writes, as the replica does.
+
+    example:
+        @policy.authorize_wsgi("cyborg:device", "get_one")
+        @api_utils.read_from_replica
+        @expose.expose(Device, wtypes.text)
+        def get_one(self, uuid):
+            ...
+    """
+    @functools.wraps(fn)
+    def handle(self, *args, **kwargs):
+        with dbapi.replica_reads(pecan.request.context):
+            return fn(self, *args, **kwargs)
+    return handle
@@ -23,11 +23,14 @@ from oslo_log import log
 from cyborg.api.controllers import base
 from cyborg.api.controllers import link
 from cyborg.api.controllers import types
+from cyborg.api.controllers import utils as api_utils
+from cyborg.api.controllers.v2 import versions
 from cyborg.api import expose
 from cyborg.common import constants
 from cyborg.common import exception
 from cyborg.common.i18n import _
 from cyborg.common import policy
+from cyborg.db import api as dbapi
 from cyborg import objects
 
 LOG = log.getLogger(__name__)
@@ -84,11 +87,25 @@ class ARQCollection(base.APIBase):
     arqs = [ARQ]
     """A list containing arq objects"""
 
+    next = wtypes.text
+    """A link to retrieve the next page of arqs, if any"""
+
     @classmethod
-    def convert_with_links(cls, obj_arqs):
+    def convert_with_links(cls, obj_arqs, limit=None, **kwargs):
+        """Convert the ARQs of a listing.
+
+        :param limit: the page size of a paginated listing. If the page is
+                      full, a link to the next page is set, with the other
+                      query parameters in kwargs.
+        """
         collection = cls()
         collection.arqs = [ARQ.convert_with_links(obj_arq)
                            for obj_arq in obj_arqs]
+        if limit is not None:
+            next_link = api_utils.get_next_link(
+                'accelerator_requests', obj_arqs, limit, **kwargs)
+            if next_link is not None:
+                collection.next = next_link
         return collection
 
 
@@ -99,25 +116,38 @@ class ARQsController(base.CyborgController):
        nova/nova/accelerator/cyborg.py.
     """
 
-    def _get_devprof(self, context, devprof_name):
-        """Get the contents of a device profile.
+    def _get_devprofs(self, context, devprof_names):
+        """Get the contents of some device profiles, with one query.
            Since this is just a read, it is ok for the API layer
            to do this, instead of the conductor.
+
+        :returns: the DeviceProfile objects by name.
+        :raises: ResourceNotFound if a device profile does not exist.
         """
-        try:
-            obj_devprof = objects.DeviceProfile.get_by_name(context,
-                                                            devprof_name)
-            return obj_devprof
-        except Exception:
-            return None
+        obj_devprofs = objects.DeviceProfile.list_by_filters(
+            context, {'name': list(set(devprof_names))})
+        devprofs = dict((obj_devprof.name, obj_devprof)
+                        for obj_devprof in obj_devprofs)
+        for dp_name in devprof_names:
+            if dp_name not in devprofs:
+                raise exception.ResourceNotFound(
+                    resource='Device Profile',
+                    msg='with name=%s' % dp_name)
+        return devprofs
 
     @policy.authorize_wsgi("cyborg:arq", "create", False)
     @expose.expose(ARQCollection, body=types.jsontype,
                    status_code=http_client.CREATED)
     def post(self, req):
-        """Create one or more ARQs for a single device profile.
+        """Create one or more ARQs for one or more device profiles.
            Request body:
               { 'device_profile_name': <string> }
+           or, from the API version 2.2, to create the ARQs of several
+           device profiles at once, like for the instances of a
+           multi-instance boot:
+              [ { 'device_profile_name': <string> }, ... ]
+           The ARQs of each entry are returned together, in the order of
+           the entries.
            Future:
               { 'device_profile_name': <string> # required
                 'device_profile_group_id': <integer>, # opt, default=0
@@ -127,38 +157,50 @@ class ARQsController(base.CyborgController):
         """
         LOG.info("[arq] post req = (%s)", req)
         context = pecan.request.context
-        devprof = None
-        dp_name = req.get('device_profile_name')
-        if dp_name is not None:
-            devprof = self._get_devprof(context, dp_name)
-            if devprof is None:
-                raise exception.ResourceNotFound(
-                    resource='Device Profile',
-                    msg='with name=%s' % dp_name)
-        else:
+        if isinstance(req, list):
+            version = pecan.request.version
+            if version.minor < versions.MINOR_2_ARQ_CREATE_MANY:
+                raise exception.InvalidParameterValue(
+                    err=_('A list of device profiles needs the API version '
+                          '%(major)d.%(minor)d or later') %
+                    {'major': version.major,
+                     'minor': versions.MINOR_2_ARQ_CREATE_MANY})
+        reqs = req if isinstance(req, list) else [req]
+        dp_names = []
+        for one_req in reqs:
+            dp_name = (one_req.get('device_profile_name')
+                       if isinstance(one_req, dict) else None)
+            if dp_name is None:
+                raise exception.DeviceProfileNameNeeded()
+            dp_names.append(dp_name)
+        if not dp_names:
             raise exception.DeviceProfileNameNeeded()
-        LOG.info('[arqs] post. device profile name=%s', dp_name)
+        LOG.info('[arqs] post. device profile names=%s', dp_names)
+        devprofs = self._get_devprofs(context, dp_names)
 
         extarq_list = []
-        for group_id, group in enumerate(devprof.groups):
-            accel_resources = [
-                int(val) for key, val in group.items()
-                if key.startswith('resources')]
-            # If/when we introduce non-accelerator resources, like
-            # device-local memory, the key search above needs to be
-            # made specific to accelerator resources only.
-            num_accels = sum(accel_resources)
-            arq_fields = {
-                'device_profile_name': devprof.name,
-                'device_profile_group_id': group_id,
-            }
-            for i in range(num_accels):
-                obj_arq = objects.ARQ(context, **arq_fields)
-                extarq_fields = {'arq': obj_arq}
-                obj_extarq = objects.ExtARQ(context, **extarq_fields)
-                # TODO(Sundar) The conductor must do all db writes
-                new_extarq = obj_extarq.create(context, devprof.id)
-                extarq_list.append(new_extarq)
+        for dp_name in dp_names:
+            devprof = devprofs[dp_name]
+            for group_id, group in enumerate(devprof.groups):
+                accel_resources = [
+                    int(val) for key, val in group.items()
+                    if key.startswith('resources')]
+                # If/when we introduce non-accelerator resources, like
+                # device-local memory, the key search above needs to be
+                # made specific to accelerator resources only.
+                num_accels = sum(accel_resources)
+                arq_fields = {
+                    'device_profile_name': devprof.name,
+                    'device_profile_group_id': group_id,
+                }
+                for i in range(num_accels):
+                    obj_arq = objects.ARQ(context, **arq_fields)
+                    extarq_fields = {'arq': obj_arq}
+                    extarq_list.append(
+                        objects.ExtARQ(context, **extarq_fields))
+        # TODO(Sundar) The conductor must do all db writes
+        extarq_list = objects.ExtARQ.create_many(context, extarq_list,
+                                                 devprofs)
 
         ret = ARQCollection.convert_with_links(
             [extarq.arq for extarq in extarq_list])
@@ -174,41 +216,60 @@ class ARQsController(base.CyborgController):
         return ARQ.convert_with_links(extarq.arq)
 
     @policy.authorize_wsgi("cyborg:arq", "get_all", False)
-    @expose.expose(ARQCollection, wtypes.text, types.uuid)
-    def get_all(self, bind_state=None, instance=None):
-        """Retrieve a list of arqs."""
+    @expose.expose(ARQCollection, wtypes.text, types.uuid, types.integer,
+                   types.uuid, wtypes.text, wtypes.text)
+    def get_all(self, bind_state=None, instance=None, limit=None,
+                marker=None, sort_key=None, sort_dir=None):
+        """Retrieve a list of arqs.
+
+        The pagination parameters need the API version 2.1 or later.
+
+        :param limit: the maximum number of arqs to return, at most
+                      CONF.api.max_limit.
+        :param marker: the uuid of the last arq of the previous page.
+        :param sort_key: the column to sort the arqs on, 'id' by default.
+        :param sort_dir: the sort direction, 'asc' or 'desc', 'asc' by
+                         default.
+        """
         # TODO(Sundar) Need to implement 'arq=uuid1,...' query parameter
         LOG.info('[arqs] get_all. bind_state:(%s), instance:(%s)',
                  bind_state or '', instance or '')
         context = pecan.request.context
-        extarqs = objects.ExtARQ.list(context)
+        limit, sort_key, sort_dir = api_utils.validate_pagination(
+            limit, marker, sort_key, sort_dir, versions.MINOR_1_PAGINATION)
         state_map = constants.ARQ_BIND_STATES_STATUS_MAP
         valid_bind_states = list(state_map.keys())
-        arqs = [extarq.arq for extarq in extarqs]
-        # TODO(Sundar): Optimize by doing the filtering in the db layer
-        # Apply instance filter before state filter.
         if bind_state:
             if bind_state != 'resolved':
                 raise exception.ARQInvalidState(state=bind_state)
+        # Apply instance filter before state filter: all the ARQs of the
+        # instance are needed to check they are resolved.
+        filters = {}
         if instance:
-            new_arqs = [arq for arq in arqs
-                        if arq['instance_uuid'] == instance]
-            arqs = new_arqs
-            if bind_state:
-                for arq in new_arqs:
-                    if arq['state'] not in valid_bind_states:
-                        # NOTE(Sundar) This should return HTTP code 423
-                        # if any ARQ for this instance is not resolved.
-                        LOG.warning('Some of ARQs for instance %s is not '
-                                    'resolved', instance)
-                        return wsme.api.Response(
-                            None,
-                            status_code=http_client.LOCKED)
+            filters['instance_uuid'] = instance
         elif bind_state:
-            arqs = [arq for arq in arqs
-                    if arq['state'] in valid_bind_states]
+            filters['state'] = valid_bind_states
+        # The listing is read from the replica DB, but for the resolved
+        # ARQs, which are polled right after the binding and must see it.
+        with dbapi.replica_reads(context, replica=not bind_state):
+            extarqs = objects.ExtARQ.list_by_filters(
+                context, filters, sort_key=sort_key, sort_dir=sort_dir,
+                limit=limit, marker=marker)
+        arqs = [extarq.arq for extarq in extarqs]
+        if instance and bind_state:
+            for arq in arqs:
+                if arq['state'] not in valid_bind_states:
+                    # NOTE(Sundar) This should return HTTP code 423
+                    # if any ARQ for this instance is not resolved.
+                    LOG.warning('Some of ARQs for instance %s is not '
+                                'resolved', instance)
+                    return wsme.api.Response(
+                        None,
+                        status_code=http_client.LOCKED)
 
-        ret = ARQCollection.convert_with_links(arqs)
+        ret = ARQCollection.convert_with_links(
+            arqs, limit=limit, bind_state=bind_state, instance=instance,
+            sort_key=sort_key, sort_dir=sort_dir)
         LOG.info('[arqs:get_all] Returned: %s', ret)
         return ret
 
@@ -282,10 +343,8 @@ class ARQsController(base.CyborgController):
     def _check_if_already_bound(context, valid_fields):
         patch_fields = list(valid_fields.values())[0]
         instance_uuid = patch_fields['instance_uuid']
-        extarqs = objects.ExtARQ.list(context)
-        extarqs_for_instance = [
-            extarq for extarq in extarqs
-            if extarq.arq['instance_uuid'] == instance_uuid]
+        extarqs_for_instance = objects.ExtARQ.list_by_filters(
+            context, {'instance_uuid': instance_uuid})
         if extarqs_for_instance:  # duplicate binding request
             msg = _('Instance {} already has accelerator requests. '
                     'Cannot bind additional ARQs.')
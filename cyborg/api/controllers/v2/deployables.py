@@ -22,6 +22,7 @@ from oslo_serialization import jsonutils
 from cyborg.api.controllers import base
 from cyborg.api.controllers import link
 from cyborg.api.controllers import types
+from cyborg.api.controllers import utils as api_utils
 from cyborg.api import expose
 from cyborg.common import policy
 from cyborg import objects
@@ -50,6 +51,9 @@ class Deployable(base.APIBase):
     num_accelerators = types.integer
     """The number of accelerators of the deployable"""
 
+    num_accel_in_use = types.integer
+    """The number of accelerators of the deployable in use"""
+
     device_id = types.integer
     """The device on which the deployable is located"""
 
@@ -111,6 +115,7 @@ class DeployablesController(base.CyborgController,
     """REST controller for Deployables."""
 
     @policy.authorize_wsgi("cyborg:deployable", "get_one")
+    @api_utils.read_from_replica
     @expose.expose(Deployable, types.uuid)
     def get_one(self, uuid):
         """Retrieve information about the given deployable.
@@ -121,6 +126,7 @@ class DeployablesController(base.CyborgController,
         return self.convert_with_link(obj_dep)
 
     @policy.authorize_wsgi("cyborg:deployable", "get_all")
+    @api_utils.read_from_replica
     @expose.expose(DeployableCollection, wtypes.ArrayType(types.FilterType))
     def get_all(self, filters=None):
         """Retrieve a list of deployables.
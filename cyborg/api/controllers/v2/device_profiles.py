@@ -25,6 +25,8 @@ from oslo_utils import uuidutils
 from cyborg.api.controllers import base
 from cyborg.api.controllers import link
 from cyborg.api.controllers import types
+from cyborg.api.controllers import utils as api_utils
+from cyborg.api.controllers.v2 import versions
 from cyborg.api import expose
 from cyborg.common import exception
 from cyborg.common import policy
@@ -145,42 +147,69 @@ class DeviceProfilesController(base.CyborgController,
                             err="Device profile trait values must be one "
                                 "among %s" % TRAIT_VALUES)
 
-    def _get_device_profile_list(self, names=None, uuid=None):
+    def _get_device_profile_list(self, names=None, uuid=None, limit=None,
+                                 marker=None, sort_key='id', sort_dir='asc'):
         """Get a list of API objects representing device profiles."""
 
         context = pecan.request.context
-        obj_devprofs = objects.DeviceProfile.list(context)
+        filters = {}
         if names:
-            new_obj_devprofs = [devprof for devprof in obj_devprofs
-                                if devprof['name'] in names]
-            obj_devprofs = new_obj_devprofs
+            filters['name'] = names
         elif uuid is not None:
-            new_obj_devprofs = [devprof for devprof in obj_devprofs
-                                if devprof['uuid'] == uuid]
-            obj_devprofs = new_obj_devprofs
+            filters['uuid'] = uuid
+        obj_devprofs = objects.DeviceProfile.list_by_filters(
+            context, filters, sort_key=sort_key, sort_dir=sort_dir,
+            limit=limit, marker=marker)
 
         api_obj_devprofs = self.get_device_profiles(obj_devprofs)
 
         return api_obj_devprofs
 
     @policy.authorize_wsgi("cyborg:device_profile", "get_all", False)
-    @expose.expose('json', wtypes.text)
-    def get_all(self, name=None):
-        """Retrieve a list of device profiles."""
+    @api_utils.read_from_replica
+    @expose.expose('json', wtypes.text, types.integer, types.uuid,
+                   wtypes.text, wtypes.text)
+    def get_all(self, name=None, limit=None, marker=None, sort_key=None,
+                sort_dir=None):
+        """Retrieve a list of device profiles.
+
+        The pagination parameters need the API version 2.1 or later.
+
+        :param name: a comma-delimited list of device profile names.
+        :param limit: the maximum number of device profiles to return, at
+                      most CONF.api.max_limit.
+        :param marker: the uuid of the last device profile of the previous
+                       page.
+        :param sort_key: the column to sort the device profiles on, 'id' by
+                         default.
+        :param sort_dir: the sort direction, 'asc' or 'desc', 'asc' by
+                         default.
+        """
         if name is not None:
             names = name.split(',')
         else:
             names = []
         LOG.info('[device_profiles] get_all. names=%s', names)
-        api_obj_devprofs = self._get_device_profile_list(names)
+        limit, sort_key, sort_dir = api_utils.validate_pagination(
+            limit, marker, sort_key, sort_dir, versions.MINOR_1_PAGINATION)
+        api_obj_devprofs = self._get_device_profile_list(
+            names, limit=limit, marker=marker, sort_key=sort_key,
+            sort_dir=sort_dir)
 
         ret = {"device_profiles": api_obj_devprofs}
+        if limit is not None:
+            next_link = api_utils.get_next_link(
+                'device_profiles', api_obj_devprofs, limit, name=name,
+                sort_key=sort_key, sort_dir=sort_dir)
+            if next_link is not None:
+                ret['next'] = next_link
         LOG.info('[device_profiles] get_all returned: %s', ret)
         # TODO(Sundar) Replace this with convert_with_links()
         return wsme.api.Response(ret, status_code=http_client.OK,
                                  return_type=wsme.types.DictType)
 
     @policy.authorize_wsgi("cyborg:device_profile", "get_one")
+    @api_utils.read_from_replica
     @expose.expose('json', wtypes.text)
     def get_one(self, uuid):
         """Retrieve a single device profile by uuid."""
@@ -22,6 +22,7 @@ from oslo_log import log
 from cyborg.api.controllers import base
 from cyborg.api.controllers import link
 from cyborg.api.controllers import types
+from cyborg.api.controllers import utils as api_utils
 from cyborg.api import expose
 from cyborg.common import policy
 from cyborg import objects
@@ -94,6 +95,7 @@ class DevicesController(base.CyborgController):
     """REST controller for Devices."""
 
     @policy.authorize_wsgi("cyborg:device", "get_one")
+    @api_utils.read_from_replica
     @expose.expose(Device, wtypes.text)
     def get_one(self, uuid):
         """Get a single device by UUID.
@@ -104,6 +106,7 @@ class DevicesController(base.CyborgController):
         return Device.convert_with_links(device)
 
     @policy.authorize_wsgi("cyborg:device", "get_all", False)
+    @api_utils.read_from_replica
     @expose.expose(DeviceCollection, wtypes.text, wtypes.text, wtypes.text,
                    wtypes.ArrayType(types.FilterType))
     def get_all(self, type=None, vendor=None, hostname=None, filters=None):
@@ -19,7 +19,13 @@ BASE_VERSION = 2
 
 # String representations of the minor and maximum versions
 _MIN_VERSION_STRING = "2.0"
-_MAX_VERSION_STRING = "2.0"
+_MAX_VERSION_STRING = "2.2"
+
+# The minor versions, see cyborg/api/rest_api_version_history.rst.
+# v2.1: paginate the accelerator request and device profile listings.
+# v2.2: create the accelerator requests of a list of device profiles.
+MINOR_1_PAGINATION = 1
+MINOR_2_ARQ_CREATE_MANY = 2
 
 
 def service_type_string():
@@ -253,6 +253,11 @@ class PlacementInventoryNotFound(NotFound):
                  "%(resource_provider)s, resource class %(resource_class)s.")
 
 
+class ConductorNotOwner(Conflict):
+    _msg_fmt = _("Conductor %(conductor)s does not handle the reports of "
+                 "host %(host)s, conductor %(owner)s does.")
+
+
 class PlacementInventoryUpdateConflict(Conflict):
     _msg_fmt = _("Placement inventory update conflict for resource provider "
                  "%(resource_provider)s, resource class %(resource_class)s.")
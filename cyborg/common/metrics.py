@@ -0,0 +1,222 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Metrics of the calls made to the other OpenStack services.
+
+Each call through an adapter built by cyborg.common.utils.get_sdk_adapter,
+or through the Glance connection of the ARQs, is recorded, per service,
+HTTP method and endpoint, to the registered sinks. The endpoint is the URL
+path with the uuids and names replaced by placeholders, so the calls to the
+same API are recorded together.
+
+By default, a MemorySink keeps the call counts, status codes and latency
+histograms of the process, and a LoggingSink logs the slow calls. The
+services log what the MemorySink kept every CONF.metrics_log_interval
+seconds, see log_snapshot.
+"""
+
+import abc
+import functools
+import re
+import threading
+import time
+
+from oslo_log import log as logging
+import six
+from six.moves.urllib import parse
+
+from cyborg.conf import CONF
+
+LOG = logging.getLogger(__name__)
+
+# The upper bounds in seconds of the latency histogram buckets, the last
+# bucket holds the slower calls.
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# The status of a call which got no response.
+NO_RESPONSE = 'error'
+
+_UUID_RE = re.compile(
+    r'^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?'
+    r'[0-9a-fA-F]{12}$')
+# The collections whose members are identified by a name.
+_NAMED_COLLECTIONS = ('traits', 'resource_classes')
+
+
+@functools.lru_cache(maxsize=1024)
+def get_endpoint(url):
+    """Get the endpoint of a URL, like '/resource_providers/{uuid}/traits'.
+
+    The query parameter names are kept, as they select different APIs of
+    a collection.
+    """
+    url = parse.urlsplit(url)
+    segments = url.path.split('/')
+    for i, segment in enumerate(segments):
+        if _UUID_RE.match(segment):
+            segments[i] = '{uuid}'
+        elif i > 0 and segments[i - 1] in _NAMED_COLLECTIONS and segment:
+            segments[i] = '{name}'
+    endpoint = '/'.join(segments)
+    if url.query:
+        endpoint += '?' + '&'.join(sorted(
+            set(name for name, _ in parse.parse_qsl(
+                url.query, keep_blank_values=True))))
+    return endpoint
+
+
+@six.add_metaclass(abc.ABCMeta)
+class MetricsSink(object):
+    """Receive the calls made to the other services."""
+
+    @abc.abstractmethod
+    def record(self, service, method, endpoint, status, duration):
+        """Record a call.
+
+        :param service: the service type, like 'placement'.
+        :param method: the HTTP method.
+        :param endpoint: the endpoint, as given by get_endpoint.
+        :param status: the HTTP status code, or NO_RESPONSE.
+        :param duration: the duration of the call in seconds.
+        """
+
+
+class LoggingSink(MetricsSink):
+    """Log the calls which take longer than CONF.slow_call_threshold."""
+
+    def record(self, service, method, endpoint, status, duration):
+        threshold = CONF.slow_call_threshold
+        if threshold and duration >= threshold:
+            LOG.warning("Slow %(service)s call %(method)s %(endpoint)s: "
+                        "%(status)s in %(duration).3f seconds.",
+                        {'service': service, 'method': method,
+                         'endpoint': endpoint, 'status': status,
+                         'duration': duration})
+
+
+class MemorySink(MetricsSink):
+    """Keep the call counts, status codes and latency histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def record(self, service, method, endpoint, status, duration):
+        key = (service, method, endpoint)
+        bucket = len(LATENCY_BUCKETS)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                bucket = i
+                break
+        with self._lock:
+            calls = self._calls.get(key)
+            if calls is None:
+                calls = self._calls[key] = {
+                    'count': 0,
+                    'total_time': 0.0,
+                    'max_time': 0.0,
+                    'statuses': {},
+                    'latency': [0] * (len(LATENCY_BUCKETS) + 1),
+                }
+            calls['count'] += 1
+            calls['total_time'] += duration
+            calls['max_time'] = max(calls['max_time'], duration)
+            calls['statuses'][status] = calls['statuses'].get(status, 0) + 1
+            calls['latency'][bucket] += 1
+
+    def snapshot(self):
+        """Get the calls recorded so far.
+
+        :returns: a dict with, for each (service, method, endpoint), a dict
+                  with the 'count', 'total_time' and 'max_time' of the
+                  calls, the counts per status in 'statuses', and the counts
+                  per LATENCY_BUCKETS bucket in 'latency'.
+        """
+        with self._lock:
+            return dict(
+                (key, dict(calls, statuses=dict(calls['statuses']),
+                           latency=list(calls['latency'])))
+                for key, calls in self._calls.items())
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
+
+
+_MEMORY_SINK = MemorySink()
+_SINKS = [_MEMORY_SINK, LoggingSink()]
+
+
+def register_sink(sink):
+    """Send the calls to another sink, in addition to the default ones."""
+    _SINKS.append(sink)
+
+
+def unregister_sink(sink):
+    _SINKS.remove(sink)
+
+
+def snapshot():
+    """Get the calls of the process, as kept by the default MemorySink."""
+    return _MEMORY_SINK.snapshot()
+
+
+def log_snapshot():
+    """Log the calls of the process, as kept by the default MemorySink."""
+    for (service, method, endpoint), calls in sorted(snapshot().items()):
+        LOG.info("%(service)s calls %(method)s %(endpoint)s: %(count)d "
+                 "calls, %(mean).3f seconds on average, %(max).3f seconds "
+                 "at most, statuses %(statuses)s, latency histogram "
+                 "%(latency)s.",
+                 {'service': service, 'method': method,
+                  'endpoint': endpoint, 'count': calls['count'],
+                  'mean': calls['total_time'] / calls['count'],
+                  'max': calls['max_time'], 'statuses': calls['statuses'],
+                  'latency': calls['latency']})
+
+
+def record(service, method, url, status, duration):
+    """Record a call to a service to all the sinks."""
+    endpoint = get_endpoint(url)
+    for sink in _SINKS:
+        try:
+            sink.record(service, method, endpoint, status, duration)
+        except Exception:
+            LOG.exception("Failed to record a call to %s in %s.",
+                          service, sink)
+
+
+def instrument(adapter, service):
+    """Record the calls made through an adapter.
+
+    :param adapter: a keystoneauth1 Adapter, whose get, post, put and
+                    delete methods all go through its request method.
+    :param service: the service type the adapter is for.
+    :returns: the adapter.
+    """
+    request = adapter.request
+
+    @functools.wraps(request)
+    def _request(url, method, *args, **kwargs):
+        start = time.monotonic()
+        status = NO_RESPONSE
+        try:
+            resp = request(url, method, *args, **kwargs)
+            status = resp.status_code
+            return resp
+        except Exception as e:
+            status = getattr(e, 'http_status', None) or NO_RESPONSE
+            raise
+        finally:
+            record(service, method, url, status, time.monotonic() - start)
+
+    adapter.request = _request
+    return adapter
@@ -13,6 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+import random
+import threading
+import time
+
 from cyborg.common import exception
 from cyborg.common import utils
 from keystoneauth1 import exceptions as ks_exc
@@ -25,6 +30,157 @@ LOG = logging.getLogger(__name__)
 NESTED_PROVIDER_API_VERSION = '1.14'
 POST_RPS_RETURNS_PAYLOAD_API_VERSION = '1.20'
 PLACEMENT_CLIENT_SEMAPHORE = 'placement_client'
+# The custom traits known to exist in Placement, shared by the clients of
+# the process. Cyborg never deletes traits, so it only grows.
+_KNOWN_TRAITS = set()
+# The number of times a write is retried after a generation conflict, and
+# the max delay in seconds before the first retry, doubled for each retry.
+GENERATION_CONFLICT_RETRIES = 3
+GENERATION_CONFLICT_DELAY = 0.1
+
+
+class ProviderTree(object):
+    """The resource providers read or written by Cyborg, with the
+    generation, inventories and traits last seen for each of them.
+
+    A provider is a dict with the fields of Placement's provider
+    representation, plus 'inventories' and 'traits' which are None until
+    known. They are only trusted at the generation they were seen at: a
+    provider seen at another generation forgets them, and a provider whose
+    write failed is dropped, so it is read again from Placement.
+    """
+
+    def __init__(self):
+        self._providers = {}
+        # The roots whose whole tree was read from Placement.
+        self._roots = set()
+        self._lock = threading.Lock()
+
+    def get(self, rp_uuid):
+        """Get a copy of a provider, None if it is unknown."""
+        with self._lock:
+            provider = self._providers.get(rp_uuid)
+            return copy.deepcopy(provider) if provider else None
+
+    def update(self, rp_uuid, generation=None, base_generation=None,
+               **fields):
+        """Record what was read or written about a provider.
+
+        :param generation: the generation of the provider now.
+        :param base_generation: the generation a successful write was made
+            at. The inventories and traits known at that generation are
+            still valid, except the written ones.
+        :param fields: the other provider fields seen, like 'inventories'
+            or 'traits'.
+        """
+        with self._lock:
+            provider = self._providers.get(rp_uuid)
+            if provider is None:
+                provider = {'uuid': rp_uuid, 'generation': None,
+                            'inventories': None, 'traits': None}
+                self._providers[rp_uuid] = provider
+            if (generation is not None and
+                    provider['generation'] not in (generation,
+                                                   base_generation)):
+                provider['inventories'] = None
+                provider['traits'] = None
+            if generation is not None:
+                provider['generation'] = generation
+            parent_uuid = fields.get('parent_provider_uuid')
+            if parent_uuid and not fields.get('root_provider_uuid'):
+                parent = self._providers.get(parent_uuid, {})
+                fields['root_provider_uuid'] = parent.get(
+                    'root_provider_uuid', parent_uuid)
+            provider.update(copy.deepcopy(fields))
+
+    def remove(self, rp_uuid):
+        """Forget a provider."""
+        with self._lock:
+            self._providers.pop(rp_uuid, None)
+            self._roots.discard(rp_uuid)
+
+    def set_tree(self, root_uuid, providers):
+        """Record the providers of a tree read from Placement.
+
+        :param providers: the provider representations.
+        """
+        with self._lock:
+            uuids = set(provider['uuid'] for provider in providers)
+            for rp_uuid, provider in list(self._providers.items()):
+                if (provider.get('root_provider_uuid') == root_uuid and
+                        rp_uuid not in uuids):
+                    del self._providers[rp_uuid]
+            self._roots.add(root_uuid)
+        for provider in providers:
+            fields = dict(provider)
+            fields.pop('uuid')
+            self.update(provider['uuid'], **fields)
+
+    def get_tree(self, rp_uuid):
+        """Get the providers of the tree of a provider.
+
+        :returns: a list of provider copies, or None if the tree was not
+                  read from Placement.
+        """
+        with self._lock:
+            provider = self._providers.get(rp_uuid)
+            if provider is None:
+                return None
+            root_uuid = provider.get('root_provider_uuid')
+            if root_uuid not in self._roots:
+                return None
+            return [copy.deepcopy(p) for p in self._providers.values()
+                    if p.get('root_provider_uuid') == root_uuid]
+
+
+# The providers known by the clients of the process.
+_PROVIDER_TREE = ProviderTree()
+
+
+def get_subtree(providers, rp_uuids):
+    """Get the providers of a tree which are in the subtrees of some of them.
+
+    :param providers: the provider representations of the tree.
+    :param rp_uuids: the uuids of the roots of the subtrees.
+    :returns: the providers in the subtrees, including their roots.
+    """
+    by_uuid = dict((provider['uuid'], provider) for provider in providers)
+    rp_uuids = set(rp_uuids)
+    subtree = []
+    for provider in providers:
+        ancestor = provider
+        while ancestor is not None:
+            if ancestor['uuid'] in rp_uuids:
+                subtree.append(provider)
+                break
+            ancestor = by_uuid.get(ancestor.get('parent_provider_uuid'))
+    return subtree
+
+
+def get_provider_levels(providers):
+    """Split providers by their depth among them.
+
+    :param providers: the provider representations. A provider whose
+                      parent is not among them is at depth 0.
+    :returns: a list with, for each depth from 0, the list of the uuids of
+              the providers at that depth.
+    """
+    by_uuid = dict((provider['uuid'], provider) for provider in providers)
+    depths = {}
+    for provider in providers:
+        path = []
+        rp_uuid = provider['uuid']
+        while rp_uuid in by_uuid and rp_uuid not in depths:
+            path.append(rp_uuid)
+            rp_uuid = by_uuid[rp_uuid].get('parent_provider_uuid')
+        depth = depths.get(rp_uuid, -1)
+        for rp_uuid in reversed(path):
+            depth += 1
+            depths[rp_uuid] = depth
+    levels = [[] for _ in range(max(depths.values()) + 1 if depths else 0)]
+    for provider in providers:
+        levels[depths[provider['uuid']]].append(provider['uuid'])
+    return levels
 
 
 class PlacementClient(object):
@@ -32,6 +188,7 @@ class PlacementClient(object):
 
     def __init__(self):
         self._client = utils.get_sdk_adapter('placement')
+        self.provider_tree = _PROVIDER_TREE
 
     def get(self, url, version=None, global_request_id=None):
         res = self._client.get(url, microversion=version,
@@ -69,19 +226,130 @@ class PlacementClient(object):
                 "Placement Server has some error at this time.")
         return res
 
-    def _get_rp_traits(self, rp_uuid):
-        resp = self.get("/resource_providers/%s/traits" % rp_uuid,
-                        version='1.6')
+    def _get_generation(self, rp_uuid):
+        """Get the last known generation of a provider, reading it from
+        Placement if it is not known.
+        """
+        provider = self.provider_tree.get(rp_uuid)
+        if provider is None or provider['generation'] is None:
+            provider = self.get_resource_provider(rp_uuid)
+        return provider['generation']
+
+    def _record_provider(self, provider):
+        """Record a provider representation read from Placement."""
+        fields = dict((key, value) for key, value in provider.items()
+                      if key in ('name', 'parent_provider_uuid',
+                                 'root_provider_uuid'))
+        self.provider_tree.update(provider['uuid'],
+                                  generation=provider['generation'],
+                                  **fields)
+
+    @staticmethod
+    def _conflict_delay(attempt):
+        """Sleep before retrying a write after a generation conflict, with
+        jitter so racing writers do not retry in lockstep.
+        """
+        time.sleep(random.uniform(0, GENERATION_CONFLICT_DELAY * 2 ** attempt))
+
+    def _put_generation_checked(self, rp_uuid, url, field, value, generation,
+                                version=None):
+        """PUT a field of a provider with its generation, and record the
+        new value in the provider tree.
+
+        :returns: the response body.
+        :raises ResourceProviderUpdateConflict: on a generation conflict.
+        :raises PlacementResourceProviderNotFound: if it does not exist.
+        """
+        payload = {field: value, 'resource_provider_generation': generation}
+        try:
+            resp = self.put(url, payload, version=version)
+        except ks_exc.Conflict as e:
+            resp = getattr(e, 'response', None)
+            if resp is None:
+                self.provider_tree.remove(rp_uuid)
+                raise exception.ResourceProviderUpdateConflict(
+                    uuid=rp_uuid, generation=generation, error=e)
+        except ks_exc.NotFound:
+            resp = None
+        if resp is None or resp.status_code == 404:
+            self.provider_tree.remove(rp_uuid)
+            raise exception.PlacementResourceProviderNotFound(
+                resource_provider=rp_uuid)
+        if resp.status_code == 409:
+            self.provider_tree.remove(rp_uuid)
+            raise exception.ResourceProviderUpdateConflict(
+                uuid=rp_uuid, generation=generation, error=resp.text)
+        if resp.status_code != 200:
+            self.provider_tree.remove(rp_uuid)
+            raise Exception(
+                "Failed to update rp %s with %s: HTTP %d: %s" %
+                (rp_uuid, payload, resp.status_code, resp.text))
+        body = resp.json()
+        self.provider_tree.update(
+            rp_uuid, generation=body.get('resource_provider_generation'),
+            base_generation=generation, **{field: value})
+        return body
+
+    def get_traits(self, rp_uuid, refresh=False):
+        """Get the traits of a resource provider.
+
+        :param refresh: read them from Placement even if they are known.
+        :returns: a dict with the 'traits' and the
+                  'resource_provider_generation' of the provider.
+        :raises PlacementResourceProviderNotFound: if it does not exist.
+        """
+        provider = self.provider_tree.get(rp_uuid)
+        if (not refresh and provider is not None and
+                provider['traits'] is not None):
+            return {'traits': provider['traits'],
+                    'resource_provider_generation': provider['generation']}
+        try:
+            resp = self.get("/resource_providers/%s/traits" % rp_uuid,
+                            version='1.6')
+        except ks_exc.NotFound:
+            resp = None
+        if resp is None or resp.status_code == 404:
+            raise exception.PlacementResourceProviderNotFound(
+                resource_provider=rp_uuid)
         if resp.status_code != 200:
             raise Exception(
                 "Failed to get traits for rp %s: HTTP %d: %s" %
                 (rp_uuid, resp.status_code, resp.text))
-        return resp.json()
+        traits_json = resp.json()
+        self.provider_tree.update(
+            rp_uuid, generation=traits_json['resource_provider_generation'],
+            traits=traits_json['traits'])
+        return traits_json
+
+    def set_traits(self, rp_uuid, traits, generation):
+        """Replace the traits of a resource provider in one write.
+
+        The traits must exist, see ensure_traits. The write is not retried
+        on a generation conflict, since the traits were computed from the
+        provider at that generation.
+
+        :param generation: the generation of the provider the traits were
+                           computed from.
+        :returns: the new generation of the provider.
+        :raises ResourceProviderUpdateConflict: if the provider changed
+                                                since that generation.
+        """
+        body = self._put_generation_checked(
+            rp_uuid, "/resource_providers/%s/traits" % rp_uuid, 'traits',
+            sorted(traits), generation, version='1.6')
+        return body['resource_provider_generation']
+
+    def ensure_traits(self, trait_names):
+        """Make sure the traits exist in Placement.
 
-    def _ensure_traits(self, trait_names):
+        Standard traits always exist, and the custom traits already created
+        or found by a client of the process are not PUT again.
+        """
         # TODO(Xinran): maintain a reference count of how many RPs use
         # this trait and do the deletion only when the last RP is deleted.
         for trait in trait_names:
+            if trait in _KNOWN_TRAITS or not trait.startswith('CUSTOM_'):
+                continue
             resp = self.put("/traits/%s" % trait, None, version='1.6')
             if resp.status_code == 201:
                 LOG.info("Created trait %(trait)s", {"trait": trait})
@@ -91,45 +359,59 @@ class PlacementClient(object):
                 raise Exception(
                     "Failed to create trait %s: HTTP %d: %s" %
                     (trait, resp.status_code, resp.text))
+            _KNOWN_TRAITS.add(trait)
 
-    def _put_rp_traits(self, rp_uuid, traits_json):
-        generation = self.get_resource_provider(
-            resource_provider_uuid=rp_uuid)['generation']
-        payload = {
-            'resource_provider_generation': generation,
-            'traits': traits_json["traits"],
-        }
-        resp = self.put(
-            "/resource_providers/%s/traits" % rp_uuid, payload, version='1.6')
-        if resp.status_code != 200:
-            raise Exception(
-                "Failed to set traits to %s for rp %s: HTTP %d: %s" %
-                (traits_json, rp_uuid, resp.status_code, resp.text))
+    def update_traits(self, rp_uuid, add=None, remove=None,
+                      remove_prefixes=None):
+        """Add and remove traits of a resource provider in one write.
+
+        :param add: the trait names to add.
+        :param remove: the trait names to remove.
+        :param remove_prefixes: remove the traits with one of these
+                                prefixes, except the ones in add.
+        :returns: the traits of the provider.
+        """
+        add = set(add or [])
+        remove = set(remove or [])
+        remove_prefixes = tuple(remove_prefixes or [])
+        self.ensure_traits(sorted(add))
+
+        def _get_new_traits(current):
+            return add | set(trait for trait in current
+                             if trait not in remove and
+                             not (remove_prefixes and
+                                  trait.startswith(remove_prefixes)))
+
+        # Read, modify and write the traits again if another writer
+        # changed the provider in between.
+        for attempt in range(GENERATION_CONFLICT_RETRIES + 1):
+            traits_json = self.get_traits(rp_uuid)
+            traits = _get_new_traits(traits_json['traits'])
+            if traits == set(traits_json['traits']):
+                # The provider tree misses the writes of the other API
+                # workers and conductors, a write is only skipped if the
+                # traits in Placement need none.
+                traits_json = self.get_traits(rp_uuid, refresh=True)
+                traits = _get_new_traits(traits_json['traits'])
+                if traits == set(traits_json['traits']):
+                    return traits
+            try:
+                self.set_traits(rp_uuid, traits,
+                                traits_json['resource_provider_generation'])
+                return traits
+            except exception.ResourceProviderUpdateConflict:
+                if attempt == GENERATION_CONFLICT_RETRIES:
+                    raise
+                self._conflict_delay(attempt)
 
     def add_traits_to_rp(self, rp_uuid, trait_names):
-        self._ensure_traits(trait_names)
-        traits_json = self._get_rp_traits(rp_uuid)
-        traits = list(set(traits_json['traits'] + trait_names))
-        traits_json['traits'] = traits
-        self._put_rp_traits(rp_uuid, traits_json)
+        self.update_traits(rp_uuid, add=trait_names)
 
     def delete_trait_by_name(self, rp_uuid, trait_name):
-        traits_json = self._get_rp_traits(rp_uuid)
-        traits = [
-            trait for trait in traits_json['traits']
-            if trait != trait_name
-            ]
-        traits_json['traits'] = traits
-        self._put_rp_traits(rp_uuid, traits_json)
+        self.update_traits(rp_uuid, remove=[trait_name])
 
     def delete_traits_with_prefixes(self, rp_uuid, trait_prefixes):
-        traits_json = self._get_rp_traits(rp_uuid)
-        traits = [
-            trait for trait in traits_json['traits']
-            if not any(trait.startswith(prefix)
-                       for prefix in trait_prefixes)]
-        traits_json['traits'] = traits
-        self._put_rp_traits(rp_uuid, traits_json)
+        self.update_traits(rp_uuid, remove_prefixes=trait_prefixes)
 
     def get_placement_request_id(self, response):
         if response is not None:
@@ -138,19 +420,58 @@ class PlacementClient(object):
     def update_inventory(
             self, resource_provider_uuid, inventories,
             resource_provider_generation=None):
-        if resource_provider_generation is None:
-            resource_provider_generation = self.get_resource_provider(
-                resource_provider_uuid=resource_provider_uuid)['generation']
+        """Replace the inventories of a resource provider.
+
+        The last known generation of the provider is used if none is given,
+        it is only read from Placement if unknown or after a conflict. The
+        inventories do not depend on the previous ones, so the write is
+        retried with the new generation on a conflict.
+
+        :returns: the response body, with the new generation.
+        :raises ResourceProviderUpdateConflict: if the conflicts persist.
+        """
+        url = '/resource_providers/%s/inventories' % resource_provider_uuid
+        generation = resource_provider_generation
+        for attempt in range(GENERATION_CONFLICT_RETRIES + 1):
+            if generation is None:
+                generation = self._get_generation(resource_provider_uuid)
+            try:
+                return self._put_generation_checked(
+                    resource_provider_uuid, url, 'inventories', inventories,
+                    generation)
+            except exception.ResourceProviderUpdateConflict:
+                if attempt == GENERATION_CONFLICT_RETRIES:
+                    raise
+                generation = None
+                self._conflict_delay(attempt)
+
+    def get_inventories(self, resource_provider_uuid, refresh=False):
+        """Get the inventories of a resource provider.
+
+        :param refresh: read them from Placement even if they are known.
+        :returns: a dict with the 'inventories' and the
+                  'resource_provider_generation' of the provider.
+        :raises PlacementResourceProviderNotFound: if it does not exist.
+        """
+        provider = self.provider_tree.get(resource_provider_uuid)
+        if (not refresh and provider is not None and
+                provider['inventories'] is not None):
+            return {'inventories': provider['inventories'],
+                    'resource_provider_generation': provider['generation']}
         url = '/resource_providers/%s/inventories' % resource_provider_uuid
-        body = {
-            'resource_provider_generation': resource_provider_generation,
-            'inventories': inventories
-        }
         try:
-            return self.put(url, body).json()
+            resp = self.get(url)
         except ks_exc.NotFound:
+            resp = None
+        if resp is None or resp.status_code == 404:
             raise exception.PlacementResourceProviderNotFound(
                 resource_provider=resource_provider_uuid)
+        inventories = resp.json()
+        self.provider_tree.update(
+            resource_provider_uuid,
+            generation=inventories['resource_provider_generation'],
+            inventories=inventories['inventories'])
+        return inventories
 
     def get_resource_provider(self, resource_provider_uuid):
         """Get resource provider by UUID.
@@ -161,10 +482,15 @@ class PlacementClient(object):
         """
         url = '/resource_providers/%s' % resource_provider_uuid
         try:
-            return self.get(url).json()
+            provider = self.get(url).json()
         except ks_exc.NotFound:
             raise exception.PlacementResourceProviderNotFound(
                 resource_provider=resource_provider_uuid)
+        if provider.get('generation') is None:
+            self.provider_tree.remove(resource_provider_uuid)
+        else:
+            self._record_provider(provider)
+        return provider
 
     def _create_resource_provider(self, context, uuid, name,
                                   parent_provider_uuid=None):
@@ -205,14 +531,19 @@ class PlacementClient(object):
                 'placement_req_id': placement_req_id,
             }
             LOG.info(msg, args)
-            return resp.json()
+            provider = resp.json()
+            self._record_provider(provider)
+            return provider
 
     def ensure_resource_provider(self, context, uuid, name=None,
                                  parent_provider_uuid=None):
+        if self.provider_tree.get(uuid) is not None:
+            return uuid
         resp = self.get("/resource_providers/%s" % uuid, version='1.6')
         if resp.status_code == 200:
             LOG.info("Resource Provider %(uuid)s already exists",
                      {"uuid": uuid})
+            self._record_provider(resp.json())
         else:
             LOG.info("Creating resource provider %(provider)s",
                      {"provider": name or uuid})
@@ -254,22 +585,34 @@ class PlacementClient(object):
                 LOG.info("Successfully created resource class %(rc_name).", {
                          "rc_name", name})
 
-    def get_providers_in_tree(self, context, uuid):
+    def get_providers_in_tree(self, context, uuid, refresh=False):
         """Queries the placement API for a list of the resource providers in
         the tree associated with the specified UUID.
 
+        The tree is read from the provider tree once it was queried.
+
         :param context: The security context
         :param uuid: UUID identifier for the resource provider to look up
+        :param refresh: query the placement API even if the tree is known.
         :return: A list of dicts of resource provider information, which may be
                  empty if no provider exists with the specified UUID.
         :raise: ResourceProviderRetrievalFailed on error.
         """
+        if not refresh:
+            providers = self.provider_tree.get_tree(uuid)
+            if providers is not None:
+                return providers
         resp = self.get("/resource_providers?in_tree=%s" % uuid,
                         version=NESTED_PROVIDER_API_VERSION,
                         global_request_id=context.global_id)
 
         if resp.status_code == 200:
-            return resp.json()['resource_providers']
+            providers = resp.json()['resource_providers']
+            if providers:
+                self.provider_tree.set_tree(
+                    providers[0].get('root_provider_uuid') or uuid,
+                    providers)
+            return providers
 
         # Some unexpected error
         placement_req_id = self.get_placement_request_id(resp)
@@ -290,9 +633,13 @@ class PlacementClient(object):
                            global_request_id=global_request_id)
         # Check for 404 since we don't need to warn/raise if we tried to delete
         # something which doesn"t actually exist.
+        self.provider_tree.remove(rp_uuid)
         if resp.ok:
             LOG.info("Deleted resource provider %s", rp_uuid)
             return
+        if resp.status_code == 404:
+            LOG.debug("Resource provider %s is already deleted", rp_uuid)
+            return
 
         msg = ("[%(placement_req_id)s] Failed to delete resource provider "
                "with UUID %(uuid)s from the placement API. Got "
@@ -310,3 +657,34 @@ class PlacementClient(object):
         if resp.status_code == 409:
             raise exception.ResourceProviderInUse()
         raise exception.ResourceProviderDeletionFailed(uuid=rp_uuid)
+
+    def delete_providers(self, providers, max_workers=1,
+                         global_request_id=None):
+        """Delete resource providers, the children before their parents.
+
+        The providers are deleted one depth level at a time, deepest first,
+        with at most max_workers deletions of a level in flight.
+
+        :param providers: the provider representations, which must include
+                          the children of each provider.
+        :raises: the first error of a level, after the other deletions of
+                 the level. The upper levels are then left in place.
+        """
+        def _delete(rp_uuid):
+            try:
+                self.delete_provider(rp_uuid,
+                                     global_request_id=global_request_id)
+            except Exception as exc:
+                return exc
+
+        for level in reversed(get_provider_levels(providers)):
+            workers = min(max_workers, len(level))
+            if workers <= 1:
+                errors = [_delete(rp_uuid) for rp_uuid in level]
+            else:
+                with utils.ThreadPoolExecutor(
+                        max_workers=workers) as executor:
+                    errors = list(executor.map(_delete, level))
+            for error in errors:
+                if error is not None:
+                    raise error
@@ -24,6 +24,7 @@ from cyborg.api import app
 from cyborg.common import config
 from cyborg.common import exception
 from cyborg.common.i18n import _
+from cyborg.common import metrics
 from cyborg.common import rpc
 from cyborg.conf import CONF
 from cyborg import context
@@ -58,6 +59,15 @@ class RPCService(service.Service):
             self.manager.periodic_tasks,
             periodic_interval_max=CONF.periodic_interval,
             context=admin_context)
+        # The long tasks of the manager run on their own timers, not to
+        # delay the periodic tasks.
+        for interval, task in getattr(self.manager, 'get_timers', list)():
+            self.tg.add_timer(interval, task, interval,
+                              context=admin_context)
+        if CONF.metrics_log_interval:
+            self.tg.add_timer(CONF.metrics_log_interval,
+                              metrics.log_snapshot,
+                              CONF.metrics_log_interval)
 
         LOG.info('Created RPC server for service %(service)s on host '
                  '%(host)s.',
@@ -71,6 +81,13 @@ class RPCService(service.Service):
             LOG.exception('Service error occurred when stopping the '
                           'RPC server. Error: %s', e)
 
+        if hasattr(self.manager, 'del_host'):
+            try:
+                self.manager.del_host(context.get_admin_context())
+            except Exception as e:
+                LOG.exception('Service error occurred when cleaning up '
+                              'the manager. Error: %s', e)
+
         super(RPCService, self).stop(graceful=graceful)
         LOG.info('Stopped RPC server for service %(service)s on host '
                  '%(host)s.',
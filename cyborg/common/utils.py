@@ -32,6 +32,7 @@ from oslo_log import log
 
 from cyborg.common import exception
 from cyborg.common.i18n import _
+from cyborg.common import metrics
 import cyborg.conf
 
 
@@ -136,7 +137,8 @@ def get_sdk_adapter(service_type, check_service=False):
     """Construct an openstacksdk-brokered Adapter for a given service type.
     We expect to find a conf group whose name corresponds to the service_type's
     project according to the service-types-authority.  That conf group must
-    provide ksa auth, session, and adapter options.
+    provide ksa auth, session, and adapter options. The calls made through the
+    Adapter are recorded by cyborg.common.metrics.
     :param service_type: String name of the service type for which the Adapter
                          is to be constructed.
     :param check_service: If True, we will query the endpoint to make sure the
@@ -156,7 +158,7 @@ def get_sdk_adapter(service_type, check_service=False):
         raise exception.ServiceUnavailable(
             _("The %(service_type)s service is unavailable: %(error)s") %
             {'service_type': service_type, 'error': six.text_type(e)})
-    return getattr(conn, service_type)
+    return metrics.instrument(getattr(conn, service_type), service_type)
 
 
 def get_endpoint(ksa_adapter):
@@ -0,0 +1,136 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""In-memory caches of the conductor."""
+
+import collections
+import itertools
+
+from oslo_utils import timeutils
+
+
+class InventoryCache(object):
+    """A size-bounded snapshot of the driver device list of each host.
+
+    The snapshot of a host is the device list in the DB after the last
+    write of its device tree by this conductor, so it is only valid while
+    no other conductor writes the host. Each write has a sequence number,
+    and the list is only stored if no other write of the host started
+    meanwhile. The least recently used host is evicted when the cache is
+    full.
+    """
+
+    def __init__(self, size):
+        """:param size: the max number of hosts, 0 disables the cache."""
+        self.size = size
+        self._snapshots = collections.OrderedDict()
+        # The sequence number of the write in progress of each host.
+        self._writes = {}
+        self._write_seq = itertools.count(1)
+
+    def get(self, host):
+        """Get the driver device list of a host, None if not cached."""
+        driver_device_list = self._snapshots.get(host)
+        if driver_device_list is not None:
+            self._snapshots.move_to_end(host)
+        return driver_device_list
+
+    def begin_write(self, host):
+        """Drop the driver device list of a host before writing its
+        device tree.
+
+        :returns: the sequence number of the write.
+        """
+        self._snapshots.pop(host, None)
+        seq = next(self._write_seq)
+        self._writes[host] = seq
+        return seq
+
+    def end_write(self, host, seq, driver_device_list=None):
+        """Store the driver device list of a host after a write.
+
+        :param seq: the sequence number given by begin_write.
+        :param driver_device_list: the device list in the DB after the
+                                   write, None if it is not known. It is
+                                   not stored if another write of the host
+                                   started meanwhile.
+        """
+        if self._writes.get(host) != seq:
+            return
+        del self._writes[host]
+        if self.size <= 0 or driver_device_list is None:
+            return
+        self._snapshots[host] = driver_device_list
+        self._snapshots.move_to_end(host)
+        while len(self._snapshots) > self.size:
+            self._snapshots.popitem(last=False)
+
+    def invalidate(self, host):
+        """Drop the driver device list of a host."""
+        self._snapshots.pop(host, None)
+        self._writes.pop(host, None)
+
+    def clear(self):
+        """Drop the driver device lists of all the hosts."""
+        self._snapshots.clear()
+        self._writes.clear()
+
+
+class ProviderCache(object):
+    """The root resource provider uuid of each host, kept for a while.
+
+    The uuid of a host is resolved with a Placement query, cache it for ttl
+    seconds instead of resolving it on every report of the host. An entry
+    is dropped when a Placement call fails with it, so a root provider
+    recreated in Placement is picked up on the next report. The expired
+    entries are dropped when a new one is stored, so the hosts which stop
+    reporting are not kept.
+
+    :ivar hits: the number of lookups answered from the cache.
+    :ivar misses: the number of lookups not in the cache or expired.
+    """
+
+    def __init__(self, ttl):
+        """:param ttl: the seconds an entry is kept, 0 disables the cache."""
+        self.ttl = ttl
+        # The entries, from the oldest stored.
+        self._providers = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, host):
+        """Get the root provider uuid of a host, None if not cached."""
+        entry = self._providers.get(host)
+        if entry is not None and timeutils.is_older_than(entry[0], self.ttl):
+            self.invalidate(host)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, host, rp_uuid):
+        """Store the root provider uuid of a host."""
+        if self.ttl <= 0:
+            return
+        self._providers.pop(host, None)
+        while self._providers:
+            old_host, entry = next(iter(self._providers.items()))
+            if not timeutils.is_older_than(entry[0], self.ttl):
+                break
+            del self._providers[old_host]
+        self._providers[host] = (timeutils.utcnow(), rp_uuid)
+
+    def invalidate(self, host):
+        """Drop the root provider uuid of a host."""
+        self._providers.pop(host, None)
@@ -0,0 +1,174 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Compute the changes between the old and new driver-side device trees
+reported for one host.
+
+The old and new lists of each layer are indexed once by their identity
+key (cpid_info for devices, name for deployables, key for attributes and
+attach_info for attach handles), so building a plan is linear in the size
+of the trees. The conductor manager then executes the plan against the DB
+and Placement.
+"""
+
+import operator
+
+
+def index_by(obj_list, key):
+    """Index a list of objects by one of their fields.
+
+    If several objects have the same value, the first one is kept.
+
+    :param obj_list: a list of objects.
+    :param key: the field name, or a function returning the index key.
+    :return: a dict mapping the key value to the object.
+    """
+    if not callable(key):
+        key = operator.attrgetter(key)
+    index = {}
+    for obj in obj_list:
+        index.setdefault(key(obj), obj)
+    return index
+
+
+def _get_list(obj, field):
+    if obj.obj_attr_is_set(field):
+        return getattr(obj, field) or []
+    return []
+
+
+class Change(object):
+    """The same object in the old and new list, with its updated fields."""
+
+    # The fields compared between the old and new object.
+    fields = ()
+
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+        self.updates = {}
+        for field in self.fields:
+            if getattr(new, field) != getattr(old, field):
+                self.updates[field] = getattr(new, field)
+
+    @property
+    def changed(self):
+        return bool(self.updates)
+
+
+class Plan(object):
+    """The changes between an old and a new list of driver-side objects.
+
+    :ivar added: new objects which are not in the old list.
+    :ivar deleted: old objects which are not in the new list.
+    :ivar same: a Change for each object in both lists.
+    """
+
+    # The field which identifies an object in the list.
+    key = None
+    change_cls = Change
+
+    def __init__(self, old_list, new_list):
+        old_index = index_by(old_list, self._key)
+        new_index = index_by(new_list, self._key)
+        self.added = [obj for key, obj in new_index.items()
+                      if key not in old_index]
+        self.deleted = [obj for key, obj in old_index.items()
+                        if key not in new_index]
+        self.same = [self.change_cls(old_index[key], obj)
+                     for key, obj in new_index.items() if key in old_index]
+
+    def _key(self, obj):
+        return getattr(obj, self.key)
+
+    @property
+    def updated(self):
+        """The changes of the objects in both lists which differ."""
+        return [change for change in self.same if change.changed]
+
+    @property
+    def changed(self):
+        return bool(self.added or self.deleted or self.updated)
+
+
+class AttributeChange(Change):
+    fields = ('value',)
+
+
+class AttributePlan(Plan):
+    key = 'key'
+    change_cls = AttributeChange
+
+
+class AttachHandleChange(Change):
+    fields = ('attach_type',)
+
+
+class AttachHandlePlan(Plan):
+    key = 'attach_info'
+    change_cls = AttachHandleChange
+
+
+class DeployableChange(Change):
+    fields = ('num_accelerators',)
+
+    def __init__(self, old, new):
+        super(DeployableChange, self).__init__(old, new)
+        self.attributes = AttributePlan(
+            _get_list(old, 'attribute_list'),
+            _get_list(new, 'attribute_list'))
+        self.attach_handles = AttachHandlePlan(
+            _get_list(old, 'attach_handle_list'),
+            _get_list(new, 'attach_handle_list'))
+
+    @property
+    def changed(self):
+        return (bool(self.updates) or self.attributes.changed or
+                self.attach_handles.changed)
+
+
+class DeployablePlan(Plan):
+    key = 'name'
+    change_cls = DeployableChange
+
+
+class DeviceChange(Change):
+    fields = ('std_board_info', 'vendor', 'vendor_board_info', 'model',
+              'type')
+
+    def __init__(self, old, new):
+        super(DeviceChange, self).__init__(old, new)
+        self.deployables = DeployablePlan(old.deployable_list,
+                                          new.deployable_list)
+
+    @property
+    def changed(self):
+        return bool(self.updates) or self.deployables.changed
+
+
+class DevicePlan(Plan):
+    """The changes between the old and new device list of a host.
+
+    Devices are identified by their controlpath_id.cpid_info. Stub devices
+    in the new list are neither added, deleted nor compared.
+    """
+
+    change_cls = DeviceChange
+
+    def __init__(self, old_list, new_list):
+        stub_keys = set(self._key(obj) for obj in new_list if obj.stub)
+        super(DevicePlan, self).__init__(
+            [obj for obj in old_list if self._key(obj) not in stub_keys],
+            [obj for obj in new_list if self._key(obj) not in stub_keys])
+
+    def _key(self, obj):
+        return obj.controlpath_id.cpid_info
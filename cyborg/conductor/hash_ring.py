@@ -0,0 +1,56 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Consistent hash ring used to split the hosts between the conductors."""
+
+import bisect
+import hashlib
+
+from oslo_utils import encodeutils
+
+
+def _hash(value):
+    return int(hashlib.sha256(encodeutils.safe_encode(value)).hexdigest(), 16)
+
+
+class HashRing(object):
+    """A consistent hash ring of conductor hostnames.
+
+    Each conductor is placed on the ring at several points, and a key
+    belongs to the conductor of the first point after the key's hash. When
+    a conductor joins or leaves, only the keys of the points it takes or
+    frees move to another conductor.
+    """
+
+    # The number of points of each conductor on the ring, the more points
+    # the more even the split.
+    replicas = 64
+
+    def __init__(self, nodes):
+        """:param nodes: an iterable of conductor hostnames."""
+        self.nodes = frozenset(nodes)
+        ring = sorted((_hash('%s-%d' % (node, replica)), node)
+                      for node in self.nodes
+                      for replica in range(self.replicas))
+        self._hashes = [point for point, _node in ring]
+        self._owners = [node for _point, node in ring]
+
+    def get_node(self, key):
+        """Get the conductor of a key.
+
+        :param key: a string, usually a compute hostname.
+        :returns: the conductor hostname, or None if the ring is empty.
+        """
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key))
+        return self._owners[index % len(self._owners)]
@@ -17,17 +17,23 @@ import six
 
 from oslo_log import log as logging
 import oslo_messaging as messaging
-import uuid
 
+from cyborg.agent.rpcapi import AgentAPI
 from cyborg.common import exception
 from cyborg.common import placement_client
+from cyborg.common import utils
+from cyborg.conductor import cache
+from cyborg.conductor import diff
+from cyborg.conductor import hash_ring
+from cyborg.conductor import reconciler
+from cyborg.conductor.rpcapi import ConductorAPI
 from cyborg.conf import CONF
+from cyborg.db import api as dbapi
 from cyborg.objects.attach_handle import AttachHandle
 from cyborg.objects.attribute import Attribute
 from cyborg.objects.control_path import ControlpathID
 from cyborg.objects.deployable import Deployable
 from cyborg.objects.device import Device
-from cyborg.objects.driver_objects.driver_device import DriverDeployable
 from cyborg.objects.driver_objects.driver_device import DriverDevice
 
 LOG = logging.getLogger(__name__)
@@ -36,7 +42,7 @@ LOG = logging.getLogger(__name__)
 class ConductorManager(object):
     """Cyborg Conductor manager main class."""
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.3'
     target = messaging.Target(version=RPC_API_VERSION)
 
     def __init__(self, topic, host=None):
@@ -44,9 +50,147 @@ class ConductorManager(object):
         self.topic = topic
         self.host = host or CONF.host
         self.placement_client = placement_client.PlacementClient()
+        self.dbapi = dbapi.get_instance()
+        self._reconciler = reconciler.PlacementReconciler(
+            self.placement_client)
+        # The fingerprint of the last report accepted for each host.
+        self._report_fingerprints = {}
+        self._inventory_cache = cache.InventoryCache(
+            CONF.conductor.inventory_cache_size)
+        self._provider_cache = cache.ProviderCache(
+            CONF.conductor.provider_cache_ttl)
+        # The newest queued async report and the last sequence number of
+        # each host, and the hosts whose reports are being processed.
+        self._pending_reports = {}
+        self._report_seqs = {}
+        self._reporting_hosts = set()
+        self._agent_api = None
+        self._conductor_api = None
+        # The live conductors the reports are split between, when
+        # [conductor]shard_reports is enabled.
+        self._hash_ring = None
+
+    @property
+    def agent_api(self):
+        if self._agent_api is None:
+            self._agent_api = AgentAPI()
+        return self._agent_api
+
+    @property
+    def conductor_api(self):
+        if self._conductor_api is None:
+            self._conductor_api = ConductorAPI()
+        return self._conductor_api
 
     def periodic_tasks(self, context, raise_on_error=False):
-        pass
+        LOG.debug("Root provider cache: %(hits)d hits, %(misses)d misses.",
+                  {'hits': self._provider_cache.hits,
+                   'misses': self._provider_cache.misses})
+        if CONF.conductor.shard_reports:
+            self._refresh_hash_ring(context)
+
+    def get_timers(self):
+        """Get the tasks which run on their own timer, apart from
+        periodic_tasks.
+
+        The Placement audit of all the hosts can take longer than
+        [conductor]heartbeat_timeout, it must not delay the heartbeat.
+
+        :returns: a list of (interval in seconds, task) tuples.
+        """
+        interval = CONF.conductor.placement_audit_interval
+        if not interval:
+            return []
+        return [(interval, self._audit_placement_task)]
+
+    def _audit_placement_task(self, context):
+        # An exception would stop the timer.
+        try:
+            self.audit_placement(context)
+        except Exception:
+            LOG.exception("Failed to audit the Placement resource "
+                          "providers.")
+
+    def audit_placement(self, context):
+        """Reconcile the Placement resource providers of the hosts handled
+        by this conductor with the Cyborg DB.
+
+        The owner of each host is checked just before its audit, with the
+        hash ring kept up to date by periodic_tasks meanwhile. If the
+        reports are not sharded, all the hosts are audited.
+        """
+        # A host not yet in the replica DB is audited the next time. The
+        # devices of each host are read from the primary DB, not to undo a
+        # report with stale data.
+        with dbapi.replica_reads(context):
+            hostnames = Device.get_hostnames(context)
+        for hostname in hostnames:
+            if self._get_report_owner(context, hostname) != self.host:
+                continue
+            try:
+                host_rp = self._get_root_provider(context, hostname)
+                written = self._reconciler.reconcile_host(
+                    context, host_rp, DriverDevice.list(context, hostname))
+            except Exception as e:
+                LOG.error("Failed to audit the resource providers of host "
+                          "%(host)s. Reason: %(reason)s",
+                          {'host': hostname, 'reason': e})
+                self._provider_cache.invalidate(hostname)
+                continue
+            if written:
+                LOG.info("Fixed the resource providers %(rps)s of host "
+                         "%(host)s.", {'rps': written, 'host': hostname})
+
+    def del_host(self, context):
+        """Leave the hash ring when the service stops, so the other
+        conductors take over the hosts without waiting for the heartbeat
+        timeout.
+        """
+        if CONF.conductor.shard_reports:
+            self.dbapi.conductor_unregister(context, self.host)
+
+    def _refresh_hash_ring(self, context):
+        """Heartbeat, and rebuild the hash ring if the live conductors
+        changed.
+        """
+        try:
+            self.dbapi.conductor_heartbeat(context, self.host)
+            hostnames = self.dbapi.conductor_get_alive_hostnames(
+                context, CONF.conductor.heartbeat_timeout)
+        except Exception as e:
+            LOG.error("Failed to refresh the live conductors. Reason: %s", e)
+            return
+        if self._hash_ring is None or self._hash_ring.nodes != set(hostnames):
+            LOG.info("Live conductors changed, reports are now split "
+                     "between %s.", hostnames)
+            self._hash_ring = hash_ring.HashRing(hostnames)
+            # The hosts may have been written by another conductor.
+            self._inventory_cache.clear()
+
+    def _is_only_writer(self, context, hostname):
+        """Whether this conductor is the only one writing the device tree
+        of a host, so that the snapshot of its last write can be trusted.
+
+        This is only known when the reports are sharded, the snapshots are
+        dropped when the live conductors change.
+        """
+        return (CONF.conductor.shard_reports and
+                self._get_report_owner(context, hostname) == self.host)
+
+    def _get_report_owner(self, context, hostname):
+        """Get the conductor handling the reports of a host.
+
+        :returns: the conductor hostname, this conductor if the reports are
+        not sharded or no conductor is known alive yet.
+        """
+        if not CONF.conductor.shard_reports:
+            return self.host
+        if self._hash_ring is None:
+            self._refresh_hash_ring(context)
+        owner = None
+        if self._hash_ring is not None:
+            owner = self._hash_ring.get_node(hostname)
+        return owner or self.host
 
     def device_profile_create(self, context, obj_devprof):
         """Signal to conductor service to create a device_profile.
@@ -65,138 +209,267 @@ class ConductorManager(object):
         """
         obj_devprof.destroy(context)
 
-    def report_data(self, context, hostname, driver_device_list):
+    @messaging.expected_exceptions(exception.ConductorNotOwner)
+    def report_data(self, context, hostname, driver_device_list,
+                    fingerprint=None):
         """Update the Cyborg DB in one hostname according to the
         discovered device list.
         :param context: request context.
         :param hostname: agent's hostname.
         :param driver_device_list: a list of driver_device object
-        discovered by agent in the host.
+        discovered by agent in the host. None means the agent found
+        nothing changed since its last accepted report.
+        :param fingerprint: content fingerprint of the discovered device
+        list computed by the agent.
+        :returns: True if the Cyborg DB matches the reported device list,
+        False if the agent should report the full device list again.
+        :raises: ConductorNotOwner if the reports are sharded and another
+        conductor handles the host.
         """
-        # TODO(): Everytime get from the DB?
-        # First retrieve the old_device_list from the DB.
-        old_driver_device_list = DriverDevice.list(context, hostname)
+        owner = self._get_report_owner(context, hostname)
+        if owner != self.host:
+            raise exception.ConductorNotOwner(conductor=self.host,
+                                              host=hostname, owner=owner)
+        return self._process_report(context, hostname, driver_device_list,
+                                    fingerprint=fingerprint)
+
+    def _process_report(self, context, hostname, driver_device_list,
+                        fingerprint=None):
+        if driver_device_list is None:
+            # Fingerprint-only report, nothing changed on the agent side.
+            # Skip the DB reload and diff if it is the report we accepted
+            # last time, otherwise ask the agent for the full list.
+            if (fingerprint is not None and
+                    self._report_fingerprints.get(hostname) == fingerprint):
+                LOG.debug("Devices on host %s are unchanged.", hostname)
+                return True
+            return False
+        self._report_fingerprints.pop(hostname, None)
+        # First retrieve the old_device_list, from the snapshot of the last
+        # report if this conductor is the only one writing the host.
+        old_driver_device_list = None
+        only_writer = self._is_only_writer(context, hostname)
+        if only_writer:
+            old_driver_device_list = self._inventory_cache.get(hostname)
+        write_seq = self._inventory_cache.begin_write(hostname)
+        if old_driver_device_list is None:
+            old_driver_device_list = DriverDevice.list(context, hostname)
         # TODO(wangzhh): Remove invalid driver_devices without controlpath_id.
         # Then diff two driver device list.
-        self.drv_device_make_diff(context, hostname,
-                                  old_driver_device_list, driver_device_list)
+        plan = diff.DevicePlan(old_driver_device_list, driver_device_list)
+        try:
+            applied = self.drv_device_make_diff(context, hostname,
+                                                old_driver_device_list,
+                                                driver_device_list, plan=plan)
+        except Exception:
+            self._inventory_cache.end_write(hostname, write_seq)
+            self._provider_cache.invalidate(hostname)
+            raise
+        # Once applied, the DB has the reported device list.
+        self._inventory_cache.end_write(
+            hostname, write_seq,
+            driver_device_list if applied and only_writer else None)
+        if not applied:
+            # The root provider may be gone, look it up again next time.
+            self._provider_cache.invalidate(hostname)
+        if applied and fingerprint is not None:
+            self._report_fingerprints[hostname] = fingerprint
+        return applied
+
+    def report_data_async(self, context, hostname, driver_device_list, seq,
+                          fingerprint=None, forwarded=False):
+        """Handle a report_data cast by the agent and acknowledge it.
+
+        Reports older than the last one received for the host are dropped.
+        While a report of the host is processed, the new ones are queued
+        and only the newest of them is processed next, the others are
+        superseded. If the reports are sharded and another conductor
+        handles the host, the report is forwarded to it.
+
+        :param seq: the sequence number of the report.
+        :param forwarded: True if the report was forwarded by another
+        conductor, it is then processed here even if the hash rings of the
+        two conductors disagree, so it is not forwarded back and forth.
+        See report_data for the other parameters.
+        """
+        owner = self._get_report_owner(context, hostname)
+        if owner != self.host and not forwarded:
+            LOG.debug("Forward report %(seq)s of host %(host)s to conductor "
+                      "%(owner)s.",
+                      {'seq': seq, 'host': hostname, 'owner': owner})
+            self.conductor_api.report_data_async(
+                context, hostname, driver_device_list, seq,
+                fingerprint=fingerprint, server=owner, forwarded=True)
+            return
+        last_seq = self._report_seqs.get(hostname)
+        if last_seq is not None and seq <= last_seq:
+            LOG.debug("Drop outdated report %(seq)s of host %(host)s.",
+                      {'seq': seq, 'host': hostname})
+            return
+        self._report_seqs[hostname] = seq
+        self._pending_reports[hostname] = (context, driver_device_list, seq,
+                                           fingerprint)
+        if hostname in self._reporting_hosts:
+            # The report being processed picks this one up when done.
+            return
+        self._reporting_hosts.add(hostname)
+        try:
+            while hostname in self._pending_reports:
+                context, driver_device_list, seq, fingerprint = \
+                    self._pending_reports.pop(hostname)
+                try:
+                    applied = self._process_report(context, hostname,
+                                                   driver_device_list,
+                                                   fingerprint=fingerprint)
+                except Exception as exc:
+                    LOG.error("Failed to process report %(seq)s of host "
+                              "%(host)s. Reason: %(reason)s",
+                              {'seq': seq, 'host': hostname,
+                               'reason': exc})
+                    applied = False
+                conductor = None
+                if CONF.conductor.shard_reports:
+                    conductor = self.host
+                self.agent_api.report_ack(context, hostname, seq, applied,
+                                          conductor=conductor)
+        finally:
+            self._reporting_hosts.discard(hostname)
 
     def drv_device_make_diff(self, context, host, old_driver_device_list,
-                             new_driver_device_list):
+                             new_driver_device_list, plan=None):
         """Compare new driver-side device object list with the old one in
         one host.
+
+        :param plan: the diff.DevicePlan of the two lists, computed here
+        if not given.
+        :returns: False if some of the new devices or deployables failed to
+        be added and were cleaned up, True otherwise.
         """
         LOG.info("Start differing devices.")
-        # TODO(): The placement report will be implemented here.
         # Use cpid.cpid_info to identify whether the device is the same.
-        stub_cpid_list = [driver_dev_obj.controlpath_id.cpid_info for
-                          driver_dev_obj in new_driver_device_list
-                          if driver_dev_obj.stub]
-        new_cpid_list = [driver_dev_obj.controlpath_id.cpid_info for
-                         driver_dev_obj in new_driver_device_list]
-        old_cpid_list = [driver_dev_obj.controlpath_id.cpid_info for
-                         driver_dev_obj in old_driver_device_list]
-        same = set(new_cpid_list) & set(old_cpid_list) - set(stub_cpid_list)
-        added = set(new_cpid_list) - same - set(stub_cpid_list)
-        deleted = set(old_cpid_list) - same - set(stub_cpid_list)
+        if plan is None:
+            plan = diff.DevicePlan(old_driver_device_list,
+                                   new_driver_device_list)
+        if not plan.changed:
+            return True
         host_rp = self._get_root_provider(context, host)
+        applied = True
         # device is deleted.
-        for d in deleted:
-            old_driver_dev_obj = old_driver_device_list[old_cpid_list.index(d)]
-            for driver_dep_obj in old_driver_dev_obj.deployable_list:
-                rp_uuid = self.get_rp_uuid_from_obj(driver_dep_obj)
-                self._delete_provider_and_sub_providers(context, rp_uuid)
+        if plan.deleted and not new_driver_device_list:
+            # the host has no device left, also clean up the providers
+            # Cyborg left behind.
+            self._delete_sub_providers_of_root(context, host_rp)
+        elif plan.deleted:
+            self._delete_providers_and_sub_providers(context, [
+                self.get_rp_uuid_from_obj(driver_dep_obj)
+                for old_driver_dev_obj in plan.deleted
+                for driver_dep_obj in old_driver_dev_obj.deployable_list])
+        for old_driver_dev_obj in plan.deleted:
             old_driver_dev_obj.destroy(context, host)
         # device is added
-        for a in added:
-            new_driver_dev_obj = new_driver_device_list[new_cpid_list.index(a)]
+        for new_driver_dev_obj in plan.added:
             new_driver_dev_obj.create(context, host)
-            # TODO(All): If report data to Placement raise exception, we
-            # should revert driver device created in Cyborg and rp created
-            # in Placement to reduce the risk of data inconsistency here
-            # between Cyborg and Placement, we will consider to fix in V
-            # release.
-            cleanup_inconsistency_resources = False
+        # report the deployables of all the new devices to Placement at
+        # once, and collect the failures per device.
+        # TODO(All): If report data to Placement raise exception, we
+        # should revert driver device created in Cyborg and rp created
+        # in Placement to reduce the risk of data inconsistency here
+        # between Cyborg and Placement, we will consider to fix in V
+        # release.
+        new_dev_dep_list = [
+            (new_driver_dev_obj, driver_dep_obj)
+            for new_driver_dev_obj in plan.added
+            for driver_dep_obj in new_driver_dev_obj.deployable_list]
+        errors = self._report_placement_concurrently(
+            context, [dep for _, dep in new_dev_dep_list], host_rp)
+        failed_devs = {}
+        for (new_driver_dev_obj, _), exc in zip(new_dev_dep_list, errors):
+            if exc is not None:
+                cpid_info = new_driver_dev_obj.controlpath_id.cpid_info
+                failed_devs.setdefault(cpid_info, (new_driver_dev_obj, exc))
+        for new_driver_dev_obj, exc in failed_devs.values():
+            LOG.info("Failed to add device %(device)s. "
+                     "Reason: %(reason)s",
+                     {'device': new_driver_dev_obj,
+                      'reason': exc})
+            applied = False
+            new_driver_dev_obj.destroy(context, host)
             for driver_dep_obj in new_driver_dev_obj.deployable_list:
-                try:
-                    self.get_placement_needed_info_and_report(context,
-                                                              driver_dep_obj,
-                                                              host_rp)
-                except Exception as exc:
-                    LOG.info("Failed to add device %(device)s. "
-                             "Reason: %(reason)s",
-                             {'device': new_driver_dev_obj,
-                              'reason': exc})
-                    cleanup_inconsistency_resources = True
-                    break
-            if cleanup_inconsistency_resources:
-                new_driver_dev_obj.destroy(context, host)
-                for driver_dep_obj in new_driver_dev_obj.deployable_list:
-                    rp_uuid = self.get_rp_uuid_from_obj(driver_dep_obj)
-                    self._delete_provider_and_sub_providers(context, rp_uuid)
-        for s in same:
-            # get the driver_dev_obj, diff the driver_device layer
-            new_driver_dev_obj = new_driver_device_list[new_cpid_list.index(s)]
-            old_driver_dev_obj = old_driver_device_list[old_cpid_list.index(s)]
-            # First, get dev_obj_list from hostname
-            device_obj_list = Device.get_list_by_hostname(context, host)
-            # Then, use controlpath_id.cpid_info to identiy one Device.
-            cpid_info = new_driver_dev_obj.controlpath_id.cpid_info
-            for dev_obj in device_obj_list:
-                # get cpid_obj, could be empty or only one value.
-                cpid_obj = ControlpathID.get_by_device_id_cpidinfo(
-                    context, dev_obj.id, cpid_info)
-                # find the one cpid_obj with cpid_info
-                if cpid_obj is not None:
-                    break
-
-            changed_key = ['std_board_info', 'vendor', 'vendor_board_info',
-                           'model', 'type']
-            for c_k in changed_key:
-                if getattr(new_driver_dev_obj, c_k) != getattr(
-                        old_driver_dev_obj, c_k):
-                    setattr(dev_obj, c_k, getattr(new_driver_dev_obj, c_k))
-            dev_obj.save(context)
+                rp_uuid = self.get_rp_uuid_from_obj(driver_dep_obj)
+                self._delete_provider_and_sub_providers(context, rp_uuid)
+        updated = plan.updated
+        if not updated:
+            return applied
+        # Get the Device and ControlpathID objects of the host once, and use
+        # controlpath_id.cpid_info to identify one Device.
+        dev_cpid_dict = self._get_dev_cpid_dict(context, host)
+        for change in updated:
+            dev_obj, cpid_obj = dev_cpid_dict[
+                change.new.controlpath_id.cpid_info]
+            if change.updates:
+                for c_k, value in change.updates.items():
+                    setattr(dev_obj, c_k, value)
+                dev_obj.save(context)
             # diff the internal layer: driver_deployable
-            self.drv_deployable_make_diff(context, dev_obj.id, cpid_obj.id,
-                                          old_driver_dev_obj.deployable_list,
-                                          new_driver_dev_obj.deployable_list,
-                                          host_rp)
+            if not self.drv_deployable_make_diff(
+                    context, dev_obj.id, cpid_obj.id,
+                    change.old.deployable_list,
+                    change.new.deployable_list, host_rp,
+                    plan=change.deployables):
+                applied = False
+        return applied
+
+    def _get_dev_cpid_dict(self, context, host):
+        """Map each cpid_info of one host to its Device and ControlpathID
+        objects, loaded with one query per table.
+        """
+        dev_obj_dict = {dev_obj.id: dev_obj for dev_obj in
+                        Device.get_list_by_hostname(context, host)}
+        cpid_obj_list = ControlpathID.list(
+            context, {'device_id': list(dev_obj_dict)})
+        dev_cpid_dict = {}
+        for cpid_obj in cpid_obj_list:
+            dev_cpid_dict.setdefault(
+                cpid_obj.cpid_info,
+                (dev_obj_dict[cpid_obj.device_id], cpid_obj))
+        return dev_cpid_dict
 
     def drv_deployable_make_diff(self, context, device_id, cpid_id,
                                  old_driver_dep_list, new_driver_dep_list,
-                                 host_rp):
+                                 host_rp, plan=None):
         """Compare new driver-side deployable object list with the old one in
         one host.
+
+        :param plan: the diff.DeployablePlan of the two lists, computed
+        here if not given.
+        :returns: False if some of the new deployables failed to be added
+        and were cleaned up, True otherwise.
         """
         # use name to identify whether the deployable is the same.
         LOG.info("Start differing deploybles.")
-        new_name_list = [driver_dep_obj.name for driver_dep_obj in
-                         new_driver_dep_list]
-        old_name_list = [driver_dep_obj.name for driver_dep_obj in
-                         old_driver_dep_list]
-        same = set(new_name_list) & set(old_name_list)
-        added = set(new_name_list) - same
-        deleted = set(old_name_list) - same
+        if plan is None:
+            plan = diff.DeployablePlan(old_driver_dep_list,
+                                       new_driver_dep_list)
+        applied = True
         # name is deleted.
-        for d in deleted:
-            old_driver_dep_obj = old_driver_dep_list[old_name_list.index(d)]
-            rp_uuid = self.get_rp_uuid_from_obj(old_driver_dep_obj)
+        for old_driver_dep_obj in plan.deleted:
             old_driver_dep_obj.destroy(context, device_id)
-            self._delete_provider_and_sub_providers(context, rp_uuid)
+        if plan.deleted:
+            self._delete_providers_and_sub_providers(context, [
+                self.get_rp_uuid_from_obj(old_driver_dep_obj)
+                for old_driver_dep_obj in plan.deleted])
         # name is added.
-        for a in added:
-            new_driver_dep_obj = new_driver_dep_list[new_name_list.index(a)]
+        for new_driver_dep_obj in plan.added:
             new_driver_dep_obj.create(context, device_id, cpid_id)
-            try:
-                self.get_placement_needed_info_and_report(context,
-                                                          new_driver_dep_obj,
-                                                          host_rp)
-            except Exception as exc:
+        errors = self._report_placement_concurrently(context, plan.added,
+                                                     host_rp)
+        for new_driver_dep_obj, exc in zip(plan.added, errors):
+            if exc is not None:
                 LOG.info("Failed to add deployable %(deployable)s. "
                          "Reason: %(reason)s",
                          {'deployable': new_driver_dep_obj,
                           'reason': exc})
+                applied = False
                 new_driver_dep_obj.destroy(context, device_id)
                 rp_uuid = self.get_rp_uuid_from_obj(new_driver_dep_obj)
                 # TODO(All): If report data to Placement raise exception, we
@@ -205,126 +478,107 @@ class ConductorManager(object):
                 # inconsistency here between Cyborg and Placement,
                 # we will consider to fix in V release.
                 self._delete_provider_and_sub_providers(context, rp_uuid)
-        for s in same:
-            # get the driver_dep_obj, diff the driver_dep layer
-            new_driver_dep_obj = new_driver_dep_list[new_name_list.index(s)]
-            old_driver_dep_obj = old_driver_dep_list[old_name_list.index(s)]
-            # get dep_obj, it won't be None because it stored before.
-            dep_obj = Deployable.get_by_name_deviceid(context, s, device_id)
+        updated = plan.updated
+        if not updated:
+            return applied
+        # get dep_obj, it won't be None because it stored before.
+        dep_obj_dict = diff.index_by(
+            Deployable.get_list_by_device_id(context, device_id), 'name')
+        # the deployables whose inventory or traits changed.
+        placement_changed = []
+        for change in updated:
+            new_driver_dep_obj = change.new
+            dep_obj = dep_obj_dict[new_driver_dep_obj.name]
             # update the driver_dep num_accelerators field
-            if dep_obj.num_accelerators != new_driver_dep_obj.num_accelerators:
+            if 'num_accelerators' in change.updates:
                 dep_obj.num_accelerators = new_driver_dep_obj.num_accelerators
                 dep_obj.save(context)
-                rp_uuid = self.get_rp_uuid_from_obj(new_driver_dep_obj)
-                attrs = new_driver_dep_obj.attribute_list
-                resource_class = [i.value for i in attrs if i.key == 'rc'][0]
-                inv_data = _gen_resource_inventory(
-                    resource_class, dep_obj.num_accelerators)
-                self.placement_client.update_inventory(rp_uuid, inv_data)
             # diff the internal layer: driver_attribute_list
             new_attribute_list = []
             if hasattr(new_driver_dep_obj, 'attribute_list'):
                 new_attribute_list = new_driver_dep_obj.attribute_list
             self.drv_attr_make_diff(context, dep_obj.id,
-                                    old_driver_dep_obj.attribute_list,
-                                    new_attribute_list)
+                                    change.old.attribute_list,
+                                    new_attribute_list,
+                                    plan=change.attributes)
             # diff the internal layer: driver_attach_hanle_list
             self.drv_ah_make_diff(context, dep_obj.id, cpid_id,
-                                  old_driver_dep_obj.attach_handle_list,
-                                  new_driver_dep_obj.attach_handle_list)
+                                  change.old.attach_handle_list,
+                                  new_driver_dep_obj.attach_handle_list,
+                                  plan=change.attach_handles)
+            if change.updates or change.attributes.changed:
+                placement_changed.append(new_driver_dep_obj)
+        # write the inventory and traits of each changed provider at once.
+        self._reconciler.reconcile(context, host_rp, placement_changed)
+        return applied
 
     def drv_attr_make_diff(self, context, dep_id, old_driver_attr_list,
-                           new_driver_attr_list):
-        """Diff new dirver-side Attribute Object lists with the old one."""
+                           new_driver_attr_list, plan=None):
+        """Diff new dirver-side Attribute Object lists with the old one.
+
+        Only the DB is written, the traits of the resource provider are
+        reconciled with the new attributes by the caller.
+
+        :param plan: the diff.AttributePlan of the two lists, computed here
+        if not given.
+        """
         LOG.info("Start differing attributes.")
-        dep_obj = Deployable.get_by_id(context, dep_id)
-        driver_dep = DriverDeployable.get_by_name(context, dep_obj.name)
-        rp_uuid = self.get_rp_uuid_from_obj(driver_dep)
-        new_key_list = [driver_attr_obj.key for driver_attr_obj in
-                        new_driver_attr_list]
-        old_key_list = [driver_attr_obj.key for driver_attr_obj in
-                        old_driver_attr_list]
-        same = set(new_key_list) & set(old_key_list)
-        # key is same, diff the value.
-        # key is deleted.
-        deleted = set(old_key_list) - same
-        for d in deleted:
-            old_driver_attr_obj = old_driver_attr_list[old_key_list.index(d)]
-            self.placement_client.delete_trait_by_name(
-                rp_uuid, old_driver_attr_obj.value)
-            old_driver_attr_obj.delete_by_key(context, dep_id, d)
-        # key is added.
-        added = set(new_key_list) - same
-        for a in added:
-            new_driver_attr_obj = new_driver_attr_list[new_key_list.index(a)]
-            new_driver_attr_obj.create(context, dep_id)
-            self.placement_client.add_traits_to_rp(
-                rp_uuid, [new_driver_attr_obj.value])
-        for s in same:
-            # value is not same, update
-            new_driver_attr_obj = new_driver_attr_list[new_key_list.index(s)]
-            old_driver_attr_obj = old_driver_attr_list[old_key_list.index(s)]
-            if new_driver_attr_obj.value != old_driver_attr_obj.value:
-                attr_obj = Attribute.get_by_dep_key(context, dep_id, s)
-                attr_obj.value = new_driver_attr_obj.value
-                attr_obj.save(context)
-                # Update traits here.
-                if new_driver_attr_obj.key.startswith("trait"):
-                    self.placement_client.delete_trait_by_name(
-                        rp_uuid, old_driver_attr_obj.value)
-                    self.placement_client.add_traits_to_rp(
-                        rp_uuid, [new_driver_attr_obj.value])
+        if plan is None:
+            plan = diff.AttributePlan(old_driver_attr_list,
+                                      new_driver_attr_list)
+        if not plan.changed:
+            return
+        # write all the attribute changes in one transaction.
+        Attribute.bulk_update(
+            context, dep_id,
+            create=[new_driver_attr_obj.get_db_values()
+                    for new_driver_attr_obj in plan.added],
+            update={change.new.key: change.new.value
+                    for change in plan.updated},
+            delete=[old_driver_attr_obj.key
+                    for old_driver_attr_obj in plan.deleted])
 
     @classmethod
     def drv_ah_make_diff(cls, context, dep_id, cpid_id, old_driver_ah_list,
-                         new_driver_ah_list):
-        """Diff new dirver-side AttachHandle Object lists with the old one."""
+                         new_driver_ah_list, plan=None):
+        """Diff new dirver-side AttachHandle Object lists with the old one.
+
+        :param plan: the diff.AttachHandlePlan of the two lists, computed
+        here if not given.
+        """
         LOG.info("Start differing attach_handles.")
-        new_info_list = [driver_ah_obj.attach_info for driver_ah_obj in
-                         new_driver_ah_list]
-        old_info_list = [driver_ah_obj.attach_info for driver_ah_obj in
-                         old_driver_ah_list]
-        same = set(new_info_list) & set(old_info_list)
-        LOG.info('new info list %s', new_info_list)
-        LOG.info('old info list %s', old_info_list)
-        # attach_info is deleted.
-        deleted = set(old_info_list) - same
-        for d in deleted:
-            old_driver_ah_obj = old_driver_ah_list[old_info_list.index(d)]
-            old_driver_ah_obj.destroy(context, dep_id)
-        # attach_info is added.
-        added = set(new_info_list) - same
-        for a in added:
-            new_driver_ah_obj = new_driver_ah_list[new_info_list.index(a)]
-            new_driver_ah_obj.create(context, dep_id, cpid_id)
-        # attach-info is same
-        for s in same:
-            # get attach_handle obj
-            new_driver_ah_obj = new_driver_ah_list[new_info_list.index(s)]
-            old_driver_ah_obj = old_driver_ah_list[old_info_list.index(s)]
-            changed_key = ['attach_type']
-            ah_obj = AttachHandle.get_ah_by_depid_attachinfo(context,
-                                                             dep_id, s)
-            for c_k in changed_key:
-                if getattr(new_driver_ah_obj, c_k) != getattr(
-                        old_driver_ah_obj, c_k):
-                    setattr(ah_obj, c_k, getattr(new_driver_ah_obj, c_k))
-            ah_obj.save(context)
+        if plan is None:
+            plan = diff.AttachHandlePlan(old_driver_ah_list,
+                                         new_driver_ah_list)
+        if not plan.changed:
+            return
+        # attach_info is deleted, added, or is same and other fields are
+        # not same: write all the changes in one transaction.
+        AttachHandle.bulk_update(
+            context, dep_id, cpid_id,
+            create=[new_driver_ah_obj.get_db_values()
+                    for new_driver_ah_obj in plan.added],
+            update={change.new.attach_info: change.updates
+                    for change in plan.updated},
+            delete=[old_driver_ah_obj.attach_info
+                    for old_driver_ah_obj in plan.deleted])
 
     def _get_root_provider(self, context, hostname):
+        pr_uuid = self._provider_cache.get(hostname)
+        if pr_uuid is not None:
+            return pr_uuid
         try:
             provider = self.placement_client.get(
                 "resource_providers?name=" + hostname).json()
             pr_uuid = provider["resource_providers"][0]["uuid"]
-            return pr_uuid
         except IndexError:
             raise exception.PlacementResourceProviderNotFound(
                 resource_provider=hostname)
-        return
+        self._provider_cache.put(hostname, pr_uuid)
+        return pr_uuid
 
     def _get_sub_provider(self, context, parent, name):
-        old_sub_pr_uuid = str(uuid.uuid3(uuid.NAMESPACE_DNS,
-                                         six.ensure_str(name)))
+        old_sub_pr_uuid = reconciler.get_rp_uuid(name)
         new_sub_pr_uuid = self.placement_client.ensure_resource_provider(
             context, old_sub_pr_uuid,
             name=name, parent_provider_uuid=parent)
@@ -363,19 +617,78 @@ class ConductorManager(object):
         dep_obj["rp_uuid"] = rp_uuid
         dep_obj.save(context)
 
+    def _report_placement_concurrently(self, context, driver_dep_list,
+                                       parent_uuid):
+        """Report many driver-side deployables to Placement, with at most
+        CONF.conductor.placement_report_workers reports in flight.
+
+        :returns: a list with, for each deployable, the exception raised by
+        its report or None if it succeeded.
+        """
+        def _report(driver_dep_obj):
+            try:
+                self.get_placement_needed_info_and_report(
+                    context, driver_dep_obj, parent_uuid)
+            except Exception as exc:
+                return exc
+
+        max_workers = min(CONF.conductor.placement_report_workers,
+                          len(driver_dep_list))
+        if max_workers <= 1:
+            return [_report(driver_dep_obj)
+                    for driver_dep_obj in driver_dep_list]
+        with utils.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_report, driver_dep_list))
+
     def get_rp_uuid_from_obj(self, obj):
-        return str(uuid.uuid3(uuid.NAMESPACE_DNS, six.ensure_str(obj.name)))
+        return reconciler.get_rp_uuid(obj.name)
 
     def _delete_provider_and_sub_providers(self, context, rp_uuid):
-        rp_in_tree = self.placement_client.get_providers_in_tree(context,
-                                                                 rp_uuid)
-        for rp in rp_in_tree[::-1]:
-            if rp["parent_provider_uuid"] == rp_uuid or rp["uuid"] == rp_uuid:
-                self.placement_client.delete_provider(rp["uuid"])
-                LOG.info("Sucessfully delete resource provider %(rp_uuid)s",
-                         {"rp_uuid": rp["uuid"]})
-                if rp["uuid"] == rp_uuid:
-                    break
+        self._delete_providers_and_sub_providers(context, [rp_uuid])
+
+    def _delete_providers_and_sub_providers(self, context, rp_uuids):
+        """Delete resource providers with their subtrees from Placement.
+
+        The tree of each provider is only looked up once, with the
+        subtrees of all the given providers in it. It is read from
+        Placement, the provider tree may miss the children created by
+        other services.
+        """
+        providers = []
+        missing = set(rp_uuids)
+        while missing:
+            rp_in_tree = self.placement_client.get_providers_in_tree(
+                context, missing.pop(), refresh=True)
+            in_tree = set(rp['uuid'] for rp in rp_in_tree)
+            providers.extend(placement_client.get_subtree(
+                rp_in_tree, set(rp_uuids) & in_tree))
+            missing -= in_tree
+        self._delete_providers(context, providers)
+
+    def _delete_sub_providers_of_root(self, context, root_uuid):
+        """Delete the providers of all the deployables under a root
+        provider from Placement, with their subtrees.
+
+        The providers are the children of the root whose uuid is derived
+        from their name by Cyborg, the ones of other services are kept.
+        """
+        rp_in_tree = self.placement_client.get_providers_in_tree(
+            context, root_uuid, refresh=True)
+        rp_uuids = [
+            rp['uuid'] for rp in rp_in_tree
+            if rp.get('parent_provider_uuid') == root_uuid and
+            rp['uuid'] == reconciler.get_rp_uuid(rp['name'])]
+        self._delete_providers(
+            context, placement_client.get_subtree(rp_in_tree, rp_uuids))
+
+    def _delete_providers(self, context, providers):
+        if not providers:
+            return
+        self.placement_client.delete_providers(
+            providers, max_workers=CONF.conductor.placement_delete_workers,
+            global_request_id=context.global_id)
+        LOG.info("Sucessfully delete resource providers %(rp_uuids)s",
+                 {"rp_uuids": [rp['uuid'] for rp in providers]})
 
 
 def _gen_resource_inventory(resource_class, total):
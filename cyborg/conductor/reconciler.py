@@ -0,0 +1,200 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Bring the Placement resource providers of a host in line with the
+Cyborg DB.
+
+The desired state of each deployable's resource provider (its inventory
+and traits) is computed from the driver-side objects, compared with the
+actual state known by the provider tree of the Placement client, and only
+the differences are written, with a single generation-checked PUT for the
+inventory and one for the traits of each provider. A full reconciliation
+of a host reads the actual state from Placement again, and so does any
+reconciliation which would skip the writes of a provider on its known
+state, which may miss the writes of other processes.
+"""
+
+import functools
+import uuid
+
+from oslo_log import log as logging
+import six
+
+from cyborg.common import constants
+from cyborg.common import exception
+
+LOG = logging.getLogger(__name__)
+
+# Traits set on the providers at runtime rather than from the deployable
+# attributes, kept as they are.
+RUNTIME_TRAIT_PREFIXES = (constants.FPGA_FUNCTION_ID,)
+
+
+@functools.lru_cache(maxsize=4096)
+def get_rp_uuid(name):
+    """The resource provider uuid of a deployable, derived from its name."""
+    return str(uuid.uuid3(uuid.NAMESPACE_DNS, six.ensure_str(name)))
+
+
+class ProviderState(object):
+    """The desired state of the resource provider of a deployable."""
+
+    def __init__(self, driver_dep_obj):
+        self.name = driver_dep_obj.name
+        self.uuid = get_rp_uuid(self.name)
+        attrs = []
+        if driver_dep_obj.obj_attr_is_set('attribute_list'):
+            attrs = driver_dep_obj.attribute_list or []
+        self.resource_class = None
+        self.traits = set()
+        for attr in attrs:
+            if attr.key == 'rc':
+                self.resource_class = attr.value
+            elif six.ensure_str(attr.key).startswith('trait'):
+                self.traits.add(attr.value)
+        total = driver_dep_obj.num_accelerators
+        self.inventories = {}
+        if self.resource_class is not None:
+            self.inventories[self.resource_class] = {
+                'total': total,
+                'max_unit': total,
+            }
+
+    def inventories_differ(self, actual):
+        """Whether the actual inventories of the provider differ.
+
+        Only the fields Cyborg sets are compared.
+        """
+        if set(actual) != set(self.inventories):
+            return True
+        for rc, inventory in self.inventories.items():
+            for field, value in inventory.items():
+                if actual[rc].get(field) != value:
+                    return True
+        return False
+
+    def get_traits(self, actual):
+        """The traits to set on the provider, given its actual traits."""
+        return self.traits | set(
+            trait for trait in actual
+            if trait.startswith(RUNTIME_TRAIT_PREFIXES))
+
+
+class PlacementReconciler(object):
+    """Apply the desired state of the deployables of a host to Placement.
+    """
+
+    def __init__(self, placement_client):
+        self.placement_client = placement_client
+
+    def reconcile_host(self, context, root_uuid, driver_device_list):
+        """Write the changes needed by the providers of all the deployables
+        of a host, creating the missing ones.
+
+        The actual state of the providers is read from Placement, not from
+        the provider tree, to correct any drift.
+
+        :param root_uuid: the root resource provider of the host.
+        :param driver_device_list: the driver-side devices of the host, as
+                                   in the Cyborg DB.
+        :returns: the uuids of the providers which were written.
+        """
+        existing = set(
+            rp['uuid'] for rp in
+            self.placement_client.get_providers_in_tree(context, root_uuid,
+                                                        refresh=True))
+        driver_dep_list = [
+            driver_dep_obj for driver_dev_obj in driver_device_list
+            for driver_dep_obj in driver_dev_obj.deployable_list]
+        return self.reconcile(context, root_uuid, driver_dep_list,
+                              existing=existing, refresh=True)
+
+    def reconcile(self, context, root_uuid, driver_dep_list, existing=None,
+                  refresh=False):
+        """Write the changes needed by the providers of some deployables.
+
+        :param root_uuid: the root resource provider of the host.
+        :param driver_dep_list: the driver-side deployables, as in the
+                                Cyborg DB.
+        :param existing: the uuids of the providers in the tree of the root
+                         provider, if known. The providers of the
+                         deployables which are missing in Placement are
+                         created.
+        :param refresh: read the actual state of the providers from
+                        Placement even if it is known.
+        :returns: the uuids of the providers which were written.
+        :raises: the first error of a provider, after trying the others.
+        """
+        states = [ProviderState(driver_dep_obj)
+                  for driver_dep_obj in driver_dep_list]
+        written = []
+        error = None
+        for state in states:
+            try:
+                if self._reconcile_provider(context, root_uuid, state,
+                                            existing, refresh):
+                    written.append(state.uuid)
+            except Exception as e:
+                LOG.error("Failed to reconcile resource provider %(rp)s "
+                          "of deployable %(name)s. Reason: %(reason)s",
+                          {'rp': state.uuid, 'name': state.name,
+                           'reason': e})
+                error = error or e
+        if error is not None:
+            raise error
+        return written
+
+    def _reconcile_provider(self, context, root_uuid, state, existing,
+                            refresh):
+        inventories = None
+        if existing is None or state.uuid in existing:
+            try:
+                inventories = self.placement_client.get_inventories(
+                    state.uuid, refresh=refresh)
+            except exception.PlacementResourceProviderNotFound:
+                pass
+        if inventories is None:
+            LOG.info("Create missing resource provider %(rp)s of deployable "
+                     "%(name)s.", {'rp': state.uuid, 'name': state.name})
+            self.placement_client.ensure_resource_provider(
+                context, state.uuid, name=state.name,
+                parent_provider_uuid=root_uuid)
+            inventories = self.placement_client.get_inventories(state.uuid)
+        actual_traits = set(self.placement_client.get_traits(
+            state.uuid, refresh=refresh)['traits'])
+        if not refresh and not (
+                state.inventories_differ(inventories['inventories']) or
+                state.get_traits(actual_traits) != actual_traits):
+            # The provider tree misses the writes of the other conductors
+            # and API workers, the writes are only skipped if the provider
+            # in Placement needs none.
+            inventories = self.placement_client.get_inventories(
+                state.uuid, refresh=True)
+            actual_traits = set(self.placement_client.get_traits(
+                state.uuid, refresh=True)['traits'])
+        generation = inventories['resource_provider_generation']
+        written = False
+        if state.inventories_differ(inventories['inventories']):
+            self.placement_client.ensure_resource_classes(
+                context, list(state.inventories))
+            result = self.placement_client.update_inventory(
+                state.uuid, state.inventories,
+                resource_provider_generation=generation)
+            generation = result['resource_provider_generation']
+            written = True
+        traits = state.get_traits(actual_traits)
+        if traits != actual_traits:
+            self.placement_client.ensure_traits(
+                sorted(traits - actual_traits))
+            self.placement_client.set_traits(state.uuid, traits, generation)
+            written = True
+        return written
@@ -32,10 +32,13 @@ class ConductorAPI(object):
     API version history:
 
     |    1.0 - Initial version.
+    |    1.1 - Add fingerprint to report_data.
+    |    1.2 - Add report_data_async.
+    |    1.3 - Add forwarded to report_data_async.
 
     """
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.3'
 
     def __init__(self, topic=None):
         super(ConductorAPI, self).__init__()
@@ -47,13 +50,50 @@ class ConductorAPI(object):
                                      version_cap=self.RPC_API_VERSION,
                                      serializer=serializer)
 
-    def report_data(self, context, hostname, driver_device_list):
+    def report_data(self, context, hostname, driver_device_list,
+                    fingerprint=None, server=None):
         """Signal to conductor service to update the cyborg DB
         :parma context: request context.
+        :param hostname: agent's hostname.
+        :param driver_device_list: a list of driver_device object
+        discovered by agent in the host, or None to only send the
+        fingerprint when nothing changed since the last accepted report.
+        :param fingerprint: content fingerprint of the device list.
+        :param server: the conductor handling the reports of the host, None
+        to send the report to any conductor.
+        :returns: True if the conductor accepted the report, False if the
+        agent should send the full device list again.
+        :raises: ConductorNotOwner if the conductors shard the reports and
+        the report reached a conductor which does not handle the host.
         """
-        cctxt = self.client.prepare(topic=self.topic)
-        cctxt.call(context, 'report_data', hostname=hostname,
-                   driver_device_list=driver_device_list)
+        cctxt = self.client.prepare(topic=self.topic, server=server,
+                                    version='1.1')
+        return cctxt.call(context, 'report_data', hostname=hostname,
+                          driver_device_list=driver_device_list,
+                          fingerprint=fingerprint)
+
+    def report_data_async(self, context, hostname, driver_device_list, seq,
+                          fingerprint=None, server=None, forwarded=False):
+        """Signal to conductor service to update the cyborg DB without
+        waiting for it. The conductor acknowledges the report back to the
+        agent of the host with AgentAPI.report_ack.
+
+        :param seq: the sequence number of the report, increasing for each
+        report of the host.
+        :param forwarded: True if a conductor which does not handle the
+        host forwards the report to the one which does.
+        See report_data for the other parameters.
+        """
+        version = '1.2'
+        msg_args = {'hostname': hostname,
+                    'driver_device_list': driver_device_list, 'seq': seq,
+                    'fingerprint': fingerprint}
+        if forwarded:
+            version = '1.3'
+            msg_args['forwarded'] = forwarded
+        cctxt = self.client.prepare(topic=self.topic, server=server,
+                                    version=version)
+        cctxt.cast(context, 'report_data_async', **msg_args)
 
     def device_profile_create(self, context, obj_devprof):
         """Signal to conductor service to create a device_profile.
@@ -17,6 +17,7 @@ from oslo_config import cfg
 
 from cyborg.conf import agent
 from cyborg.conf import api
+from cyborg.conf import conductor
 from cyborg.conf import database
 from cyborg.conf import default
 from cyborg.conf import glance
@@ -29,6 +30,7 @@ CONF = cfg.CONF
 
 api.register_opts(CONF)
 agent.register_opts(CONF)
+conductor.register_opts(CONF)
 database.register_opts(CONF)
 default.register_opts(CONF)
 service_token.register_opts(CONF)
@@ -22,6 +22,15 @@ opts = [
                 default=[],
                 help=_('The accelerator drivers enabled on this agent. Such '
                        'as intel_fpga_driver, nvidia_gpu_driver, etc.')),
+    cfg.BoolOpt('async_report',
+                default=False,
+                help=_('Report the discovered devices to the conductor with '
+                       'an RPC cast instead of a call, so the periodic task '
+                       'does not wait for the conductor. Each report carries '
+                       'a sequence number, the conductor only processes the '
+                       'newest queued report of a host and acknowledges it '
+                       'back to the agent. All the conductors must support '
+                       'RPC API version 1.2.')),
 ]
 
 opt_group = cfg.OptGroup(name='agent',
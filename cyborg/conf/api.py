@@ -48,6 +48,13 @@ opts = [
     cfg.StrOpt('api_paste_config',
                default="api-paste.ini",
                help="Configuration file for WSGI definition of API."),
+    cfg.IntOpt('max_limit',
+               default=1000,
+               min=1,
+               help=_('The maximum number of items returned in a single '
+                      'page of a paginated listing, like the accelerator '
+                      'requests or the device profiles. It is also the page '
+                      'size when the request gives no limit.')),
 ]
 
 opt_group = cfg.OptGroup(name='api',
@@ -0,0 +1,100 @@
+# Copyright 2017 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+
+from cyborg.common.i18n import _
+
+
+opts = [
+    cfg.IntOpt('placement_report_workers',
+               default=10,
+               min=1,
+               help=_('The maximum number of resource providers the '
+                      'conductor reports to Placement concurrently when '
+                      'it handles the device report of a host. Set it to 1 '
+                      'to report them one by one.')),
+    cfg.IntOpt('placement_delete_workers',
+               default=10,
+               min=1,
+               help=_('The maximum number of resource providers the '
+                      'conductor deletes from Placement concurrently. The '
+                      'providers of a tree are deleted one depth level at '
+                      'a time, deepest first. Set it to 1 to delete them '
+                      'one by one.')),
+    cfg.IntOpt('inventory_cache_size',
+               default=1000,
+               min=0,
+               help=_('The maximum number of hosts whose device list the '
+                      'conductor keeps in memory between two reports. The '
+                      'list is only kept when the reports are sharded, see '
+                      'shard_reports, as each host is then only written by '
+                      'one conductor. The least recently reported hosts '
+                      'are evicted first. Set it to 0 to load the device '
+                      'list from the database on every report.')),
+    cfg.IntOpt('provider_cache_ttl',
+               default=300,
+               min=0,
+               help=_('The number of seconds the conductor keeps the root '
+                      'resource provider uuid of a host, instead of '
+                      'looking it up in Placement on every report of the '
+                      'host. The uuid is looked up again after a failed '
+                      'report. Set it to 0 to look it up on every '
+                      'report.')),
+    cfg.IntOpt('placement_audit_interval',
+               default=3600,
+               min=0,
+               help=_('The number of seconds between two audits of the '
+                      'Placement resource providers of the hosts, which '
+                      'rewrites the inventories and traits which drifted '
+                      'from the Cyborg DB without waiting for a report of '
+                      'the host. Set it to 0 to disable the audit. Each '
+                      'conductor audits the hosts whose reports it handles, '
+                      'that is all the hosts if shard_reports is disabled. '
+                      'In that case, set it to 0 on all the conductors but '
+                      'one.')),
+    cfg.BoolOpt('shard_reports',
+                default=False,
+                help=_('Split the device reports of the hosts between the '
+                       'live conductors with a consistent hash ring, so '
+                       'each host is handled by a single conductor. The '
+                       'conductors register themselves in the database '
+                       'and the ring is rebuilt when one of them joins or '
+                       'leaves.')),
+    cfg.IntOpt('heartbeat_timeout',
+               default=180,
+               min=1,
+               help=_('The number of seconds after its last heartbeat a '
+                      'conductor is considered dead and its hosts are '
+                      'handed over to the other conductors. Only used when '
+                      'shard_reports is enabled.')),
+]
+
+opt_group = cfg.OptGroup(name='conductor',
+                         title='Options for the cyborg-conductor service')
+
+
+CONDUCTOR_OPTS = (opts)
+
+
+def register_opts(conf):
+    conf.register_group(opt_group)
+    conf.register_opts(opts, group=opt_group)
+
+
+def list_opts():
+    return {
+        opt_group: CONDUCTOR_OPTS
+    }
@@ -60,6 +60,24 @@ service_opts = [
             This option specifies the timeout of async job for ARQ bind.""")),
 ]
 
+metrics_opts = [
+    cfg.FloatOpt('slow_call_threshold',
+                 default=1.0,
+                 min=0,
+                 help=_('The number of seconds after which a call to another '
+                        'OpenStack service, like Placement or Nova, is '
+                        'logged as slow. Set it to 0 to disable the '
+                        'logging.')),
+    cfg.IntOpt('metrics_log_interval',
+               default=3600,
+               min=0,
+               help=_('The number of seconds between two logs of the calls '
+                      'the conductor and the agent made to the other '
+                      'OpenStack services, with their counts, status codes '
+                      'and latencies since the service started. Set it to '
+                      '0 to disable the logging.')),
+]
+
 path_opts = [
     cfg.StrOpt('pybasedir',
                default=os.path.abspath(
@@ -79,10 +97,11 @@ path_opts = [
 def register_opts(conf):
     conf.register_opts(exc_log_opts)
     conf.register_opts(service_opts)
+    conf.register_opts(metrics_opts)
     conf.register_opts(path_opts)
 
 
-DEFAULT_OPTS = (exc_log_opts + service_opts + path_opts)
+DEFAULT_OPTS = (exc_log_opts + service_opts + metrics_opts + path_opts)
 
 
 def list_opts():
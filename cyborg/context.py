@@ -100,6 +100,9 @@ class RequestContext(context.RequestContext):
             self.service_catalog = []
 
         self.user_auth_plugin = user_auth_plugin
+        # Whether the DB reads of this context go to the replica DB, see
+        # cyborg.db.api.replica_reads. Not sent over RPC.
+        self.read_replica = False
         # if self.is_admin is None:
         #    self.is_admin = policy.check_is_admin(self)
 
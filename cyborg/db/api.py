@@ -16,6 +16,7 @@
 """Base classes for storage engines."""
 
 import abc
+import contextlib
 
 from oslo_config import cfg
 from oslo_db import api as db_api
@@ -33,6 +34,32 @@ def get_instance():
     return IMPL
 
 
+@contextlib.contextmanager
+def replica_reads(context, replica=True):
+    """Send the DB reads of a context to the replica DB within the block.
+
+    The replica DB is [database]slave_connection, it may lag behind the
+    primary DB. When it is not set, the reads go to the primary DB. The
+    reads in a write transaction always go to the primary DB.
+
+    :param replica: False to read from the primary DB, for the reads
+                    which must see a write just made.
+    """
+    saved = getattr(context, 'read_replica', False)
+    context.read_replica = replica
+    try:
+        yield
+    finally:
+        context.read_replica = saved
+
+
+def primary_reads(context):
+    """Send the DB reads of a context to the primary DB within the block,
+    even in a replica_reads block.
+    """
+    return replica_reads(context, replica=False)
+
+
 @six.add_metaclass(abc.ABCMeta)
 class Connection(object):
     """Base class for storage system connections."""
@@ -62,6 +89,10 @@ class Connection(object):
                                marker=None, columns_to_join=None):
         """Get requested devices by filters."""
 
+    @abc.abstractmethod
+    def device_get_hostnames(self, context):
+        """Get the sorted distinct hostnames of the devices."""
+
     @abc.abstractmethod
     def device_update(self, context, uuid, values):
         """Update a device."""
@@ -70,6 +101,33 @@ class Connection(object):
     def device_delete(self, context, uuid):
         """Delete a device when device is removed from the host."""
 
+    @abc.abstractmethod
+    def device_tree_create(self, context, values):
+        """Create a device with its controlpath_id, deployables,
+        attributes and attach_handles in one transaction.
+        """
+
+    @abc.abstractmethod
+    def device_tree_delete(self, context, device_id):
+        """Delete a device with its controlpath_ids, deployables,
+        attributes and attach_handles in one transaction.
+        """
+
+    # conductor
+    @abc.abstractmethod
+    def conductor_heartbeat(self, context, hostname):
+        """Register a conductor, or refresh its heartbeat."""
+
+    @abc.abstractmethod
+    def conductor_unregister(self, context, hostname):
+        """Remove a conductor from the live conductors."""
+
+    @abc.abstractmethod
+    def conductor_get_alive_hostnames(self, context, timeout):
+        """Get the hostnames of the conductors whose last heartbeat is
+        within timeout seconds.
+        """
+
     # device_profile
     @abc.abstractmethod
     def device_profile_create(self, context, values):
@@ -127,6 +185,19 @@ class Connection(object):
     def deployable_delete(self, context, uuid):
         """Delete a deployable."""
 
+    @abc.abstractmethod
+    def deployable_tree_create(self, context, device_id, cpid_id,
+                               deployables):
+        """Create deployables with their attributes and attach_handles in
+        one transaction.
+        """
+
+    @abc.abstractmethod
+    def deployable_tree_delete(self, context, deployable_id):
+        """Delete a deployable with its attributes and attach_handles in
+        one transaction.
+        """
+
     @abc.abstractmethod
     def deployable_get_by_filters(self, context,
                                   filters, sort_key='created_at',
@@ -163,6 +234,13 @@ class Connection(object):
     def attribute_delete(self, context, uuid):
         """Delete an attribute."""
 
+    @abc.abstractmethod
+    def attribute_bulk_update(self, context, deployable_id, create=None,
+                              update=None, delete=None):
+        """Create, update and delete attributes of a deployable in one
+        transaction.
+        """
+
     # quota
     @abc.abstractmethod
     def quota_reserve(self, context, resources, deltas, expire,
@@ -179,10 +257,18 @@ class Connection(object):
     def extarq_create(self, context, values):
         """Create a new extarq."""
 
+    @abc.abstractmethod
+    def extarq_create_many(self, context, values_list):
+        """Create many extarqs in one transaction."""
+
     @abc.abstractmethod
     def extarq_delete(self, context, uuid):
         """Delete an extarq."""
 
+    @abc.abstractmethod
+    def extarq_delete_many(self, context, uuids=None, instance_uuid=None):
+        """Delete extarqs and free their attach handles."""
+
     @abc.abstractmethod
     def extarq_update(self, context, uuid, values, state_scope=None):
         """Update an extarq."""
@@ -191,6 +277,11 @@ class Connection(object):
     def extarq_list(self, context, uuid_range=None):
         """Get requested list of extarqs."""
 
+    @abc.abstractmethod
+    def extarq_list_by_filters(self, context, filters, sort_key='created_at',
+                               sort_dir='desc', limit=None, marker=None):
+        """Get requested list of extarqs by filters."""
+
     @abc.abstractmethod
     def extarq_get(self, context, uuid, lock=False):
         """Get requested extarq."""
@@ -227,6 +318,21 @@ class Connection(object):
     def attach_handle_update(self, context, uuid, values):
         """Update an attach_handle"""
 
+    @abc.abstractmethod
+    def attach_handle_allocate(self, context, deployable_id):
+        """Allocate an attach_handle of a deployable"""
+
+    @abc.abstractmethod
+    def attach_handle_allocate_many(self, context, deployable_id, count):
+        """Allocate some attach_handles of a deployable, all or none"""
+
+    @abc.abstractmethod
+    def attach_handle_bulk_update(self, context, deployable_id, cpid_id,
+                                  create=None, update=None, delete=None):
+        """Create, update and delete attach_handles of a deployable in one
+        transaction.
+        """
+
     # control_path_id
     @abc.abstractmethod
     def control_path_create(self, context, values):
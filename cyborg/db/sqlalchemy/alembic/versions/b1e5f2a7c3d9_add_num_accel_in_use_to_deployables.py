@@ -0,0 +1,44 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add_num_accel_in_use_to_deployables
+
+Revision ID: b1e5f2a7c3d9
+Revises: 4cc1d79978fc
+Create Date: 2026-10-18 14:02:17.318664
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'b1e5f2a7c3d9'
+down_revision = '4cc1d79978fc'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column('deployables', sa.Column('num_accel_in_use', sa.Integer(),
+                  nullable=False, server_default='0'))
+
+    # Count the attach handles already in use.
+    deployables = sa.table('deployables',
+                           sa.column('id', sa.Integer()),
+                           sa.column('num_accel_in_use', sa.Integer()))
+    attach_handles = sa.table('attach_handles',
+                              sa.column('id', sa.Integer()),
+                              sa.column('deployable_id', sa.Integer()),
+                              sa.column('in_use', sa.Boolean()))
+    in_use = sa.select([sa.func.count(attach_handles.c.id)]).where(
+        sa.and_(attach_handles.c.deployable_id == deployables.c.id,
+                attach_handles.c.in_use == sa.true())).as_scalar()
+    op.execute(deployables.update().values(num_accel_in_use=in_use))
@@ -0,0 +1,41 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add_indexes_for_hot_queries
+
+Revision ID: c4a8e6d2f1b7
+Revises: b1e5f2a7c3d9
+Create Date: 2026-10-18 16:41:52.907325
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'c4a8e6d2f1b7'
+down_revision = 'b1e5f2a7c3d9'
+
+from alembic import op
+
+
+def upgrade():
+    op.create_index('devices_hostname_idx', 'devices', ['hostname'])
+    op.create_index('controlpath_ids_device_id_cpid_info_idx',
+                    'controlpath_ids', ['device_id', 'cpid_info'])
+    op.create_index('deployables_name_device_id_idx', 'deployables',
+                    ['name', 'device_id'])
+    op.create_index('deployables_rp_uuid_idx', 'deployables', ['rp_uuid'])
+    # attributes.key is a TEXT column, MySQL only indexes a prefix of it.
+    op.create_index('attributes_deployable_id_key_idx', 'attributes',
+                    ['deployable_id', 'key'], mysql_length={'key': 255})
+    op.create_index('attach_handles_deployable_id_in_use_idx',
+                    'attach_handles', ['deployable_id', 'in_use'])
+    op.create_index('extArqs_state_idx', 'extended_accelerator_requests',
+                    ['state'])
@@ -16,6 +16,7 @@
 """SQLAlchemy storage backend."""
 
 import copy
+import datetime
 import threading
 import uuid
 
@@ -27,6 +28,8 @@ from oslo_log import log
 from oslo_utils import strutils
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
+from sqlalchemy import func
+from sqlalchemy import sql
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.orm import load_only
 
@@ -46,7 +49,11 @@ def get_backend():
     return Connection()
 
 
-def _session_for_read():
+def _session_for_read(context=None):
+    if getattr(context, 'read_replica', False):
+        # Reads from [database]slave_connection if set, or joins the
+        # current transaction.
+        return enginefacade.reader.async_.using(_CONTEXT)
     return enginefacade.reader.using(_CONTEXT)
 
 
@@ -73,12 +80,15 @@ def model_query(context, model, *args, **kwargs):
       if set to False or absent, then will not do query filter with context's
       project_id.
     :type project_only: bool
+
+    The query reads from the replica DB if the context has read_replica
+    set, see cyborg.db.api.replica_reads.
     """
 
     if kwargs.pop("project_only", False):
         kwargs["project_id"] = context.tenant
 
-    with _session_for_read() as session:
+    with _session_for_read(context) as session:
         query = sqlalchemyutils.model_query(
             model, session, args, **kwargs)
         return query
@@ -118,6 +128,48 @@ def _paginate_query(context, model, query, limit=None, marker=None,
     return query.all()
 
 
+def _supports_skip_locked(session):
+    """Whether the DB of a session supports SELECT ... SKIP LOCKED."""
+    dialect = session.get_bind().dialect
+    version = tuple(part for part in dialect.server_version_info or ()
+                    if isinstance(part, int))
+    if dialect.name == 'postgresql':
+        return version >= (9, 5)
+    if dialect.name == 'mysql':
+        if getattr(dialect, 'is_mariadb',
+                   getattr(dialect, '_is_mariadb', False)):
+            return version >= (10, 6)
+        return version >= (8, 0, 1)
+    return False
+
+
+def _bulk_insert(session, model, values_list):
+    """Insert many rows of a model with a single executemany statement."""
+    if not values_list:
+        return
+    for values in values_list:
+        if not values.get('uuid'):
+            values['uuid'] = uuidutils.generate_uuid()
+    session.bulk_insert_mappings(model, values_list)
+
+
+def _refresh_num_accel_in_use(context, deployable_ids):
+    """Count again the attach handles in use of some deployables.
+
+    Must be called in the write transaction which changed the attach
+    handles.
+    """
+    if not deployable_ids:
+        return
+    in_use = sql.select([func.count(models.AttachHandle.id)]).where(
+        sql.and_(models.AttachHandle.deployable_id == models.Deployable.id,
+                 models.AttachHandle.in_use == sql.true())). \
+        correlate(models.Deployable).as_scalar()
+    model_query(context, models.Deployable).filter(
+        models.Deployable.id.in_(set(deployable_ids))).update(
+        {'num_accel_in_use': in_use}, synchronize_session=False)
+
+
 class Connection(api.Connection):
     """SqlAlchemy connection."""
 
@@ -137,6 +189,9 @@ class Connection(api.Connection):
                 session.flush()
             except db_exc.DBDuplicateEntry:
                 raise exception.AttachHandleAlreadyExists(uuid=values['uuid'])
+            if attach_handle.in_use:
+                _refresh_num_accel_in_use(context,
+                                          [attach_handle.deployable_id])
             return attach_handle
 
     def attach_handle_get_by_uuid(self, context, uuid):
@@ -250,7 +305,7 @@ class Connection(api.Connection):
 
     @oslo_db_api.retry_on_deadlock
     def _do_update_attach_handle(self, context, uuid, values):
-        with _session_for_write():
+        with _session_for_write() as session:
             query = model_query(context, models.AttachHandle)
             query = add_identity_filter(query, uuid)
             try:
@@ -259,41 +314,63 @@ class Connection(api.Connection):
                 raise exception.ResourceNotFound(
                     resource='AttachHandle',
                     msg='with uuid=%s' % uuid)
+            deployable_ids = set([ref.deployable_id])
             ref.update(values)
+            if 'in_use' in values or 'deployable_id' in values:
+                deployable_ids.add(ref.deployable_id)
+                session.flush()
+                _refresh_num_accel_in_use(context, deployable_ids)
         return ref
 
     @oslo_db_api.retry_on_deadlock
-    def _do_allocate_attach_handle(self, context, deployable_id):
-        """Atomically get a set of attach handles that match the query
-           and mark one of those as in_use.
+    @oslo_db_api.retry_on_request
+    def attach_handle_allocate_many(self, context, deployable_id, count):
+        """Allocate some attach handles of a deployable, all or none.
+
+        The free handles are locked with FOR UPDATE SKIP LOCKED where the
+        backend supports it, so that concurrent allocations on the same
+        deployable take different handles instead of waiting for each
+        other, and are all marked as in_use with one UPDATE. The
+        num_accel_in_use of the deployable is increased in the same
+        transaction.
+
+        :param count: the number of attach handles to allocate.
+        :returns: the allocated attach handles.
+        :raises: ResourceNotFound if the deployable has fewer free handles.
         """
         with _session_for_write() as session:
-            query = model_query(context, models.AttachHandle). \
-                filter_by(deployable_id=deployable_id,
-                          in_use=False)
-            values = {"in_use": True}
-            ref = query.with_lockmode('update').first()
-            if not ref:
+            query = model_query(
+                context, models.AttachHandle, models.AttachHandle.id). \
+                filter_by(deployable_id=deployable_id, in_use=False). \
+                order_by(models.AttachHandle.id).limit(count). \
+                with_for_update(skip_locked=_supports_skip_locked(session))
+            ah_ids = [ref.id for ref in query]
+            if len(ah_ids) < count:
                 msg = 'Matching deployable_id {0}'.format(deployable_id)
                 raise exception.ResourceNotFound(
                     resource='AttachHandle', msg=msg)
-            ref.update(values)
-            session.flush()
-        return ref
+            query = model_query(context, models.AttachHandle).filter(
+                models.AttachHandle.id.in_(ah_ids))
+            allocated = query.filter_by(in_use=False).update(
+                {'in_use': True}, synchronize_session=False)
+            if allocated != count:
+                # Without row locks, a concurrent allocation took some of
+                # the handles first.
+                raise db_exc.RetryRequest(exception.ResourceNotFound(
+                    resource='AttachHandle',
+                    msg='Matching deployable_id {0}'.format(deployable_id)))
+            model_query(context, models.Deployable).filter_by(
+                id=deployable_id).update(
+                {'num_accel_in_use': models.Deployable.num_accel_in_use +
+                 count}, synchronize_session=False)
+            return query.order_by(models.AttachHandle.id).all()
 
     def attach_handle_allocate(self, context, deployable_id):
         """Allocate an attach handle with given deployable.
 
            To allocate is to get an unused resource and mark it as in_use.
         """
-        try:
-            ah = self._do_allocate_attach_handle(
-                context, deployable_id)
-        except NoResultFound:
-            msg = 'Matching deployable_id {0}'.format(deployable_id)
-            raise exception.ResourceNotFound(
-                resource='AttachHandle', msg=msg)
-        return ah
+        return self.attach_handle_allocate_many(context, deployable_id, 1)[0]
 
     # NOTE: For deallocate, we use attach_handle_update()
 
@@ -302,11 +379,14 @@ class Connection(api.Connection):
         with _session_for_write():
             query = model_query(context, models.AttachHandle)
             query = add_identity_filter(query, uuid)
+            deployable_ids = [row.deployable_id for row in query.with_entities(
+                models.AttachHandle.deployable_id)]
             count = query.delete()
             if count != 1:
                 raise exception.ResourceNotFound(
                     resource='AttachHandle',
                     msg='with uuid=%s' % uuid)
+            _refresh_num_accel_in_use(context, deployable_ids)
 
     def control_path_create(self, context, values):
         if not values.get('uuid'):
@@ -459,6 +539,12 @@ class Connection(api.Connection):
         return _paginate_query(context, models.Device, query,
                                limit, marker, sort_key, sort_dir)
 
+    def device_get_hostnames(self, context):
+        query = model_query(context, models.Device,
+                            models.Device.hostname).distinct()
+        return [hostname for hostname, in
+                query.order_by(models.Device.hostname).all()]
+
     def device_update(self, context, uuid, values):
         if 'uuid' in values:
             msg = _("Cannot overwrite UUID for an existing Device.")
@@ -769,10 +855,14 @@ class Connection(api.Connection):
         """Return attributes that matches the filters
         """
         query_prefix = model_query(context, models.Attribute)
+        filters = copy.deepcopy(filters)
+
+        exact_match_filter_names = ['uuid', 'id', 'deployable_id', 'key',
+                                    'value']
 
         # Filter the query
         query_prefix = self._exact_filter(models.Attribute, query_prefix,
-                                          filters)
+                                          filters, exact_match_filter_names)
         if query_prefix is None:
             return []
 
@@ -821,6 +911,233 @@ class Connection(api.Connection):
                     resource='Attribute',
                     msg='with uuid=%s' % uuid)
 
+    @oslo_db_api.retry_on_deadlock
+    def attribute_bulk_update(self, context, deployable_id, create=None,
+                              update=None, delete=None):
+        """Create, update and delete attributes of one deployable in one
+        transaction. Attributes are identified by their key.
+
+        :param create: a list of attribute values to insert.
+        :param update: a dict mapping attribute key to its new value.
+        :param delete: a list of attribute keys to delete.
+        """
+        with _session_for_write() as session:
+            if delete:
+                query = model_query(context, models.Attribute).filter_by(
+                    deployable_id=deployable_id).filter(
+                    models.Attribute.key.in_(delete))
+                query.delete(synchronize_session=False)
+            for key, value in (update or {}).items():
+                query = model_query(context, models.Attribute).filter_by(
+                    deployable_id=deployable_id, key=key)
+                query.update({'value': value}, synchronize_session=False)
+            if create:
+                _bulk_insert(session, models.Attribute,
+                             [dict(values, deployable_id=deployable_id)
+                              for values in create])
+
+    @oslo_db_api.retry_on_deadlock
+    def attach_handle_bulk_update(self, context, deployable_id, cpid_id,
+                                  create=None, update=None, delete=None):
+        """Create, update and delete attach_handles of one deployable in
+        one transaction. Attach handles are identified by their
+        attach_info.
+
+        :param create: a list of attach_handle values to insert.
+        :param update: a dict mapping attach_info to the values to update.
+        :param delete: a list of attach_info to delete.
+        """
+        with _session_for_write() as session:
+            if delete:
+                query = model_query(context, models.AttachHandle).filter_by(
+                    deployable_id=deployable_id).filter(
+                    models.AttachHandle.attach_info.in_(delete))
+                query.delete(synchronize_session=False)
+            for attach_info, values in (update or {}).items():
+                query = model_query(context, models.AttachHandle).filter_by(
+                    deployable_id=deployable_id, attach_info=attach_info)
+                query.update(values, synchronize_session=False)
+            if create:
+                _bulk_insert(session, models.AttachHandle,
+                             [dict(values, deployable_id=deployable_id,
+                                   cpid_id=cpid_id)
+                              for values in create])
+            _refresh_num_accel_in_use(context, [deployable_id])
+
+    def device_tree_create(self, context, values):
+        """Create a device with its controlpath_id, deployables, attributes
+        and attach_handles in one transaction.
+
+        The deployables, attributes and attach_handles are written with one
+        bulk insert per table, whatever the size of the tree.
+
+        :param values: the device values, with the controlpath_id values
+            in 'controlpath_id' and the list of deployable values in
+            'deployables'. Each deployable has the list of its attribute
+            values in 'attributes' and attach_handle values in
+            'attach_handles'.
+        :returns: the created device.
+        """
+        values = dict(values)
+        cpid_values = dict(values.pop('controlpath_id'))
+        deployables = values.pop('deployables', [])
+        if not values.get('uuid'):
+            values['uuid'] = uuidutils.generate_uuid()
+        if not cpid_values.get('uuid'):
+            cpid_values['uuid'] = uuidutils.generate_uuid()
+        device = models.Device()
+        device.update(values)
+
+        with _session_for_write() as session:
+            try:
+                session.add(device)
+                session.flush()
+            except db_exc.DBDuplicateEntry:
+                raise exception.DeviceAlreadyExists(uuid=values['uuid'])
+            cpid_values['device_id'] = device.id
+            control_path_id = models.ControlpathID()
+            control_path_id.update(cpid_values)
+            try:
+                session.add(control_path_id)
+                session.flush()
+            except db_exc.DBDuplicateEntry:
+                raise exception.ControlpathIDAlreadyExists(
+                    uuid=cpid_values['uuid'])
+            self._do_create_deployable_tree(session, device.id,
+                                            control_path_id.id, deployables)
+            return device
+
+    def deployable_tree_create(self, context, device_id, cpid_id,
+                               deployables):
+        """Create deployables of one device with their attributes and
+        attach_handles in one transaction.
+
+        :param deployables: a list of deployable values, in the format
+            described in device_tree_create.
+        :returns: the list of created deployables.
+        """
+        with _session_for_write() as session:
+            return self._do_create_deployable_tree(session, device_id,
+                                                   cpid_id, deployables)
+
+    def _do_create_deployable_tree(self, session, device_id, cpid_id,
+                                   deployables):
+        dep_values_list = []
+        children = []
+        for values in deployables:
+            values = dict(values)
+            values.pop('id', None)
+            if not values.get('uuid'):
+                values['uuid'] = uuidutils.generate_uuid()
+            values['device_id'] = device_id
+            values['num_accel_in_use'] = len(
+                [ah for ah in values.get('attach_handles', [])
+                 if ah.get('in_use')])
+            children.append((values['uuid'],
+                             values.pop('attributes', []),
+                             values.pop('attach_handles', [])))
+            dep_values_list.append(values)
+        if not dep_values_list:
+            return []
+        try:
+            _bulk_insert(session, models.Deployable, dep_values_list)
+        except db_exc.DBDuplicateEntry:
+            raise exception.DeployableAlreadyExists(
+                uuid=[values['uuid'] for values in dep_values_list])
+        # The ids are generated by the DB, read them back in one query to
+        # link the attributes and attach_handles.
+        dep_refs = {ref.uuid: ref for ref in session.query(
+            models.Deployable).filter(models.Deployable.uuid.in_(
+                [values['uuid'] for values in dep_values_list]))}
+        attr_values_list = []
+        ah_values_list = []
+        for dep_uuid, attributes, attach_handles in children:
+            dep_id = dep_refs[dep_uuid].id
+            attr_values_list.extend(dict(values, deployable_id=dep_id)
+                                    for values in attributes)
+            ah_values_list.extend(dict(values, deployable_id=dep_id,
+                                       cpid_id=cpid_id)
+                                  for values in attach_handles)
+        _bulk_insert(session, models.Attribute, attr_values_list)
+        _bulk_insert(session, models.AttachHandle, ah_values_list)
+        return [dep_refs[dep_uuid] for dep_uuid, _, _ in children]
+
+    @oslo_db_api.retry_on_deadlock
+    def device_tree_delete(self, context, device_id):
+        """Delete a device with its controlpath_ids, deployables,
+        attributes and attach_handles in one transaction.
+        """
+        with _session_for_write():
+            query = model_query(context, models.Deployable,
+                                models.Deployable.id).filter_by(
+                device_id=device_id)
+            self._do_delete_deployable_tree(
+                context, [dep_id for dep_id, in query])
+            query = model_query(context, models.ControlpathID).filter_by(
+                device_id=device_id)
+            query.delete(synchronize_session=False)
+            query = model_query(context, models.Device).filter_by(
+                id=device_id)
+            count = query.delete(synchronize_session=False)
+            if count != 1:
+                raise exception.ResourceNotFound(
+                    resource='Device',
+                    msg='with id=%s' % device_id)
+
+    @oslo_db_api.retry_on_deadlock
+    def deployable_tree_delete(self, context, deployable_id):
+        """Delete a deployable with its attributes and attach_handles in
+        one transaction.
+        """
+        with _session_for_write():
+            count = self._do_delete_deployable_tree(context, [deployable_id])
+            if count != 1:
+                raise exception.ResourceNotFound(
+                    resource='Deployable',
+                    msg='with id=%s' % deployable_id)
+
+    def _do_delete_deployable_tree(self, context, deployable_ids):
+        if not deployable_ids:
+            return 0
+        for model in (models.AttachHandle, models.Attribute):
+            query = model_query(context, model).filter(
+                model.deployable_id.in_(deployable_ids))
+            query.delete(synchronize_session=False)
+        query = model_query(context, models.Deployable).filter(
+            models.Deployable.id.in_(deployable_ids))
+        query.update({'root_id': None}, synchronize_session=False)
+        return query.delete(synchronize_session=False)
+
+    @oslo_db_api.retry_on_deadlock
+    def conductor_heartbeat(self, context, hostname):
+        now = timeutils.utcnow()
+        with _session_for_write() as session:
+            query = model_query(context, models.Conductor).filter_by(
+                hostname=hostname)
+            if query.update({'updated_at': now},
+                            synchronize_session=False):
+                return
+            conductor = models.Conductor()
+            conductor.update({'hostname': hostname, 'updated_at': now})
+            session.add(conductor)
+            try:
+                session.flush()
+            except db_exc.DBDuplicateEntry:
+                # Another process of the same conductor registered it.
+                pass
+
+    def conductor_unregister(self, context, hostname):
+        with _session_for_write():
+            query = model_query(context, models.Conductor).filter_by(
+                hostname=hostname)
+            query.delete(synchronize_session=False)
+
+    def conductor_get_alive_hostnames(self, context, timeout):
+        limit = timeutils.utcnow() - datetime.timedelta(seconds=timeout)
+        query = model_query(context, models.Conductor).filter(
+            models.Conductor.updated_at >= limit)
+        return sorted(ref.hostname for ref in query.all())
+
     def extarq_create(self, context, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -847,6 +1164,55 @@ class Connection(api.Connection):
                 raise exception.ExtArqAlreadyExists(uuid=values['uuid'])
             return extarq
 
+    def extarq_create_many(self, context, values_list):
+        """Create many extarqs in one transaction.
+
+        The extarqs are written with a single bulk insert. Their device
+        profiles are given by device_profile_id, or else looked up by
+        device_profile_name with one query for all the names.
+
+        :param values_list: a list of extarq values.
+        :returns: the created extarqs, in the order of values_list.
+        """
+        values_list = [dict(values) for values in values_list]
+        names = set()
+        for values in values_list:
+            values.pop('id', None)
+            if not values.get('uuid'):
+                values['uuid'] = uuidutils.generate_uuid()
+            if values.get('device_profile_id'):
+                continue
+            if not values.get('device_profile_name'):
+                raise exception.DeviceProfileNameNeeded()
+            names.add(values['device_profile_name'])
+        if names:
+            devprof_ids = dict(
+                (devprof['name'], devprof['id'])
+                for devprof in self.device_profile_list_by_filters(
+                    context, {'name': list(names)}))
+            for values in values_list:
+                if values.get('device_profile_id'):
+                    continue
+                name = values['device_profile_name']
+                if name not in devprof_ids:
+                    raise exception.ResourceNotFound(
+                        resource='Device Profile',
+                        msg='with name=%s' % name)
+                values['device_profile_id'] = devprof_ids[name]
+
+        uuids = [values['uuid'] for values in values_list]
+        with _session_for_write() as session:
+            try:
+                _bulk_insert(session, models.ExtArq, values_list)
+            except db_exc.DBDuplicateEntry:
+                raise exception.ExtArqAlreadyExists(uuid=uuids)
+            # Read the extarqs back in one query, for their ids and
+            # timestamps.
+            extarqs = dict(
+                (extarq.uuid, extarq) for extarq in session.query(
+                    models.ExtArq).filter(models.ExtArq.uuid.in_(uuids)))
+            return [extarqs[uuid] for uuid in uuids]
+
     @oslo_db_api.retry_on_deadlock
     def extarq_delete(self, context, uuid):
         with _session_for_write():
@@ -858,6 +1224,45 @@ class Connection(api.Connection):
                     resource='ExtArq',
                     msg='with uuid=%s' % uuid)
 
+    @oslo_db_api.retry_on_deadlock
+    def extarq_delete_many(self, context, uuids=None, instance_uuid=None):
+        """Delete extarqs and free their attach handles in one transaction.
+
+        :param uuids: the uuids of the extarqs to delete. If one of them
+                      does not exist, nothing is deleted.
+        :param instance_uuid: the instance whose extarqs are all deleted,
+                              if no uuids are given.
+        :returns: the number of deleted extarqs.
+        :raises: ResourceNotFound if an extarq of uuids does not exist.
+        """
+        with _session_for_write():
+            query = model_query(context, models.ExtArq)
+            if uuids is not None:
+                uuids = set(uuids)
+                query = query.filter(models.ExtArq.uuid.in_(uuids))
+            else:
+                query = query.filter_by(instance_uuid=instance_uuid)
+            rows = query.with_entities(
+                models.ExtArq.uuid, models.ExtArq.attach_handle_id).all()
+            if uuids is not None and len(rows) != len(uuids):
+                missing = uuids - set(row.uuid for row in rows)
+                raise exception.ResourceNotFound(
+                    resource='ExtArq',
+                    msg='with uuid=%s' % ','.join(sorted(missing)))
+            if not rows:
+                return 0
+            ah_ids = [row.attach_handle_id for row in rows
+                      if row.attach_handle_id is not None]
+            if ah_ids:
+                ah_query = model_query(context, models.AttachHandle).filter(
+                    models.AttachHandle.id.in_(ah_ids))
+                deployable_ids = [row.deployable_id for row in
+                                  ah_query.with_entities(
+                                      models.AttachHandle.deployable_id)]
+                ah_query.update({'in_use': False}, synchronize_session=False)
+                _refresh_num_accel_in_use(context, deployable_ids)
+            return query.delete(synchronize_session=False)
+
     def extarq_update(self, context, uuid, values, state_scope=None):
         if 'uuid' in values and values['uuid'] != uuid:
             msg = _("Cannot overwrite UUID for an existing ExtArq.")
@@ -890,6 +1295,28 @@ class Connection(api.Connection):
                 models.ExtArq.uuid.in_(uuid_range))
         return _paginate_query(context, models.ExtArq, query)
 
+    def extarq_list_by_filters(self, context, filters, sort_key='created_at',
+                               sort_dir='desc', limit=None, marker=None):
+        """Return extarqs that match all filters sorted by the given keys."""
+
+        if limit == 0:
+            return []
+
+        query_prefix = model_query(context, models.ExtArq)
+        filters = copy.deepcopy(filters)
+
+        exact_match_filter_names = ['uuid', 'instance_uuid', 'state',
+                                    'hostname', 'project_id',
+                                    'device_rp_uuid']
+
+        # Filter the query
+        query_prefix = self._exact_filter(models.ExtArq, query_prefix,
+                                          filters, exact_match_filter_names)
+        if query_prefix is None:
+            return []
+        return _paginate_query(context, models.ExtArq, query_prefix,
+                               limit, marker, sort_key, sort_dir)
+
     @oslo_db_api.retry_on_deadlock
     def extarq_get(self, context, uuid, lock=False):
         query = model_query(
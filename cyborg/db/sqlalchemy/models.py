@@ -78,6 +78,10 @@ class Device(Base):
     """Represents the devices."""
 
     __tablename__ = 'devices'
+    __table_args__ = (
+        Index('devices_hostname_idx', 'hostname'),
+        table_args()
+    )
 
     id = Column(Integer, primary_key=True)
     uuid = Column(String(36), nullable=False, unique=True)
@@ -90,6 +94,15 @@ class Device(Base):
     hostname = Column(String(255), nullable=False)
 
 
+class Conductor(Base):
+    """Represents the conductors and their last heartbeat."""
+
+    __tablename__ = 'conductors'
+
+    id = Column(Integer, primary_key=True)
+    hostname = Column(String(255), nullable=False, unique=True)
+
+
 class Deployable(Base):
     """Represents the deployables."""
 
@@ -98,6 +111,8 @@ class Deployable(Base):
         Index('deployables_parent_id_idx', 'parent_id'),
         Index('deployables_root_id_idx', 'root_id'),
         Index('deployables_device_id_idx', 'device_id'),
+        Index('deployables_name_device_id_idx', 'name', 'device_id'),
+        Index('deployables_rp_uuid_idx', 'rp_uuid'),
         table_args()
     )
 
@@ -107,6 +122,10 @@ class Deployable(Base):
     root_id = Column(Integer, ForeignKey('deployables.id'), nullable=True)
     name = Column(String(255), nullable=False)
     num_accelerators = Column(Integer, nullable=False)
+    # The number of attach handles of this deployable in use, kept up to
+    # date with the attach handles.
+    num_accel_in_use = Column(Integer, nullable=False, default=0,
+                              server_default='0')
     device_id = Column(Integer, ForeignKey('devices.id', ondelete="RESTRICT"),
                        nullable=False)
     # The resource provider UUID is nullable for 2 reasons:
@@ -124,6 +143,11 @@ class Deployable(Base):
 
 class Attribute(Base):
     __tablename__ = 'attributes'
+    __table_args__ = (
+        Index('attributes_deployable_id_key_idx', 'deployable_id', 'key',
+              mysql_length={'key': 255}),
+        table_args()
+    )
 
     id = Column(Integer, primary_key=True)
     uuid = Column(String(36), nullable=False, unique=True)
@@ -140,6 +164,11 @@ class ControlpathID(Base):
     """
 
     __tablename__ = 'controlpath_ids'
+    __table_args__ = (
+        Index('controlpath_ids_device_id_cpid_info_idx', 'device_id',
+              'cpid_info'),
+        table_args()
+    )
 
     id = Column(Integer, primary_key=True)
     uuid = Column(String(36), nullable=False, unique=True)
@@ -157,6 +186,8 @@ class AttachHandle(Base):
     __table_args__ = (
         Index('attach_handles_cpid_id_idx', 'cpid_id'),
         Index('attach_handles_deployable_id_idx', 'deployable_id'),
+        Index('attach_handles_deployable_id_in_use_idx', 'deployable_id',
+              'in_use'),
         table_args()
     )
 
@@ -207,6 +238,7 @@ class ExtArq(Base):
         Index('extArqs_instance_uuid_idx', 'instance_uuid'),
         Index('extArqs_attach_handle_id_idx', 'attach_handle_id'),
         Index('extArqs_deployable_id_idx', 'deployable_id'),
+        Index('extArqs_state_idx', 'state'),
         table_args()
     )
 
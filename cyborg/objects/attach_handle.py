@@ -93,6 +93,20 @@ class AttachHandle(base.CyborgObject, object_base.VersionedObjectDictCompat):
         self.dbapi.attach_handle_delete(context, self.uuid)
         self.obj_reset_changes()
 
+    @classmethod
+    def bulk_update(cls, context, deployable_id, cpid_id, create=None,
+                    update=None, delete=None):
+        """Create, update and delete the AttachHandles of one deployable in
+        one DB transaction.
+
+        :param create: a list of attach_handle values to create.
+        :param update: a dict mapping attach_info to the values to update.
+        :param delete: a list of attach_info to delete.
+        """
+        cls.dbapi.attach_handle_bulk_update(context, deployable_id, cpid_id,
+                                            create=create, update=update,
+                                            delete=delete)
+
     @classmethod
     def get_ah_list_by_deployable_id(cls, context, deployable_id):
         ah_filter = {'deployable_id': deployable_id}
@@ -115,6 +129,13 @@ class AttachHandle(base.CyborgObject, object_base.VersionedObjectDictCompat):
         obj_ah = cls._from_db_object(cls(context), db_ah)
         return obj_ah
 
+    @classmethod
+    def allocate_many(cls, context, deployable_id, count):
+        """Allocate count attach handles of a deployable, all or none."""
+        db_ahs = cls.dbapi.attach_handle_allocate_many(context, deployable_id,
+                                                       count)
+        return cls._from_db_object_list(db_ahs, context)
+
     def deallocate(self, context):
         values = {"in_use": False}
         self.dbapi.attach_handle_update(context, self.uuid, values)
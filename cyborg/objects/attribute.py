@@ -83,6 +83,20 @@ class Attribute(base.CyborgObject, object_base.VersionedObjectDictCompat):
         self.dbapi.attribute_delete(context, self.uuid)
         self.obj_reset_changes()
 
+    @classmethod
+    def bulk_update(cls, context, deployable_id, create=None, update=None,
+                    delete=None):
+        """Create, update and delete the attributes of one deployable in
+        one DB transaction.
+
+        :param create: a list of attribute values to create.
+        :param update: a dict mapping attribute key to its new value.
+        :param delete: a list of attribute keys to delete.
+        """
+        cls.dbapi.attribute_bulk_update(context, deployable_id,
+                                        create=create, update=update,
+                                        delete=delete)
+
     def set_key_value_pair(self, set_key, set_value):
         self.key = set_key
         self.value = set_value
@@ -42,6 +42,9 @@ class Deployable(base.CyborgObject, object_base.VersionedObjectDictCompat):
         # name of the deployable
         'num_accelerators': object_fields.IntegerField(nullable=False),
         # number of accelerators spawned by this deployable
+        'num_accel_in_use': object_fields.IntegerField(nullable=False,
+                                                       default=0),
+        # number of accelerators of this deployable in use
         'device_id': object_fields.IntegerField(nullable=False),
         # Foreign key constrain to reference device table
         'driver_name': object_fields.StringField(nullable=True),
@@ -129,6 +132,27 @@ class Deployable(base.CyborgObject, object_base.VersionedObjectDictCompat):
         self.dbapi.deployable_delete(context, self.uuid)
         self.obj_reset_changes()
 
+    @classmethod
+    def create_tree(cls, context, device_id, cpid_id, deployables):
+        """Create Deployable records of one device in the DB together with
+        their attributes and attach_handles, in one transaction.
+
+        :param deployables: a list of deployable values, each with the
+        list of its attribute values in 'attributes' and attach_handle
+        values in 'attach_handles'.
+        :return: the list of created Deployable objects.
+        """
+        db_deps = cls.dbapi.deployable_tree_create(context, device_id,
+                                                   cpid_id, deployables)
+        return cls._from_db_object_list(db_deps, context)
+
+    def destroy_tree(self, context):
+        """Delete a Deployable from the DB together with its attributes and
+        attach_handles, in one transaction.
+        """
+        self.dbapi.deployable_tree_delete(context, self.id)
+        self.obj_reset_changes()
+
     @classmethod
     def get_by_filter(cls, context,
                       filters):
@@ -168,6 +192,10 @@ class Deployable(base.CyborgObject, object_base.VersionedObjectDictCompat):
         else:
             return None
 
+    def has_free_accelerators(self):
+        """Whether some accelerators of the deployable are not in use."""
+        return self.num_accel_in_use < self.num_accelerators
+
     def get_cpid_list(self, context):
         query_filter = {"device_id": self.device_id}
         # TODO(Sundar) We should probably get cpid from objects layer,
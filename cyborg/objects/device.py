@@ -84,6 +84,34 @@ class Device(base.CyborgObject, object_base.VersionedObjectDictCompat):
         self.dbapi.device_delete(context, self.uuid)
         self.obj_reset_changes()
 
+    def create_tree(self, context, controlpath_id, deployables):
+        """Create a device record in the DB together with its
+        controlpath_id, deployables, attributes and attach_handles, in one
+        transaction.
+
+        :param controlpath_id: the values of the controlpath_id.
+        :param deployables: a list of deployable values, each with the
+        list of its attribute values in 'attributes' and attach_handle
+        values in 'attach_handles'.
+        """
+        values = self.obj_get_changes()
+        values['controlpath_id'] = controlpath_id
+        values['deployables'] = deployables
+        db_device = self.dbapi.device_tree_create(context, values)
+        self._from_db_object(self, db_device)
+
+    def destroy_tree(self, context):
+        """Delete the Device from the DB together with its controlpath_ids,
+        deployables, attributes and attach_handles, in one transaction.
+        """
+        self.dbapi.device_tree_delete(context, self.id)
+        self.obj_reset_changes()
+
+    @classmethod
+    def get_hostnames(cls, context):
+        """Get the sorted hostnames of the hosts having devices."""
+        return cls.dbapi.device_get_hostnames(context)
+
     @classmethod
     def get_list_by_hostname(cls, context, hostname):
         """get device object list from the hostname. return [] if not
@@ -101,6 +101,24 @@ class DeviceProfile(base.CyborgObject, object_base.VersionedObjectDictCompat):
         obj_dp_list = cls._from_db_object_list(db_devprofs, context)
         return obj_dp_list
 
+    @classmethod
+    def list_by_filters(cls, context, filters, sort_key='id', sort_dir='asc',
+                        limit=None, marker=None):
+        """Return a list of Device Profile objects matching the filters.
+
+        :param filters: a dict from the uuid, id or name to a value or a
+                        list of values.
+        :param limit: the maximum number of device profiles to return.
+        :param marker: the uuid of the last device profile of the previous
+                       page, the device profiles after it are returned.
+        """
+        if marker is not None:
+            marker = cls.dbapi.device_profile_get_by_uuid(context, marker)
+        db_devprofs = cls.dbapi.device_profile_list_by_filters(
+            context, filters, sort_key=sort_key, sort_dir=sort_dir,
+            limit=limit, marker=marker)
+        return cls._from_db_object_list(db_devprofs, context)
+
     def save(self, context):
         """Update a Device Profile record in the DB."""
         updates = self.obj_get_changes()
@@ -49,6 +49,12 @@ class DriverAttachHandle(base.DriverObjectBase,
                                          )
         attach_handle_obj.create(context)
 
+    def get_db_values(self):
+        """Return the values of the attach_handle record in DB."""
+        return {'attach_type': self.attach_type,
+                'attach_info': self.attach_info,
+                'in_use': self.in_use}
+
     def destroy(self, context, deployable_id):
         ah_obj = AttachHandle.get_ah_by_depid_attachinfo(context,
                                                          deployable_id,
@@ -59,13 +65,24 @@ class DriverAttachHandle(base.DriverObjectBase,
     @classmethod
     def list(cls, context, deployable_id):
         """Form a driver-side attach_handle list for one deployable."""
-        ah_obj_list = AttachHandle.get_ah_list_by_deployable_id(
-            context, deployable_id)
-        driver_ah_obj_list = []
+        return cls.list_by_deployable_ids(context,
+                                          [deployable_id])[deployable_id]
+
+    @classmethod
+    def list_by_deployable_ids(cls, context, deployable_ids):
+        """Form driver-side attach_handle lists for many deployables with
+        a single DB query.
+
+        :return: a dict mapping each deployable_id to its driver-side
+        attach_handle list.
+        """
+        driver_ah_obj_dict = {dep_id: [] for dep_id in deployable_ids}
+        ah_filter = {'deployable_id': list(deployable_ids)}
+        ah_obj_list = AttachHandle.list(context, ah_filter)
         for ah_obj in ah_obj_list:
             driver_ah_obj = cls(context=context,
                                 attach_type=ah_obj.attach_type,
                                 attach_info=ah_obj.attach_info,
                                 in_use=ah_obj.in_use)
-            driver_ah_obj_list.append(driver_ah_obj)
-        return driver_ah_obj_list
+            driver_ah_obj_dict[ah_obj.deployable_id].append(driver_ah_obj)
+        return driver_ah_obj_dict
@@ -40,6 +40,10 @@ class DriverAttribute(base.DriverObjectBase,
         attr_obj.set_key_value_pair(self.key, self.value)
         attr_obj.create(context)
 
+    def get_db_values(self):
+        """Return the values of the attribute record in DB."""
+        return {'key': self.key, 'value': self.value}
+
     @classmethod
     def destroy(cls, context, deployable_id):
         """Delete driver-side attribute list from the DB."""
@@ -58,11 +62,24 @@ class DriverAttribute(base.DriverObjectBase,
     @classmethod
     def list(cls, context, deployable_id):
         """Form driver-side attribute list for one deployable."""
-        attr_obj_list = Attribute.get_by_deployable_id(context, deployable_id)
-        driver_attr_obj_list = []
+        return cls.list_by_deployable_ids(context,
+                                          [deployable_id])[deployable_id]
+
+    @classmethod
+    def list_by_deployable_ids(cls, context, deployable_ids):
+        """Form driver-side attribute lists for many deployables with a
+        single DB query.
+
+        :return: a dict mapping each deployable_id to its driver-side
+        attribute list.
+        """
+        driver_attr_obj_dict = {dep_id: [] for dep_id in deployable_ids}
+        attr_filter = {'deployable_id': list(deployable_ids)}
+        attr_obj_list = Attribute.get_by_filter(context, attr_filter)
         for attr_obj in attr_obj_list:
             driver_attr_obj = cls(context=context,
                                   key=attr_obj.key,
                                   value=attr_obj.value)
-            driver_attr_obj_list.append(driver_attr_obj)
-        return driver_attr_obj_list
+            driver_attr_obj_dict[attr_obj.deployable_id].append(
+                driver_attr_obj)
+        return driver_attr_obj_dict
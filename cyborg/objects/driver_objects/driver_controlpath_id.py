@@ -43,6 +43,10 @@ class DriverControlPathID(base.DriverObjectBase,
         cpid_obj.create(context)
         return cpid_obj
 
+    def get_db_values(self):
+        """Return the values of the controlpath_id record in DB."""
+        return {'cpid_type': self.cpid_type, 'cpid_info': self.cpid_info}
+
     def destroy(self, context, device_id):
         cpid_obj = ControlpathID.get_by_device_id_cpidinfo(context,
                                                            device_id,
@@ -53,10 +57,25 @@ class DriverControlPathID(base.DriverObjectBase,
     @classmethod
     def get(cls, context, device_id):
         # return None when can't found any.
-        cpid_obj = ControlpathID.get_by_device_id(context, device_id)
-        driver_cpid_obj = None
-        if cpid_obj is not None:
-            driver_cpid_obj = cls(context=context,
-                                  cpid_type=cpid_obj.cpid_type,
-                                  cpid_info=cpid_obj.cpid_info)
-        return driver_cpid_obj
+        return cls.get_by_device_ids(context, [device_id]).get(device_id)
+
+    @classmethod
+    def get_by_device_ids(cls, context, device_ids):
+        """Get the driver-side ControlPathID of many devices with a single
+        DB query.
+
+        :return: a dict mapping device_id to its driver-side ControlPathID.
+        Devices without controlpath_id are not in the dict.
+        """
+        cpid_filter = {'device_id': list(device_ids)}
+        cpid_obj_list = ControlpathID.list(context, cpid_filter)
+        driver_cpid_obj_dict = {}
+        for cpid_obj in cpid_obj_list:
+            # control_path is unique for one device, keep the first one.
+            if cpid_obj.device_id in driver_cpid_obj_dict:
+                continue
+            driver_cpid_obj_dict[cpid_obj.device_id] = cls(
+                context=context,
+                cpid_type=cpid_obj.cpid_type,
+                cpid_info=cpid_obj.cpid_info)
+        return driver_cpid_obj_dict
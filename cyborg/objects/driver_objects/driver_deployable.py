@@ -44,67 +44,76 @@ class DriverDeployable(base.DriverObjectBase,
     def create(self, context, device_id, cpid_id):
         """Create a driver-side Deployable object into DB. This object will be
         stored in seperate db tables: deployable & attach_handle &
-        attribute table.
+        attribute table, in one transaction.
         """
+        Deployable.create_tree(context, device_id, cpid_id,
+                               [self.get_db_values()])
 
-        # first store in deployable table through Deployable Object.
-        deployable_obj = Deployable(context=context,
-                                    name=self.name,
-                                    num_accelerators=self.num_accelerators,
-                                    device_id=device_id,
-                                    driver_name=self.driver_name
-                                    )
-        deployable_obj.create(context)
-        # create attribute_list for this deployable
-        if hasattr(self, 'attribute_list'):
-            for driver_attr in self.attribute_list:
-                driver_attr.create(context, deployable_obj.id)
-
-        # create attach_handle_list for this deployable
-        if hasattr(self, 'attach_handle_list'):
-            for driver_attach_handle in self.attach_handle_list:
-                driver_attach_handle.create(context, deployable_obj.id,
-                                            cpid_id)
+    def get_db_values(self):
+        """Return the values of the deployable record in DB, with the
+        values of its attributes in 'attributes' and of its attach_handles
+        in 'attach_handles'.
+        """
+        values = {'name': self.name,
+                  'num_accelerators': self.num_accelerators}
+        if self.obj_attr_is_set('driver_name'):
+            values['driver_name'] = self.driver_name
+        values['attributes'] = []
+        if self.obj_attr_is_set('attribute_list'):
+            values['attributes'] = [driver_attr.get_db_values()
+                                    for driver_attr in self.attribute_list]
+        values['attach_handles'] = []
+        if self.obj_attr_is_set('attach_handle_list'):
+            values['attach_handles'] = [
+                driver_ah.get_db_values()
+                for driver_ah in self.attach_handle_list]
+        return values
 
     def destroy(self, context, device_id):
         """delete one driver-side deployable by calling existing Deployable
-        and AttachHandle Object. Use name&host to identify Deployable and
-        attach_info to identify the AttachHandle
+        Object. Use name&host to identify Deployable, its attach_handles and
+        attributes are deleted in the same transaction.
         """
 
         # get deployable_id by name, get only one value.
         dep_obj = Deployable.get_by_name_deviceid(context, self.name,
                                                   device_id)
-        # delete attach_handle
-        if hasattr(self, 'attach_handle_list'):
-            for driver_ah_obj in self.attach_handle_list:
-                # get attach_handle_obj, exist and only one.
-                driver_ah_obj.destroy(context, dep_obj.id)
-        # delete attribute_list
-        if hasattr(self, 'attribute_list'):
-            DriverAttribute.destroy(context, dep_obj.id)
-        # delete dep_obj
         if dep_obj is not None:
-            dep_obj.destroy(context)
+            dep_obj.destroy_tree(context)
 
     @classmethod
     def list(cls, context, device_id):
         """Form driver-side Deployable object list from DB for one device."""
-        # get deployable_obj_list for one device_id
-        dep_obj_list = Deployable.get_list_by_device_id(context, device_id)
-        driver_dep_obj_list = []
+        return cls.list_by_device_ids(context, [device_id])[device_id]
+
+    @classmethod
+    def list_by_device_ids(cls, context, device_ids):
+        """Form driver-side Deployable object lists from DB for many
+        devices. The deployables, attributes and attach_handles are each
+        loaded with a single DB query and assembled in memory.
+
+        :return: a dict mapping each device_id to its driver-side
+        Deployable object list.
+        """
+        driver_dep_obj_dict = {device_id: [] for device_id in device_ids}
+        dep_filter = {'device_id': list(device_ids)}
+        dep_obj_list = Deployable.list(context, dep_filter)
+        if not dep_obj_list:
+            return driver_dep_obj_dict
+        dep_ids = [dep_obj.id for dep_obj in dep_obj_list]
+        driver_ah_obj_dict = DriverAttachHandle.list_by_deployable_ids(
+            context, dep_ids)
+        driver_attr_obj_dict = DriverAttribute.list_by_deployable_ids(
+            context, dep_ids)
         for dep_obj in dep_obj_list:
-            # get driver_ah_obj_list for this dep_obj
-            driver_ah_obj_list = DriverAttachHandle.list(context, dep_obj.id)
-            # get driver_attr_obj_list fro this dep_obj
-            driver_attr_obj_list = DriverAttribute.list(context, dep_obj.id)
-            driver_dep_obj = cls(context=context,
-                                 name=dep_obj.name,
-                                 num_accelerators=dep_obj.num_accelerators,
-                                 attribute_list=driver_attr_obj_list,
-                                 attach_handle_list=driver_ah_obj_list)
-            driver_dep_obj_list.append(driver_dep_obj)
-        return driver_dep_obj_list
+            driver_dep_obj = cls(
+                context=context,
+                name=dep_obj.name,
+                num_accelerators=dep_obj.num_accelerators,
+                attribute_list=driver_attr_obj_dict[dep_obj.id],
+                attach_handle_list=driver_ah_obj_dict[dep_obj.id])
+            driver_dep_obj_dict[dep_obj.device_id].append(driver_dep_obj)
+        return driver_dep_obj_dict
 
     @classmethod
     def get_by_name(cls, context, name):
@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
+
+from oslo_serialization import jsonutils
 from oslo_versionedobjects import base as object_base
 
 from cyborg.objects import base
@@ -52,9 +55,8 @@ class DriverDevice(base.DriverObjectBase,
     def create(self, context, host):
         """Create a driver-side Device Object into DB. This object will be
         stored in many db tables: device, deployable, attach_handle,
-        controlpath_id etc. by calling related Object.
+        controlpath_id etc. in one transaction.
         """
-        # first store in device table through Device Object.
 
         device_obj = Device(context=context,
                             type=self.type,
@@ -66,31 +68,22 @@ class DriverDevice(base.DriverObjectBase,
             device_obj.std_board_info = self.std_board_info
         if hasattr(self, 'vendor_board_info'):
             device_obj.vendor_board_info = self.vendor_board_info
-        device_obj.create(context)
-
-        # for the controlpath_id, call driver_controlpath_id to create.
-        cpid_obj = self.controlpath_id.create(context, device_obj.id)
-        # for deployable_list, call internal layer object: driver_deployable
-        # to create.
-        for driver_deployable in self.deployable_list:
-            driver_deployable.create(context, device_obj.id, cpid_obj.id)
+        # the internal layer objects are written with one bulk insert per
+        # table, instead of one insert per deployable, attribute and
+        # attach_handle.
+        device_obj.create_tree(
+            context, self.controlpath_id.get_db_values(),
+            [driver_deployable.get_db_values()
+             for driver_deployable in self.deployable_list])
 
     def destroy(self, context, host):
         """Delete a driver-side Device Object from db. This should
-        delete the internal layer objects.
+        delete the internal layer objects, in one transaction.
         """
         # get dev_obj_list from hostname
         device_obj = self.get_device_obj(context, host)
-        # delete deployable_list first.
-        for driver_deployable in self.deployable_list:
-            driver_deployable.destroy(context, device_obj.id)
-        if hasattr(self.controlpath_id, 'cpid_info'):
-            cpid_obj = ControlpathID.get_by_device_id_cpidinfo(
-                context, device_obj.id, self.controlpath_id.cpid_info)
-            # delete controlpath_id
-            cpid_obj.destroy(context)
-        # delete the device
-        device_obj.destroy(context)
+        if device_obj is not None:
+            device_obj.destroy_tree(context)
 
     def get_device_obj(self, context, host):
         """Get a driver-side Device Object from db.
@@ -101,15 +94,16 @@ class DriverDevice(base.DriverObjectBase,
         return on value because it has controlpath_id.
         """
         # get dev_obj_list from hostname
-        device_obj_list = Device.get_list_by_hostname(context, host)
+        device_obj_dict = {device_obj.id: device_obj for device_obj in
+                           Device.get_list_by_hostname(context, host)}
+        if not device_obj_dict:
+            return None
         # use controlpath_id.cpid_info to identiy one Device.
-        for device_obj in device_obj_list:
-            # get cpid_obj, could be empty or only one value.
-            cpid_obj = ControlpathID.get_by_device_id_cpidinfo(
-                context, device_obj.id, self.controlpath_id.cpid_info)
-            # find the one cpid_obj with cpid_info
-            if cpid_obj is not None:
-                return device_obj
+        cpid_filter = {'device_id': list(device_obj_dict),
+                       'cpid_info': self.controlpath_id.cpid_info}
+        for cpid_obj in ControlpathID.list(context, cpid_filter):
+            return device_obj_dict[cpid_obj.device_id]
+        return None
 
     @classmethod
     def list(cls, context, host):
@@ -120,21 +114,28 @@ class DriverDevice(base.DriverObjectBase,
         """
         # get dev_obj_list from hostname
         dev_obj_list = Device.get_list_by_hostname(context, host)
+        if not dev_obj_list:
+            return []
+        # load the internal layer objects of all devices at once, with one
+        # query per table instead of several queries per deployable.
+        dev_ids = [dev_obj.id for dev_obj in dev_obj_list]
+        cpid_dict = DriverControlPathID.get_by_device_ids(context, dev_ids)
+        # NOTE: will not return device without controlpath_id.
+        dev_obj_list = [dev_obj for dev_obj in dev_obj_list
+                        if dev_obj.id in cpid_dict]
+        driver_dep_obj_dict = DriverDeployable.list_by_device_ids(
+            context, [dev_obj.id for dev_obj in dev_obj_list])
         driver_dev_obj_list = []
         for dev_obj in dev_obj_list:
-            cpid = DriverControlPathID.get(context, dev_obj.id)
-            # NOTE: will not return device without controlpath_id.
-            if cpid is not None:
-                driver_dev_obj = \
-                    cls(context=context, vendor=dev_obj.vendor,
-                        model=dev_obj.model, type=dev_obj.type,
-                        std_board_info=dev_obj.std_board_info,
-                        vendor_board_info=dev_obj.vendor_board_info,
-                        controlpath_id=cpid,
-                        deployable_list=DriverDeployable.list(context,
-                                                              dev_obj.id)
-                        )
-                driver_dev_obj_list.append(driver_dev_obj)
+            driver_dev_obj = \
+                cls(context=context, vendor=dev_obj.vendor,
+                    model=dev_obj.model, type=dev_obj.type,
+                    std_board_info=dev_obj.std_board_info,
+                    vendor_board_info=dev_obj.vendor_board_info,
+                    controlpath_id=cpid_dict[dev_obj.id],
+                    deployable_list=driver_dep_obj_dict[dev_obj.id]
+                    )
+            driver_dev_obj_list.append(driver_dev_obj)
         return driver_dev_obj_list
 
     def get_device_obj_by_device_id(self, context, device_id):
@@ -153,3 +154,30 @@ class DriverDevice(base.DriverObjectBase,
             context, device_obj.id, self.controlpath_id.cpid_info)
         # find the one cpid_obj with cpid_info
         return device_obj
+
+    @classmethod
+    def fingerprint(cls, driver_device_list):
+        """Compute a stable content fingerprint of a driver device list.
+
+        The fingerprint only depends on the field values of the devices and
+        their internal layer objects, not on the order in which they were
+        discovered, so the agent can compare it between two reports to tell
+        whether anything changed on the host.
+
+        :param driver_device_list: a list of driver_device object.
+        :return: a hex digest string.
+        """
+        data = jsonutils.dumps(_canonical_primitive(driver_device_list),
+                               sort_keys=True)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def _canonical_primitive(value):
+    """Turn driver objects into plain data with lists in a stable order."""
+    if isinstance(value, object_base.VersionedObject):
+        return {field: _canonical_primitive(getattr(value, field))
+                for field in value.fields if value.obj_attr_is_set(field)}
+    if isinstance(value, (list, tuple)):
+        return sorted((_canonical_primitive(v) for v in value),
+                      key=lambda v: jsonutils.dumps(v, sort_keys=True))
+    return value
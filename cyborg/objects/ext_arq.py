@@ -22,6 +22,7 @@ from oslo_versionedobjects import base as object_base
 from cyborg.common import constants
 from cyborg.common.constants import ARQ_STATES_TRANSFORM_MATRIX
 from cyborg.common import exception
+from cyborg.common import metrics
 from cyborg.common import utils
 from cyborg.conf import CONF
 from cyborg.db import api as dbapi
@@ -90,6 +91,35 @@ class ExtARQ(base.CyborgObject, object_base.VersionedObjectDictCompat,
         self._from_db_object(self, db_extarq, context)
         return self
 
+    @classmethod
+    def create_many(cls, context, extarqs, devprofs):
+        """Create ExtARQ records in the DB in one transaction.
+
+        :param extarqs: the ExtARQ objects to create, each with the
+                        device_profile_name of its ARQ set.
+        :param devprofs: the DeviceProfile objects of the ExtARQs by name.
+                         The created ExtARQs are filled from them rather
+                         than by reading them again.
+        :returns: the created ExtARQs.
+        """
+        values_list = []
+        for extarq in extarqs:
+            extarq.arq.state = constants.ARQ_INITIAL
+            extarq.substate = constants.ARQ_INITIAL
+            values = extarq.obj_get_changes()
+            values.pop('arq', None)
+            values.update(extarq.arq.as_dict())
+            values['device_profile_id'] = devprofs[
+                values['device_profile_name']].id
+            values_list.append(values)
+
+        db_extarqs = cls.dbapi.extarq_create_many(context, values_list)
+        related = (dict((devprof.id, devprof)
+                        for devprof in devprofs.values()), {}, {})
+        for extarq, db_extarq in zip(extarqs, db_extarqs):
+            cls._from_db_object(extarq, db_extarq, context, related)
+        return extarqs
+
     @classmethod
     def get(cls, context, uuid, lock=False):
         """Find a DB ExtARQ and return an Obj ExtARQ."""
@@ -108,6 +138,24 @@ class ExtARQ(base.CyborgObject, object_base.VersionedObjectDictCompat,
             db_extarqs, context)
         return obj_extarq_list
 
+    @classmethod
+    def list_by_filters(cls, context, filters, sort_key='id', sort_dir='asc',
+                        limit=None, marker=None):
+        """Return a list of ExtARQ objects matching the filters.
+
+        :param filters: a dict from ExtARQ DB columns, like instance_uuid or
+                        state, to a value or a list of values.
+        :param limit: the maximum number of ExtARQs to return.
+        :param marker: the uuid of the last ExtARQ of the previous page, the
+                       ExtARQs after it are returned.
+        """
+        if marker is not None:
+            marker = cls.dbapi.extarq_get(context, marker)
+        db_extarqs = cls.dbapi.extarq_list_by_filters(
+            context, filters, sort_key=sort_key, sort_dir=sort_dir,
+            limit=limit, marker=marker)
+        return cls._from_db_object_list(db_extarqs, context)
+
     def save(self, context):
         """Update an ExtARQ record in the DB."""
         updates = self.obj_get_changes()
@@ -151,44 +199,51 @@ class ExtARQ(base.CyborgObject, object_base.VersionedObjectDictCompat,
     def delete_by_uuid(cls, context, arq_uuid_list):
         """Delete a list of ARQs based on their UUIDs.
 
+        The attach handles of the ARQs are freed and the ARQs deleted in
+        one transaction.
+
         This is not idempotent, i.e., if the first call to delete an
         ARQ has succeeded, second and later calls to delete the same ARQ
         will get errored out.
         """
-        for uuid in arq_uuid_list:
-            obj_extarq = objects.ExtARQ.get(context, uuid)
-            # TODO() Defer deletion to conductor
-            if obj_extarq.arq.state != constants.ARQ_INITIAL:
-                obj_extarq.unbind(context)
-            obj_extarq.destroy(context)
+        # TODO() Defer deletion to conductor
+        cls.dbapi.extarq_delete_many(context, uuids=arq_uuid_list)
 
     @classmethod
     def delete_by_instance(cls, context, instance_uuid):
         """Delete all ARQs for given instance.
 
+        The attach handles of the ARQs are freed and the ARQs deleted in
+        one transaction.
+
         This is idempotent, i.e., it would have the same effect if called
         repeatedly with the same instance UUID. In other words, it would
         not raise an error on the second and later attempts even if the
         first one has deleted the ARQs.
         """
-        obj_extarqs = [extarq for extarq in objects.ExtARQ.list(context)
-                       if extarq.arq['instance_uuid'] == instance_uuid]
-        for obj_extarq in obj_extarqs:
-            LOG.info('Deleting obj_extarq uuid %s for instance %s',
-                     obj_extarq.arq['uuid'], obj_extarq.arq['instance_uuid'])
-            obj_extarq.unbind(context)
-            obj_extarq.destroy(context)
+        count = cls.dbapi.extarq_delete_many(context,
+                                             instance_uuid=instance_uuid)
+        LOG.info('Deleted %s ARQs for instance %s', count, instance_uuid)
 
     def _get_glance_connection(self):
+        """Get a connection whose image calls are recorded by
+        cyborg.common.metrics.
+        """
         default_user = 'devstack-admin'
         try:
             auth_user = CONF.image.username or default_user
         except Exception:
             auth_user = default_user
-        return connection.Connection(cloud=auth_user)
+        conn = connection.Connection(cloud=auth_user)
+        metrics.instrument(conn.image, 'image')
+        return conn
 
     def _allocate_attach_handle(self, context, deployable):
         try:
+            if not deployable.has_free_accelerators():
+                raise exception.ResourceNotFound(
+                    resource='AttachHandle',
+                    msg='Matching deployable_id {0}'.format(deployable.id))
             ah = AttachHandle.allocate(context, deployable.id)
             self.attach_handle_id = ah.id
         except Exception as e:
@@ -229,22 +284,76 @@ class ExtARQ(base.CyborgObject, object_base.VersionedObjectDictCompat,
         self.save(context)
 
     @classmethod
-    def _fill_obj_extarq_fields(cls, context, db_extarq):
+    def _get_related_objects(cls, context, db_extarqs):
+        """Get the device profiles, attach handles and deployables of some
+           db_extarqs, with one query each.
+
+        :returns: a tuple of dicts by id of the DeviceProfile objects, the
+                  DB attach handles and the DB deployables.
+        """
+        devprof_ids = set(db_extarq['device_profile_id']
+                          for db_extarq in db_extarqs)
+        ah_ids = set(db_extarq.get('attach_handle_id')
+                     for db_extarq in db_extarqs
+                     if db_extarq['state'] == 'Bound')
+        dep_ids = set(db_extarq.get('deployable_id')
+                      for db_extarq in db_extarqs
+                      if db_extarq.get('deployable_id'))
+
+        # Each device profile is parsed once, whatever its number of ARQs.
+        devprofs = dict(
+            (db_devprof['id'],
+             DeviceProfile._from_db_object(DeviceProfile(context),
+                                           db_devprof))
+            for db_devprof in cls.dbapi.device_profile_list_by_filters(
+                context, {'id': list(devprof_ids)}))
+        attach_handles = {}
+        if ah_ids:
+            attach_handles = dict(
+                (db_ah['id'], db_ah)
+                for db_ah in cls.dbapi.attach_handle_get_by_filters(
+                    context, {'id': list(ah_ids)}))
+        deployables = {}
+        if dep_ids:
+            deployables = dict(
+                (db_dep['id'], db_dep)
+                for db_dep in cls.dbapi.deployable_get_by_filters(
+                    context, {'id': list(dep_ids)}))
+        return devprofs, attach_handles, deployables
+
+    @classmethod
+    def _fill_obj_extarq_fields(cls, context, db_extarq, devprofs=None,
+                                attach_handles=None, deployables=None):
         """ExtARQ object has some fields that are not present
            in db_extarq. We fill them out here.
+
+        :param devprofs: the DeviceProfile objects by id, as returned by
+                         _get_related_objects. They are read from the DB
+                         if not given, as are the attach handles and the
+                         deployables.
         """
         # From the 2 fields in the ExtARQ, we obtain other fields.
         devprof_id = db_extarq['device_profile_id']
         devprof_group_id = db_extarq['device_profile_group_id']
 
-        devprof = DeviceProfile.get_by_id(context, devprof_id)
+        if devprofs is None:
+            devprof = DeviceProfile.get_by_id(context, devprof_id)
+        elif devprof_id in devprofs:
+            devprof = devprofs[devprof_id]
+        else:
+            raise exception.ResourceNotFound(
+                resource='Device Profile',
+                msg='with id=%s' % devprof_id)
         db_extarq['device_profile_name'] = devprof['name']
 
         db_extarq['attach_handle_type'] = ''
         db_extarq['attach_handle_info'] = ''
         if db_extarq['state'] == 'Bound':  # TODO() Do proper bind
-            db_ah = cls.dbapi.attach_handle_get_by_id(
-                context, db_extarq['attach_handle_id'])
+            if attach_handles is None:
+                db_ah = cls.dbapi.attach_handle_get_by_id(
+                    context, db_extarq['attach_handle_id'])
+            else:
+                db_ah = attach_handles.get(db_extarq['attach_handle_id'])
             if db_ah is not None:
                 db_extarq['attach_handle_type'] = db_ah['attach_type']
                 db_extarq['attach_handle_info'] = db_ah['attach_info']
@@ -254,8 +363,16 @@ class ExtARQ(base.CyborgObject, object_base.VersionedObjectDictCompat,
                     msg='')
 
         if db_extarq['deployable_id']:
-            dep = objects.Deployable.get_by_id(db_extarq['deployable_id'])
-            db_extarq['deployable_uuid'] = dep.uuid
+            if deployables is None:
+                dep = objects.Deployable.get_by_id(
+                    context, db_extarq['deployable_id'])
+            elif db_extarq['deployable_id'] in deployables:
+                dep = deployables[db_extarq['deployable_id']]
+            else:
+                raise exception.ResourceNotFound(
+                    resource='Deployable',
+                    msg='with id=%s' % db_extarq['deployable_id'])
+            db_extarq['deployable_uuid'] = dep['uuid']
         else:
             LOG.debug('Setting deployable UUID to zeroes for db_extarq %s',
                       db_extarq['uuid'])
@@ -268,13 +385,15 @@ class ExtARQ(base.CyborgObject, object_base.VersionedObjectDictCompat,
         return db_extarq
 
     @classmethod
-    def _from_db_object(cls, extarq, db_extarq, context):
+    def _from_db_object(cls, extarq, db_extarq, context, related=None):
         """Converts an ExtARQ to a formal object.
         :param extarq: An object of the class ExtARQ
         :param db_extarq: A DB model of the object
+        :param related: the related objects of the db_extarq, as returned
+                        by _get_related_objects, if known
         :return: The object of the class with the database entity added
         """
-        cls._fill_obj_extarq_fields(context, db_extarq)
+        cls._fill_obj_extarq_fields(context, db_extarq, *(related or ()))
 
         for field in extarq.fields:
             if field != 'arq':
@@ -286,11 +405,19 @@ class ExtARQ(base.CyborgObject, object_base.VersionedObjectDictCompat,
 
     @classmethod
     def _from_db_object_list(cls, db_objs, context):
-        """Converts a list of ExtARQs to a list of formal objects."""
+        """Converts a list of ExtARQs to a list of formal objects.
+
+        The device profiles, attach handles and deployables of the ExtARQs
+        are read with one query each, rather than once per ExtARQ.
+        """
+        db_objs = list(db_objs)
+        if not db_objs:
+            return []
+        related = cls._get_related_objects(context, db_objs)
         objs = []
         for db_obj in db_objs:
             extarq = cls(context)
-            obj = cls._from_db_object(extarq, db_obj, context)
+            obj = cls._from_db_object(extarq, db_obj, context, related)
             objs.append(obj)
         return objs
 
@@ -18,7 +18,6 @@ Different accelerator handlers for conductor/agent/api/object to call.
 """
 
 
-from openstack import connection
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
 
@@ -52,7 +51,7 @@ class FPGAExtARQ(ExtARQ):
 
     def _get_bitstream_md_from_bitstream_id(self, bitstream_id):
         """Get bitstream metadata given a bitstream id."""
-        conn = connection.Connection(cloud='devstack-admin')
+        conn = self._get_glance_connection()
         resp = conn.image.get('/images/' + bitstream_id)
         if resp:
             return resp.json()
@@ -65,7 +64,7 @@ class FPGAExtARQ(ExtARQ):
     def _get_bitstream_md_from_function_id(self, function_id):
         """Get bitstream metadata given a function id."""
         # TODO(Shaohe) parametrize this role in config file.
-        conn = connection.Connection(cloud='devstack-admin')
+        conn = self._get_glance_connection()
         properties = {constants.ACCEL_FUNCTION_ID: function_id}
         resp = conn.image.get('/images', params=properties)
         if resp:
@@ -176,30 +175,21 @@ class FPGAExtARQ(ExtARQ):
                      self.arq.device_rp_uuid)
             return
 
-        placement = placement_client.PlacementClient()
-        try:
-            placement.delete_traits_with_prefixes(
-                self.arq.device_rp_uuid, [constants.FPGA_FUNCTION_ID])
-        except Exception as e:
-            LOG.error("Failed to delete traits(%s) from resources provider %s."
-                      "Reason: %s", constants.FPGA_FUNCTION_ID,
-                      self.arq.device_rp_uuid, e.message)
-            self.update_check_state(
-                context, constants.ARQ_BIND_FAILED)
-            raise
-
         function_id = function_id.upper().replace('-', '_-')
         # TODO(Sundar) Validate this is a valid trait name
         vendor = driver_name.upper()
         trait_names = ["_".join((
             constants.FPGA_FUNCTION_ID, vendor, function_id))]
+        placement = placement_client.PlacementClient()
+        # Replace the function id traits in one write.
         try:
-            placement.add_traits_to_rp(
-                self.arq.device_rp_uuid, trait_names)
+            placement.update_traits(
+                self.arq.device_rp_uuid, add=trait_names,
+                remove_prefixes=[constants.FPGA_FUNCTION_ID])
         except Exception as e:
-            LOG.error("Failed to add traits(%s) to resources provider %s."
-                      "Reason: %s", trait_names,
-                      self.arq.device_rp_uuid, e.message)
+            LOG.error("Failed to replace traits(%s) with %s on resources "
+                      "provider %s. Reason: %s", constants.FPGA_FUNCTION_ID,
+                      trait_names, self.arq.device_rp_uuid, e)
             # TODO(Shaohe) Rollback? We have _update_placement,
             # should cancel it.
             self.update_check_state(
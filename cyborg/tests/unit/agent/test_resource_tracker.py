@@ -20,7 +20,9 @@ from cyborg.agent.resource_tracker import ResourceTracker
 from cyborg.common import exception
 from cyborg.conductor import rpcapi as cond_api
 from cyborg.conf import CONF
+from cyborg.objects.driver_objects.driver_device import DriverDevice
 from cyborg.tests import base
+from cyborg.tests.unit import fake_driver_device
 
 
 class TestResourceTracker(base.TestCase):
@@ -57,6 +59,112 @@ class TestResourceTracker(base.TestCase):
             m.side_effect = exception.PlacementResourceProviderNotFound(
                 resource_provider='foo')
             self.rt.update_usage(None)
-            m.assert_called_once_with(None, 'fake-mini', [])
+            m.assert_called_once_with(None, 'fake-mini', [],
+                                      fingerprint=DriverDevice.fingerprint([]),
+                                      server=None)
         mock_log.error.assert_called_once_with('Unable to report usage: %s',
                                                m.side_effect)
+        self.assertIsNone(self.rt._last_report_fingerprint)
+
+    def test_update_usage_unchanged_sends_fingerprint_only(self):
+        fingerprint = DriverDevice.fingerprint([])
+        self.rt._last_report_fingerprint = fingerprint
+        with mock.patch.object(self.rt.conductor_api, 'report_data') as m:
+            m.return_value = True
+            self.rt.update_usage(None)
+            m.assert_called_once_with(None, 'fake-mini', None,
+                                      fingerprint=fingerprint, server=None)
+
+    def test_update_usage_unchanged_rejected_sends_full_list(self):
+        fingerprint = DriverDevice.fingerprint([])
+        self.rt._last_report_fingerprint = fingerprint
+        with mock.patch.object(self.rt.conductor_api, 'report_data') as m:
+            m.side_effect = [False, True]
+            self.rt.update_usage(None)
+            m.assert_has_calls([
+                mock.call(None, 'fake-mini', None, fingerprint=fingerprint,
+                          server=None),
+                mock.call(None, 'fake-mini', [], fingerprint=fingerprint,
+                          server=None)])
+        self.assertEqual(fingerprint, self.rt._last_report_fingerprint)
+
+    def test_update_usage_not_applied_forgets_fingerprint(self):
+        with mock.patch.object(self.rt.conductor_api, 'report_data') as m:
+            m.return_value = False
+            self.rt.update_usage(None)
+        self.assertIsNone(self.rt._last_report_fingerprint)
+
+    def test_update_usage_async(self):
+        self.config(async_report=True, group='agent')
+        fingerprint = DriverDevice.fingerprint([])
+        seq = self.rt._report_seq
+        with mock.patch.object(self.rt.conductor_api,
+                               'report_data_async') as m:
+            self.rt.update_usage(None)
+            m.assert_called_once_with(None, 'fake-mini', [], seq + 1,
+                                      fingerprint=fingerprint,
+                                      server=None)
+            # the ack of an outdated report is ignored.
+            self.rt.report_ack(seq, True)
+            self.assertIsNone(self.rt._last_report_fingerprint)
+            self.rt.report_ack(seq + 1, True)
+            self.assertEqual(fingerprint, self.rt._last_report_fingerprint)
+
+            m.reset_mock()
+            self.rt.update_usage(None)
+            m.assert_called_once_with(None, 'fake-mini', None, seq + 2,
+                                      fingerprint=fingerprint,
+                                      server=None)
+            self.rt.report_ack(seq + 2, False)
+            self.assertIsNone(self.rt._last_report_fingerprint)
+
+            m.reset_mock()
+            self.rt.update_usage(None)
+            m.assert_called_once_with(None, 'fake-mini', [], seq + 3,
+                                      fingerprint=fingerprint,
+                                      server=None)
+
+    def test_fingerprint_ignores_order(self):
+        devices = fake_driver_device.get_fake_driver_devices_objs()
+        reordered = fake_driver_device.get_fake_driver_devices_objs()[::-1]
+        reordered[0].deployable_list[0].attribute_list.reverse()
+        self.assertEqual(DriverDevice.fingerprint(devices),
+                         DriverDevice.fingerprint(reordered))
+        reordered[0].deployable_list[0].num_accelerators = 2
+        self.assertNotEqual(DriverDevice.fingerprint(devices),
+                            DriverDevice.fingerprint(reordered))
+
+    def test_update_usage_follows_owner(self):
+        with mock.patch.object(self.rt.conductor_api, 'report_data') as m:
+            m.side_effect = [
+                exception.ConductorNotOwner(conductor='cond1',
+                                            host='fake-mini', owner='cond2'),
+                True, True]
+            self.rt.update_usage(None)
+            fingerprint = DriverDevice.fingerprint([])
+            m.assert_has_calls([
+                mock.call(None, 'fake-mini', [], fingerprint=fingerprint,
+                          server=None),
+                mock.call(None, 'fake-mini', [], fingerprint=fingerprint,
+                          server='cond2')])
+            self.assertEqual(fingerprint, self.rt._last_report_fingerprint)
+
+            m.reset_mock()
+            self.rt.update_usage(None)
+            m.assert_called_once_with(None, 'fake-mini', None,
+                                      fingerprint=fingerprint,
+                                      server='cond2')
+
+    def test_update_usage_async_follows_owner(self):
+        self.config(async_report=True, group='agent')
+        seq = self.rt._report_seq
+        with mock.patch.object(self.rt.conductor_api,
+                               'report_data_async') as m:
+            self.rt.update_usage(None)
+            self.rt.report_ack(seq + 1, True, conductor='cond2')
+            self.rt.update_usage(None)
+            self.assertEqual('cond2', m.call_args[1]['server'])
+            # the report was not acknowledged, the next one is sent to any
+            # conductor.
+            self.rt.update_usage(None)
+            self.assertIsNone(m.call_args[1]['server'])
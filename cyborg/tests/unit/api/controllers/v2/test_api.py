@@ -25,7 +25,7 @@ class TestAPI(v2_test.APITestV2):
     def test_get_api_v2(self):
         data = self.get_json('/', headers=self.headers)
         self.assertEqual(data['status'], "CURRENT")
-        self.assertEqual(data['max_version'], "2.0")
+        self.assertEqual(data['max_version'], "2.2")
         self.assertEqual(data['id'], "v2.0")
         result = isinstance(data['links'], list)
         self.assertTrue(result)
@@ -33,6 +33,9 @@ class TestARQsController(v2_test.APITestV2):
     def setUp(self):
         super(TestARQsController, self).setUp()
         self.headers = self.gen_headers(self.context)
+        # the listings are paginated from the version 2.1.
+        self.paginated_headers = dict(
+            self.headers, **{'OpenStack-API-Version': 'accelerator 2.1'})
         self.fake_extarqs = fake_extarq.get_fake_extarq_objs()
         self.fake_bind_extarqs = fake_extarq.get_fake_extarq_bind_objs()
         self.fake_resolved_extarqs = (
@@ -57,6 +60,15 @@ class TestARQsController(v2_test.APITestV2):
         # Check that the link is properly set up
         self._validate_links(out_arq['links'], in_arq['uuid'])
 
+    def _mock_list_by_filters(self, mock_list, extarqs):
+        def _list_by_filters(context, filters, limit=None, **kwargs):
+            return [extarq for extarq in extarqs
+                    if all(extarq.arq[key] in value
+                           if isinstance(value, list)
+                           else extarq.arq[key] == value
+                           for key, value in filters.items())][:limit]
+        mock_list.side_effect = _list_by_filters
+
     @mock.patch('cyborg.objects.ExtARQ.get')
     def test_get_one_by_uuid(self, mock_extarq):
         in_extarq = self.fake_extarqs[0]
@@ -69,10 +81,10 @@ class TestARQsController(v2_test.APITestV2):
         mock_extarq.assert_called_once()
         self._validate_arq(in_arq, out_arq)
 
-    @mock.patch('cyborg.objects.ExtARQ.list')
+    @mock.patch('cyborg.objects.ExtARQ.list_by_filters')
     def test_get_all(self, mock_extarqs):
         # test get_all of any bind_state
-        mock_extarqs.return_value = self.fake_extarqs
+        self._mock_list_by_filters(mock_extarqs, self.fake_extarqs)
         data = self.get_json(self.ARQ_URL, headers=self.headers)
         out_arqs = data['arqs']
 
@@ -82,10 +94,62 @@ class TestARQsController(v2_test.APITestV2):
         for in_extarq, out_arq in zip(self.fake_extarqs, out_arqs):
             self._validate_arq(in_extarq.arq, out_arq)
 
-    @mock.patch('cyborg.objects.ExtARQ.list')
+    @mock.patch('cyborg.objects.ExtARQ.list_by_filters')
+    def test_get_all_paginated(self, mock_extarqs):
+        self._mock_list_by_filters(mock_extarqs, self.fake_extarqs)
+        marker = self.fake_extarqs[0].arq.uuid
+        url = '%s?limit=2&marker=%s&sort_key=created_at&sort_dir=desc' % (
+            self.ARQ_URL, marker)
+        data = self.get_json(url, headers=self.paginated_headers)
+        mock_extarqs.assert_called_once_with(
+            mock.ANY, {}, sort_key='created_at', sort_dir='desc', limit=2,
+            marker=marker)
+        self.assertEqual(2, len(data['arqs']))
+        next_link = data['next']
+        self.assertIn('limit=2', next_link)
+        self.assertIn('marker=%s' % self.fake_extarqs[1].arq.uuid, next_link)
+        self.assertIn('sort_key=created_at', next_link)
+
+    @mock.patch('cyborg.objects.ExtARQ.list_by_filters')
+    def test_get_all_last_page(self, mock_extarqs):
+        self._mock_list_by_filters(mock_extarqs, self.fake_extarqs)
+        self.config(max_limit=len(self.fake_extarqs) + 1, group='api')
+        data = self.get_json(self.ARQ_URL, headers=self.paginated_headers)
+        self.assertEqual(len(self.fake_extarqs), len(data['arqs']))
+        self.assertNotIn('next', data)
+
+    @mock.patch('cyborg.objects.ExtARQ.list_by_filters')
+    def test_get_all_not_paginated(self, mock_extarqs):
+        self._mock_list_by_filters(mock_extarqs, self.fake_extarqs)
+        self.config(max_limit=1, group='api')
+        data = self.get_json(self.ARQ_URL, headers=self.headers)
+        mock_extarqs.assert_called_once_with(
+            mock.ANY, {}, sort_key='id', sort_dir='asc', limit=None,
+            marker=None)
+        self.assertEqual(len(self.fake_extarqs), len(data['arqs']))
+        self.assertNotIn('next', data)
+
+    def test_get_all_with_invalid_limit(self):
+        exc = None
+        try:
+            self.get_json('%s?limit=0' % self.ARQ_URL,
+                          headers=self.paginated_headers)
+        except Exception as e:
+            exc = e
+        self.assertIn('400 Bad Request', exc.args[0])
+
+    def test_get_all_with_limit_old_version(self):
+        exc = None
+        try:
+            self.get_json('%s?limit=1' % self.ARQ_URL, headers=self.headers)
+        except Exception as e:
+            exc = e
+        self.assertIn('400 Bad Request', exc.args[0])
+
+    @mock.patch('cyborg.objects.ExtARQ.list_by_filters')
     def test_get_all_with_instance(self, mock_extarqs):
         # test get_all with instance
-        mock_extarqs.return_value = self.fake_bind_extarqs
+        self._mock_list_by_filters(mock_extarqs, self.fake_bind_extarqs)
         instance_uuid = self.fake_bind_extarqs[0].arq.instance_uuid
         url = '%s?instance=%s' % (self.ARQ_URL, instance_uuid)
         data = self.get_json(url, headers=self.headers)
@@ -97,10 +161,10 @@ class TestARQsController(v2_test.APITestV2):
         for in_extarq, out_arq in zip(self.fake_bind_extarqs[:2], out_arqs):
             self._validate_arq(in_extarq.arq, out_arq)
 
-    @mock.patch('cyborg.objects.ExtARQ.list')
+    @mock.patch('cyborg.objects.ExtARQ.list_by_filters')
     def test_get_all_with_bind_state(self, mock_extarqs):
         # test get_all with valid bind_state(resolved)
-        mock_extarqs.return_value = self.fake_resolved_extarqs
+        self._mock_list_by_filters(mock_extarqs, self.fake_resolved_extarqs)
         url = '%s?bind_state=resolved' % self.ARQ_URL
         data = self.get_json(url, headers=self.headers)
         out_arqs = data['arqs']
@@ -112,10 +176,10 @@ class TestARQsController(v2_test.APITestV2):
                                       out_arqs):
             self._validate_arq(in_extarq.arq, out_arq)
 
-    @mock.patch('cyborg.objects.ExtARQ.list')
+    @mock.patch('cyborg.objects.ExtARQ.list_by_filters')
     def test_get_all_with_instance_and_bind_state(self, mock_extarqs):
         # test get_all with instance and valid bind_state(resolved)
-        mock_extarqs.return_value = self.fake_bind_extarqs[:3]
+        self._mock_list_by_filters(mock_extarqs, self.fake_bind_extarqs[:3])
         instance_uuid = self.fake_bind_extarqs[0].arq.instance_uuid
         url = '%s?instance=%s&bind_state=resolved' % (
             self.ARQ_URL, instance_uuid)
@@ -128,10 +192,10 @@ class TestARQsController(v2_test.APITestV2):
         for in_extarq, out_arq in zip(self.fake_bind_extarqs[:2], out_arqs):
             self._validate_arq(in_extarq.arq, out_arq)
 
-    @mock.patch('cyborg.objects.ExtARQ.list')
+    @mock.patch('cyborg.objects.ExtARQ.list_by_filters')
     def test_get_all_with_http_client_LOCKED(self, mock_extarqs):
         # test get_all if not all ARQs are in bound state
-        mock_extarqs.return_value = self.fake_bind_extarqs
+        self._mock_list_by_filters(mock_extarqs, self.fake_bind_extarqs)
         instance_uuid = self.fake_bind_extarqs[0].arq.instance_uuid
         url = '%s?instance=%s&bind_state=resolved' % (
             self.ARQ_URL, instance_uuid)
@@ -141,10 +205,10 @@ class TestARQsController(v2_test.APITestV2):
             exc = e
         self.assertIn('423 Locked', exc.args[0])
 
-    @mock.patch('cyborg.objects.ExtARQ.list')
+    @mock.patch('cyborg.objects.ExtARQ.list_by_filters')
     def test_get_all_with_invalid_bind_state(self, mock_extarqs):
         # test get_all with bind_state=started
-        mock_extarqs.return_value = self.fake_extarqs
+        self._mock_list_by_filters(mock_extarqs, self.fake_extarqs)
         instance_uuid = self.fake_extarqs[0].arq.instance_uuid
         url = '%s?instance=%s&bind_state=started' % (
             self.ARQ_URL, instance_uuid)
@@ -171,24 +235,25 @@ class TestARQsController(v2_test.APITestV2):
             "Accelerator Requests cannot be requested with "
             "state started.", exc.args[0])
 
-    @mock.patch('cyborg.objects.ExtARQ.list')
+    @mock.patch('cyborg.objects.ExtARQ.list_by_filters')
     def test_get_all_with_invalid_arq_state(self, mock_extarqs):
         # test get_all response "423 Locked"
         # set ARQ state to 'BindStarted'
         self.fake_extarqs[0].arq.state = 'BindStarted'
-        mock_extarqs.return_value = self.fake_extarqs
+        self._mock_list_by_filters(mock_extarqs, self.fake_extarqs)
         instance_uuid = self.fake_extarqs[0].arq.instance_uuid
         url = '%s?instance=%s&bind_state=resolved' % (
             self.ARQ_URL, instance_uuid)
         response = self.get_json(url, headers=self.headers, expect_errors=True)
         self.assertEqual(http_client.LOCKED, response.status_int)
 
-    @mock.patch('cyborg.objects.DeviceProfile.get_by_name')
-    @mock.patch('cyborg.objects.ExtARQ.create')
+    @mock.patch('cyborg.objects.DeviceProfile.list_by_filters')
+    @mock.patch('cyborg.objects.ExtARQ.create_many')
     def test_create(self, mock_obj_extarq, mock_obj_dp):
         dp_list = fake_device_profile.get_obj_devprofs()
-        mock_obj_dp.return_value = dp = dp_list[0]
-        mock_obj_extarq.side_effect = self.fake_extarqs
+        dp = dp_list[0]
+        mock_obj_dp.return_value = [dp]
+        mock_obj_extarq.return_value = self.fake_extarqs[:3]
         params = {'device_profile_name': dp['name']}
         response = self.post_json(self.ARQ_URL, params, headers=self.headers)
         data = jsonutils.loads(response.__dict__['controller_output'])
@@ -196,17 +261,57 @@ class TestARQsController(v2_test.APITestV2):
 
         self.assertEqual(http_client.CREATED, response.status_int)
         self.assertEqual(len(out_arqs), 3)
+        mock_obj_dp.assert_called_once_with(mock.ANY, {'name': [dp['name']]})
+        mock_obj_extarq.assert_called_once_with(
+            mock.ANY, mock.ANY, {dp['name']: dp})
+        new_extarqs = mock_obj_extarq.call_args[0][1]
+        self.assertEqual([0, 1, 1], [extarq.arq.device_profile_group_id
+                                     for extarq in new_extarqs])
         for in_extarq, out_arq in zip(self.fake_extarqs, out_arqs):
             self._validate_arq(in_extarq.arq, out_arq)
         for idx, out_arq in enumerate(out_arqs):
             dp_group_id = idx
             self.assertEqual(dp_group_id, out_arq['device_profile_group_id'])
 
-    @mock.patch('cyborg.objects.DeviceProfile.get_by_name')
-    @mock.patch('cyborg.objects.ExtARQ.create')
+    @mock.patch('cyborg.objects.DeviceProfile.list_by_filters')
+    @mock.patch('cyborg.objects.ExtARQ.create_many')
+    def test_create_many_device_profiles(self, mock_obj_extarq, mock_obj_dp):
+        dp_list = fake_device_profile.get_obj_devprofs()
+        mock_obj_dp.return_value = dp_list
+        mock_obj_extarq.return_value = self.fake_extarqs[:5]
+        params = [{'device_profile_name': dp_list[0]['name']},
+                  {'device_profile_name': dp_list[1]['name']},
+                  {'device_profile_name': dp_list[0]['name']}]
+        headers = dict(self.headers,
+                       **{'OpenStack-API-Version': 'accelerator 2.2'})
+        response = self.post_json(self.ARQ_URL, params, headers=headers)
+
+        self.assertEqual(http_client.CREATED, response.status_int)
+        mock_obj_dp.assert_called_once()
+        mock_obj_extarq.assert_called_once()
+        new_extarqs = mock_obj_extarq.call_args[0][1]
+        self.assertEqual(
+            [dp_list[0]['name']] * 3 + [dp_list[1]['name']] +
+            [dp_list[0]['name']] * 3,
+            [extarq.arq.device_profile_name for extarq in new_extarqs])
+
+    @mock.patch('cyborg.objects.DeviceProfile.list_by_filters')
+    @mock.patch('cyborg.objects.ExtARQ.create_many')
+    def test_create_many_device_profiles_old_version(self, mock_obj_extarq,
+                                                     mock_obj_dp):
+        dp_list = fake_device_profile.get_obj_devprofs()
+        params = [{'device_profile_name': dp_list[0]['name']}]
+        response = self.post_json(self.ARQ_URL, params, headers=self.headers,
+                                  expect_errors=True)
+
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+        mock_obj_dp.assert_not_called()
+        mock_obj_extarq.assert_not_called()
+
+    @mock.patch('cyborg.objects.DeviceProfile.list_by_filters')
+    @mock.patch('cyborg.objects.ExtARQ.create_many')
     def test_create_with_wrong_dp(self, mock_obj_extarq, mock_obj_dp):
-        mock_obj_dp.side_effect = Exception
-        mock_obj_extarq.side_effect = self.fake_extarqs
+        mock_obj_dp.return_value = []
         params = {'device_profile_name': 'wrong_device_profile_name'}
         exc = None
         try:
@@ -216,6 +321,7 @@ class TestARQsController(v2_test.APITestV2):
         self.assertIn(
             "Device Profile not found with "
             "name=wrong_device_profile_name", exc.args[0])
+        mock_obj_extarq.assert_not_called()
 
     @mock.patch('cyborg.objects.ExtARQ.delete_by_uuid')
     @mock.patch('cyborg.objects.ExtARQ.delete_by_instance')
@@ -273,11 +379,11 @@ class TestARQsController(v2_test.APITestV2):
 
     # TODO(all): Add exception test cases for apply_patch.
 
-    @mock.patch('cyborg.objects.ExtARQ.list')
+    @mock.patch('cyborg.objects.ExtARQ.list_by_filters')
     def test_check_if_bound(self, mock_extarq_list):
         """Test the happy path."""
         extarqs = fake_extarq.get_fake_extarq_objs()
-        mock_extarq_list.return_value = extarqs
+        self._mock_list_by_filters(mock_extarq_list, extarqs)
 
         # Not the instance UUID in extarqs above
         instance_uuid = 'ffbb66f6-99f6-4a85-a90c-fd8e8fb35f16'
@@ -290,15 +396,16 @@ class TestARQsController(v2_test.APITestV2):
 
         self.arqs_controller._check_if_already_bound(
             self.context, valid_fields)
-        mock_extarq_list.assert_called_once_with(self.context)
+        mock_extarq_list.assert_called_once_with(
+            self.context, {'instance_uuid': instance_uuid})
 
-    @mock.patch('cyborg.objects.ExtARQ.list')
+    @mock.patch('cyborg.objects.ExtARQ.list_by_filters')
     def test_check_if_bound_exception(self, mock_extarq_list):
         """Test that an exception is raised if binding request specifies
            an instance that already has ARQs.
         """
         extarqs = fake_extarq.get_fake_extarq_objs()
-        mock_extarq_list.return_value = extarqs
+        self._mock_list_by_filters(mock_extarq_list, extarqs)
 
         # Same instance UUID as in extarqs above, thus triggering exception
         instance_uuid = extarqs[0].arq['instance_uuid']
@@ -28,6 +28,9 @@ class TestDeviceProfileController(v2_test.APITestV2):
     def setUp(self):
         super(TestDeviceProfileController, self).setUp()
         self.headers = self.gen_headers(self.context)
+        # the listings are paginated from the version 2.1.
+        self.paginated_headers = dict(
+            self.headers, **{'OpenStack-API-Version': 'accelerator 2.1'})
         self.fake_dp_objs = fake_device_profile.get_obj_devprofs()
         self.fake_dps = fake_device_profile.get_api_devprofs()
 
@@ -49,20 +52,26 @@ class TestDeviceProfileController(v2_test.APITestV2):
         # Check that the link is properly set up
         self._validate_links(out_dp['links'], in_dp['uuid'])
 
-    @mock.patch('cyborg.objects.DeviceProfile.list')
+    @mock.patch('cyborg.objects.DeviceProfile.list_by_filters')
     def test_get_one_by_uuid(self, mock_dp):
         dp = self.fake_dp_objs[0]
         mock_dp.return_value = [dp]
         url = self.DP_URL + '/%s'
         data = self.get_json(url % dp['uuid'], headers=self.headers)
-        mock_dp.assert_called_once()
+        mock_dp.assert_called_once_with(
+            mock.ANY, {'uuid': dp['uuid']}, sort_key='id', sort_dir='asc',
+            limit=None, marker=None)
         out_dp = data['device_profile']
         self._validate_dp(dp, out_dp)
 
-    @mock.patch('cyborg.objects.DeviceProfile.list')
+    @mock.patch('cyborg.objects.DeviceProfile.list_by_filters')
     def test_get_all(self, mock_dp):
         mock_dp.return_value = self.fake_dp_objs
         data = self.get_json(self.DP_URL, headers=self.headers)
+        mock_dp.assert_called_once_with(
+            mock.ANY, {}, sort_key='id', sort_dir='asc', limit=None,
+            marker=None)
+        self.assertNotIn('next', data)
         out_dps = data['device_profiles']
 
         result = isinstance(out_dps, list)
@@ -71,6 +80,41 @@ class TestDeviceProfileController(v2_test.APITestV2):
         for in_dp, out_dp in zip(self.fake_dp_objs, out_dps):
             self._validate_dp(in_dp, out_dp)
 
+    @mock.patch('cyborg.objects.DeviceProfile.list_by_filters')
+    def test_get_all_paginated(self, mock_dp):
+        mock_dp.return_value = self.fake_dp_objs[:1]
+        marker = self.fake_dp_objs[1]['uuid']
+        url = '%s?name=%s&limit=1&marker=%s' % (
+            self.DP_URL, self.fake_dp_objs[0]['name'], marker)
+        data = self.get_json(url, headers=self.paginated_headers)
+        mock_dp.assert_called_once_with(
+            mock.ANY, {'name': [self.fake_dp_objs[0]['name']]},
+            sort_key='id', sort_dir='asc', limit=1, marker=marker)
+        self.assertEqual(1, len(data['device_profiles']))
+        self.assertIn('marker=%s' % self.fake_dp_objs[0]['uuid'],
+                      data['next'])
+        self.assertIn('name=%s' % self.fake_dp_objs[0]['name'],
+                      data['next'])
+
+    def test_get_all_with_invalid_sort_dir(self):
+        exc = None
+        try:
+            self.get_json('%s?sort_dir=up' % self.DP_URL,
+                          headers=self.paginated_headers)
+        except Exception as e:
+            exc = e
+        self.assertIn('400 Bad Request', exc.args[0])
+
+    def test_get_all_with_marker_old_version(self):
+        exc = None
+        try:
+            self.get_json('%s?marker=%s' % (self.DP_URL,
+                                            self.fake_dp_objs[0]['uuid']),
+                          headers=self.headers)
+        except Exception as e:
+            exc = e
+        self.assertIn('400 Bad Request', exc.args[0])
+
     def test_create_with_non_admin(self):
         value = {"is_admin": False, "roles": "user", "is_admin_project": False}
         ct = self.gen_context(value)
@@ -0,0 +1,101 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import fixtures
+from unittest import mock
+
+from keystoneauth1 import exceptions as ks_exc
+from oslo_utils.fixture import uuidsentinel as uuids
+
+from cyborg.common import metrics
+from cyborg.tests import base
+
+
+class MetricsTest(base.TestCase):
+
+    def setUp(self):
+        super(MetricsTest, self).setUp()
+        self.sink = metrics.MemorySink()
+        self.useFixture(fixtures.MockPatchObject(
+            metrics, '_SINKS', [self.sink, metrics.LoggingSink()]))
+        self.mock_log = self.useFixture(fixtures.MockPatchObject(
+            metrics, 'LOG')).mock
+        self.adapter = mock.Mock(spec=['request'])
+        self.mock_request = self.adapter.request
+        self.mock_request.return_value = mock.Mock(status_code=200)
+        metrics.instrument(self.adapter, 'placement')
+
+    def test_get_endpoint(self):
+        self.assertEqual(
+            '/resource_providers/{uuid}/traits',
+            metrics.get_endpoint('/resource_providers/%s/traits' % uuids.rp))
+        self.assertEqual('/traits/{name}',
+                         metrics.get_endpoint('/traits/CUSTOM_FOO'))
+        self.assertEqual(
+            '/resource_providers?in_tree',
+            metrics.get_endpoint('/resource_providers?in_tree=%s' % uuids.rp))
+
+    def test_instrument(self):
+        self.adapter.request('/traits/CUSTOM_FOO', 'PUT')
+        self.adapter.request('/traits/CUSTOM_BAR', 'PUT')
+        self.assertEqual(2, self.mock_request.call_count)
+        calls = self.sink.snapshot()[('placement', 'PUT', '/traits/{name}')]
+        self.assertEqual(2, calls['count'])
+        self.assertEqual({200: 2}, calls['statuses'])
+        self.assertEqual(2, sum(calls['latency']))
+        self.mock_log.warning.assert_not_called()
+
+    def test_instrument_error(self):
+        self.mock_request.side_effect = ks_exc.ConnectFailure()
+        self.assertRaises(ks_exc.ConnectFailure, self.adapter.request,
+                          '/resource_providers', 'GET')
+        calls = self.sink.snapshot()[
+            ('placement', 'GET', '/resource_providers')]
+        self.assertEqual({metrics.NO_RESPONSE: 1}, calls['statuses'])
+
+    @mock.patch('time.monotonic')
+    def test_slow_call(self, mock_monotonic):
+        self.config(slow_call_threshold=2)
+        mock_monotonic.side_effect = [0, 3]
+        self.adapter.request('/resource_providers', 'GET')
+        self.mock_log.warning.assert_called_once()
+        calls = self.sink.snapshot()[
+            ('placement', 'GET', '/resource_providers')]
+        self.assertEqual(3, calls['max_time'])
+        self.assertEqual(
+            1, calls['latency'][metrics.LATENCY_BUCKETS.index(5.0)])
+
+    def test_log_snapshot(self):
+        self.useFixture(fixtures.MockPatchObject(
+            metrics, '_MEMORY_SINK', self.sink))
+        self.adapter.request('/resource_providers', 'GET')
+        metrics.log_snapshot()
+        self.mock_log.info.assert_called_once()
+        args = self.mock_log.info.call_args[0][1]
+        self.assertEqual(('placement', 'GET', '/resource_providers', 1),
+                         (args['service'], args['method'], args['endpoint'],
+                          args['count']))
+        self.assertEqual({200: 1}, args['statuses'])
+
+    def test_failing_sink(self):
+        sink = mock.Mock(spec=metrics.MetricsSink)
+        sink.record.side_effect = ValueError()
+        metrics.register_sink(sink)
+        self.adapter.request('/resource_providers', 'GET')
+        self.mock_log.exception.assert_called_once()
+        self.assertEqual(1, len(self.sink.snapshot()))
+
+    def test_sink_without_record(self):
+        class _Sink(metrics.MetricsSink):
+            pass
+
+        self.assertRaises(TypeError, _Sink)
@@ -0,0 +1,267 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import fixtures
+from unittest import mock
+
+from oslo_utils.fixture import uuidsentinel as uuids
+
+from cyborg.common import exception
+from cyborg.common import placement_client
+from cyborg.tests import base
+from cyborg.tests.unit import fake_placement
+
+
+class PlacementClientTest(base.TestCase):
+
+    def setUp(self):
+        super(PlacementClientTest, self).setUp()
+        self.mock_sdk = self.useFixture(fixtures.MockPatch(
+            'cyborg.common.utils.get_sdk_adapter')).mock.return_value
+        self.useFixture(fixtures.MockPatchObject(
+            placement_client, '_KNOWN_TRAITS', set()))
+        self.useFixture(fixtures.MockPatchObject(
+            placement_client, '_PROVIDER_TREE',
+            placement_client.ProviderTree()))
+        self.mock_sleep = self.useFixture(fixtures.MockPatch(
+            'time.sleep')).mock
+        self.client = placement_client.PlacementClient()
+        self.mock_sdk.get.return_value = mock.Mock(status_code=200)
+        self.mock_sdk.get.return_value.json.return_value = {
+            'resource_provider_generation': 3,
+            'traits': ['CUSTOM_OLD', 'CUSTOM_FPGA_FUNCTION_ID_OLD'],
+        }
+        self.mock_sdk.put.side_effect = self._put
+
+    def _put(self, url, **kwargs):
+        if url.startswith('/traits/'):
+            return mock.Mock(status_code=201)
+        resp = mock.Mock(status_code=200)
+        resp.json.return_value = {'resource_provider_generation': 4}
+        return resp
+
+    def _put_urls(self):
+        return [c[0][0] for c in self.mock_sdk.put.call_args_list]
+
+    def test_update_traits(self):
+        traits = self.client.update_traits(
+            uuids.rp, add=['CUSTOM_FPGA_FUNCTION_ID_NEW', 'HW_CPU_X86_AVX'],
+            remove_prefixes=['CUSTOM_FPGA_FUNCTION_ID'])
+        expected = set(['CUSTOM_OLD', 'CUSTOM_FPGA_FUNCTION_ID_NEW',
+                        'HW_CPU_X86_AVX'])
+        self.assertEqual(expected, traits)
+        # one GET of the traits with their generation, the standard trait
+        # is not created.
+        self.mock_sdk.get.assert_called_once()
+        self.assertEqual(
+            ['/traits/CUSTOM_FPGA_FUNCTION_ID_NEW',
+             '/resource_providers/%s/traits' % uuids.rp],
+            self._put_urls())
+        self.assertEqual(
+            {'resource_provider_generation': 3,
+             'traits': sorted(expected)},
+            self.mock_sdk.put.call_args[1]['json'])
+
+    def test_update_traits_unchanged(self):
+        self.client.update_traits(uuids.rp, remove=['CUSTOM_MISSING'])
+        self.mock_sdk.put.assert_not_called()
+
+    def test_ensure_traits_known(self):
+        self.client.ensure_traits(['CUSTOM_FOO'])
+        # known by the whole process.
+        placement_client.PlacementClient().ensure_traits(['CUSTOM_FOO'])
+        self.assertEqual(['/traits/CUSTOM_FOO'], self._put_urls())
+
+    def test_update_inventory_known_generation(self):
+        self.client.provider_tree.update(uuids.rp, generation=3,
+                                         traits=['CUSTOM_FOO'])
+        self.client.update_inventory(uuids.rp, {'FPGA': {'total': 1}})
+        self.mock_sdk.get.assert_not_called()
+        self.assertEqual(3, self.mock_sdk.put.call_args[1]['json'][
+            'resource_provider_generation'])
+        # the generation of the write response is used next time, and the
+        # traits known at the previous one are kept.
+        provider = self.client.provider_tree.get(uuids.rp)
+        self.assertEqual(4, provider['generation'])
+        self.assertEqual({'FPGA': {'total': 1}}, provider['inventories'])
+        self.assertEqual(['CUSTOM_FOO'], provider['traits'])
+
+    def test_get_traits_cached(self):
+        self.assertEqual(self.client.get_traits(uuids.rp),
+                         self.client.get_traits(uuids.rp))
+        self.mock_sdk.get.assert_called_once()
+        self.client.get_traits(uuids.rp, refresh=True)
+        self.assertEqual(2, self.mock_sdk.get.call_count)
+
+    def test_update_traits_conflict_reads_again(self):
+        self.client.get_traits(uuids.rp)
+        conflict = mock.Mock(status_code=409)
+        self.mock_sdk.put.side_effect = [conflict, self._put('/rp')]
+        self.client.update_traits(uuids.rp, add=['HW_CPU_X86_AVX'])
+        self.assertEqual(2, self.mock_sdk.get.call_count)
+        self.assertEqual(2, self.mock_sdk.put.call_count)
+
+    def test_get_providers_in_tree_cached(self):
+        self.mock_sdk.get.return_value.json.return_value = {
+            'resource_providers': [
+                {'uuid': uuids.root, 'generation': 1,
+                 'parent_provider_uuid': None,
+                 'root_provider_uuid': uuids.root},
+                {'uuid': uuids.rp, 'generation': 2,
+                 'parent_provider_uuid': uuids.root,
+                 'root_provider_uuid': uuids.root}]}
+        ctxt = mock.Mock()
+        self.client.get_providers_in_tree(ctxt, uuids.root)
+        # a provider created by Cyborg joins the known tree.
+        self.client.provider_tree.update(
+            uuids.new, generation=0, parent_provider_uuid=uuids.rp)
+        providers = self.client.get_providers_in_tree(ctxt, uuids.rp)
+        self.mock_sdk.get.assert_called_once()
+        self.assertEqual(set([uuids.root, uuids.rp, uuids.new]),
+                         set(rp['uuid'] for rp in providers))
+        self.mock_sdk.delete.return_value = mock.Mock(status_code=204)
+        self.client.delete_provider(uuids.new)
+        providers = self.client.get_providers_in_tree(ctxt, uuids.root)
+        self.assertEqual(set([uuids.root, uuids.rp]),
+                         set(rp['uuid'] for rp in providers))
+
+    def test_update_inventory_conflict_retries(self):
+        self.client.provider_tree.update(uuids.rp, generation=1)
+        self.mock_sdk.get.return_value.json.return_value = {
+            'uuid': uuids.rp, 'generation': 7}
+        conflict = mock.Mock(status_code=409)
+        self.mock_sdk.put.side_effect = [conflict, self._put('/rp')]
+        result = self.client.update_inventory(uuids.rp, {'FPGA': {}})
+        self.assertEqual(4, result['resource_provider_generation'])
+        self.assertEqual(
+            [1, 7], [c[1]['json']['resource_provider_generation']
+                     for c in self.mock_sdk.put.call_args_list])
+        self.mock_sleep.assert_called_once()
+
+    def test_update_inventory_conflict_gives_up(self):
+        self.mock_sdk.get.return_value.json.return_value = {
+            'uuid': uuids.rp, 'generation': 7}
+        self.mock_sdk.put.side_effect = None
+        self.mock_sdk.put.return_value = mock.Mock(status_code=409)
+        self.assertRaises(exception.ResourceProviderUpdateConflict,
+                          self.client.update_inventory, uuids.rp, {})
+        self.assertEqual(placement_client.GENERATION_CONFLICT_RETRIES + 1,
+                         self.mock_sdk.put.call_count)
+        self.assertIsNone(self.client.provider_tree.get(uuids.rp))
+
+    def test_delete_providers_deepest_first(self):
+        providers = [
+            {'uuid': uuids.rp1, 'parent_provider_uuid': uuids.root},
+            {'uuid': uuids.rp1_child, 'parent_provider_uuid': uuids.rp1},
+            {'uuid': uuids.rp2, 'parent_provider_uuid': uuids.root},
+        ]
+        self.mock_sdk.delete.return_value = mock.Mock(status_code=204)
+        self.client.delete_providers(providers, max_workers=4)
+        urls = [c[0][0] for c in self.mock_sdk.delete.call_args_list]
+        self.assertEqual('/resource_providers/%s' % uuids.rp1_child,
+                         urls[0])
+        self.assertEqual(
+            set(['/resource_providers/%s' % uuids.rp1,
+                 '/resource_providers/%s' % uuids.rp2]), set(urls[1:]))
+
+    def test_delete_providers_stops_on_error(self):
+        providers = [
+            {'uuid': uuids.rp1, 'parent_provider_uuid': None},
+            {'uuid': uuids.rp1_child, 'parent_provider_uuid': uuids.rp1},
+            {'uuid': uuids.rp2_child, 'parent_provider_uuid': uuids.rp1},
+        ]
+        self.mock_sdk.delete.side_effect = [
+            mock.Mock(status_code=409, ok=False),
+            mock.Mock(status_code=404, ok=False)]
+        self.assertRaises(exception.ResourceProviderInUse,
+                          self.client.delete_providers, providers)
+        # the other deletion of the level is made, not the parent one.
+        self.assertEqual(2, self.mock_sdk.delete.call_count)
+
+    def test_get_subtree(self):
+        providers = [
+            {'uuid': uuids.root, 'parent_provider_uuid': None},
+            {'uuid': uuids.rp1, 'parent_provider_uuid': uuids.root},
+            {'uuid': uuids.rp1_child, 'parent_provider_uuid': uuids.rp1},
+            {'uuid': uuids.rp2, 'parent_provider_uuid': uuids.root},
+        ]
+        self.assertEqual(providers[1:3],
+                         placement_client.get_subtree(providers, [uuids.rp1]))
+
+    def test_get_provider_levels(self):
+        providers = [
+            {'uuid': uuids.rp1_child, 'parent_provider_uuid': uuids.rp1},
+            {'uuid': uuids.rp1, 'parent_provider_uuid': uuids.root},
+            {'uuid': uuids.rp2, 'parent_provider_uuid': uuids.root},
+        ]
+        self.assertEqual([[uuids.rp1, uuids.rp2], [uuids.rp1_child]],
+                         placement_client.get_provider_levels(providers))
+        self.assertEqual([], placement_client.get_provider_levels([]))
+
+
+class PlacementClientMultiProcessTest(base.TestCase):
+    """The clients of two processes, each with its own provider tree,
+    writing the same provider.
+    """
+
+    def setUp(self):
+        super(PlacementClientMultiProcessTest, self).setUp()
+        self.placement = self.useFixture(
+            fake_placement.PlacementFixture()).placement
+        self.rp_uuid = self.placement.add_compute_node('foo')
+        self.clients = [placement_client.PlacementClient(),
+                        placement_client.PlacementClient()]
+        self.clients[1].provider_tree = placement_client.ProviderTree()
+
+    def _set_function_id(self, client, function_id):
+        client.update_traits(
+            self.rp_uuid, add=['CUSTOM_FPGA_FUNCTION_ID_' + function_id],
+            remove_prefixes=['CUSTOM_FPGA_FUNCTION_ID'])
+
+    def test_update_traits_stale_tree(self):
+        self._set_function_id(self.clients[0], 'F1')
+        self._set_function_id(self.clients[1], 'F2')
+        # the first client still knows the traits with F1.
+        self._set_function_id(self.clients[0], 'F1')
+        self.assertEqual(
+            set(['CUSTOM_FPGA_FUNCTION_ID_F1']),
+            self.placement.providers[self.rp_uuid]['traits'])
+
+
+class ProviderTreeTest(base.TestCase):
+
+    def setUp(self):
+        super(ProviderTreeTest, self).setUp()
+        self.tree = placement_client.ProviderTree()
+        self.tree.update(uuids.rp, generation=1, traits=['CUSTOM_FOO'],
+                         inventories={'FPGA': {'total': 1}})
+
+    def test_update_other_generation(self):
+        self.tree.update(uuids.rp, generation=2)
+        provider = self.tree.get(uuids.rp)
+        self.assertEqual(2, provider['generation'])
+        self.assertIsNone(provider['traits'])
+        self.assertIsNone(provider['inventories'])
+
+    def test_update_written(self):
+        self.tree.update(uuids.rp, generation=2, base_generation=1,
+                         traits=['CUSTOM_BAR'])
+        provider = self.tree.get(uuids.rp)
+        self.assertEqual(['CUSTOM_BAR'], provider['traits'])
+        self.assertEqual({'FPGA': {'total': 1}}, provider['inventories'])
+
+    def test_get_copy(self):
+        self.tree.get(uuids.rp)['traits'].append('CUSTOM_BAR')
+        self.assertEqual(['CUSTOM_FOO'], self.tree.get(uuids.rp)['traits'])
+
+    def test_get_tree_not_read(self):
+        self.assertIsNone(self.tree.get_tree(uuids.rp))
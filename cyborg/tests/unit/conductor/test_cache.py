@@ -0,0 +1,126 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+from oslo_utils import timeutils
+
+from cyborg.conductor import cache
+from cyborg.tests import base
+
+
+class InventoryCacheTest(base.TestCase):
+
+    def _write(self, inventory_cache, host, driver_device_list):
+        seq = inventory_cache.begin_write(host)
+        inventory_cache.end_write(host, seq, driver_device_list)
+
+    def test_write(self):
+        inventory_cache = cache.InventoryCache(2)
+        self._write(inventory_cache, 'foo', ['dev'])
+        self.assertEqual(['dev'], inventory_cache.get('foo'))
+        # the snapshot is dropped while the host is written.
+        seq = inventory_cache.begin_write('foo')
+        self.assertIsNone(inventory_cache.get('foo'))
+        inventory_cache.end_write('foo', seq)
+        self.assertIsNone(inventory_cache.get('foo'))
+        self.assertIsNone(inventory_cache.get('bar'))
+
+    def test_concurrent_writes(self):
+        inventory_cache = cache.InventoryCache(2)
+        first_seq = inventory_cache.begin_write('foo')
+        second_seq = inventory_cache.begin_write('foo')
+        inventory_cache.end_write('foo', first_seq, ['first_dev'])
+        self.assertIsNone(inventory_cache.get('foo'))
+        inventory_cache.end_write('foo', second_seq, ['second_dev'])
+        self.assertEqual(['second_dev'], inventory_cache.get('foo'))
+
+    def test_evict_least_recently_used(self):
+        inventory_cache = cache.InventoryCache(2)
+        self._write(inventory_cache, 'foo', ['foo_dev'])
+        self._write(inventory_cache, 'bar', ['bar_dev'])
+        inventory_cache.get('foo')
+        self._write(inventory_cache, 'baz', ['baz_dev'])
+        self.assertIsNone(inventory_cache.get('bar'))
+        self.assertEqual(['foo_dev'], inventory_cache.get('foo'))
+        self.assertEqual(['baz_dev'], inventory_cache.get('baz'))
+
+    def test_invalidate(self):
+        inventory_cache = cache.InventoryCache(2)
+        self._write(inventory_cache, 'foo', ['dev'])
+        inventory_cache.invalidate('foo')
+        inventory_cache.invalidate('bar')
+        self.assertIsNone(inventory_cache.get('foo'))
+        # a write in progress is not stored.
+        seq = inventory_cache.begin_write('foo')
+        inventory_cache.invalidate('foo')
+        inventory_cache.end_write('foo', seq, ['dev'])
+        self.assertIsNone(inventory_cache.get('foo'))
+
+    def test_clear(self):
+        inventory_cache = cache.InventoryCache(2)
+        self._write(inventory_cache, 'foo', ['foo_dev'])
+        seq = inventory_cache.begin_write('bar')
+        inventory_cache.clear()
+        inventory_cache.end_write('bar', seq, ['bar_dev'])
+        self.assertIsNone(inventory_cache.get('foo'))
+        self.assertIsNone(inventory_cache.get('bar'))
+
+    def test_disabled(self):
+        inventory_cache = cache.InventoryCache(0)
+        self._write(inventory_cache, 'foo', ['dev'])
+        self.assertIsNone(inventory_cache.get('foo'))
+
+
+class ProviderCacheTest(base.TestCase):
+
+    def test_get_counts(self):
+        provider_cache = cache.ProviderCache(60)
+        self.assertIsNone(provider_cache.get('foo'))
+        provider_cache.put('foo', 'rp')
+        self.assertEqual('rp', provider_cache.get('foo'))
+        self.assertEqual('rp', provider_cache.get('foo'))
+        self.assertEqual(2, provider_cache.hits)
+        self.assertEqual(1, provider_cache.misses)
+
+    def test_expire(self):
+        provider_cache = cache.ProviderCache(60)
+        provider_cache.put('foo', 'rp')
+        self.addCleanup(timeutils.clear_time_override)
+        timeutils.set_time_override(
+            timeutils.utcnow() + datetime.timedelta(seconds=61))
+        self.assertIsNone(provider_cache.get('foo'))
+        self.assertEqual(1, provider_cache.misses)
+
+    def test_expire_on_put(self):
+        provider_cache = cache.ProviderCache(60)
+        provider_cache.put('foo', 'rp1')
+        provider_cache.put('bar', 'rp2')
+        self.addCleanup(timeutils.clear_time_override)
+        timeutils.set_time_override(
+            timeutils.utcnow() + datetime.timedelta(seconds=30))
+        provider_cache.put('foo', 'rp1')
+        timeutils.advance_time_seconds(31)
+        provider_cache.put('baz', 'rp3')
+        self.assertEqual(['foo', 'baz'], list(provider_cache._providers))
+        self.assertEqual('rp1', provider_cache.get('foo'))
+
+    def test_invalidate(self):
+        provider_cache = cache.ProviderCache(60)
+        provider_cache.put('foo', 'rp')
+        provider_cache.invalidate('foo')
+        self.assertIsNone(provider_cache.get('foo'))
+
+    def test_disabled(self):
+        provider_cache = cache.ProviderCache(0)
+        provider_cache.put('foo', 'rp')
+        self.assertIsNone(provider_cache.get('foo'))
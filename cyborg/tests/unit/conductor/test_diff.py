@@ -0,0 +1,74 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from cyborg.conductor import diff
+from cyborg.tests import base
+from cyborg.tests.unit import fake_driver_device
+
+
+class DiffTest(base.TestCase):
+    def setUp(self):
+        super(DiffTest, self).setUp()
+        self.old_devices = fake_driver_device.get_fake_driver_devices_objs()
+        self.new_devices = fake_driver_device.get_fake_driver_devices_objs()
+
+    def test_device_plan_unchanged(self):
+        plan = diff.DevicePlan(self.old_devices, self.new_devices[::-1])
+        self.assertFalse(plan.changed)
+        self.assertEqual([], plan.added)
+        self.assertEqual([], plan.deleted)
+        self.assertEqual(2, len(plan.same))
+        self.assertEqual([], plan.updated)
+
+    def test_device_plan_added_deleted(self):
+        plan = diff.DevicePlan(self.old_devices[:1], self.new_devices[1:])
+        self.assertTrue(plan.changed)
+        self.assertEqual([self.new_devices[1]], plan.added)
+        self.assertEqual([self.old_devices[0]], plan.deleted)
+        self.assertEqual([], plan.same)
+
+    def test_device_plan_ignores_stub(self):
+        self.new_devices[1].stub = True
+        plan = diff.DevicePlan(self.old_devices[:1], self.new_devices)
+        self.assertFalse(plan.changed)
+        plan = diff.DevicePlan(self.old_devices, self.new_devices[:1])
+        self.assertEqual([self.old_devices[1]], plan.deleted)
+
+    def test_device_plan_updated(self):
+        new_dev = self.new_devices[0]
+        new_dev.model = 'new model'
+        new_dep = new_dev.deployable_list[0]
+        new_dep.num_accelerators = 4
+        new_dep.attribute_list[0].value = 'CUSTOM_NEW_TRAIT'
+        new_dep.attribute_list.pop()
+        new_dep.attach_handle_list[0].attach_type = 'MDEV'
+        plan = diff.DevicePlan(self.old_devices, self.new_devices)
+        self.assertTrue(plan.changed)
+        self.assertEqual(1, len(plan.updated))
+        change = plan.updated[0]
+        self.assertEqual({'model': 'new model'}, change.updates)
+        dep_change = change.deployables.updated[0]
+        self.assertEqual({'num_accelerators': 4}, dep_change.updates)
+        self.assertEqual(
+            [{'value': 'CUSTOM_NEW_TRAIT'}],
+            [c.updates for c in dep_change.attributes.updated])
+        self.assertEqual(['rc'],
+                         [a.key for a in dep_change.attributes.deleted])
+        self.assertEqual(
+            [{'attach_type': 'MDEV'}],
+            [c.updates for c in dep_change.attach_handles.updated])
+
+    def test_index_by(self):
+        deps = fake_driver_device.get_fake_driver_deployable_objs()
+        index = diff.index_by(deps + deps[:1], 'name')
+        self.assertEqual({dep.name: dep for dep in deps}, index)
+        self.assertIs(deps[0], index[deps[0].name])
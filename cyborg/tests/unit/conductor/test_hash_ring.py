@@ -0,0 +1,50 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from cyborg.conductor import hash_ring
+from cyborg.tests import base
+
+
+class TestHashRing(base.TestCase):
+
+    def setUp(self):
+        super(TestHashRing, self).setUp()
+        self.hosts = ['host%d' % i for i in range(1000)]
+
+    def _owners(self, ring):
+        return dict((host, ring.get_node(host)) for host in self.hosts)
+
+    def test_empty(self):
+        self.assertIsNone(hash_ring.HashRing([]).get_node('host0'))
+
+    def test_stable(self):
+        ring = hash_ring.HashRing(['cond1', 'cond2', 'cond3'])
+        other = hash_ring.HashRing(['cond3', 'cond1', 'cond2'])
+        self.assertEqual(self._owners(ring), self._owners(other))
+
+    def test_split(self):
+        ring = hash_ring.HashRing(['cond1', 'cond2', 'cond3'])
+        owners = list(self._owners(ring).values())
+        for node in ring.nodes:
+            # roughly a third of the hosts each.
+            self.assertGreater(owners.count(node), 200)
+
+    def test_node_leaves(self):
+        before = self._owners(hash_ring.HashRing(['cond1', 'cond2',
+                                                  'cond3']))
+        after = self._owners(hash_ring.HashRing(['cond1', 'cond2']))
+        # only the hosts of the conductor which left move.
+        for host in self.hosts:
+            if before[host] != 'cond3':
+                self.assertEqual(before[host], after[host])
+            else:
+                self.assertIn(after[host], ('cond1', 'cond2'))
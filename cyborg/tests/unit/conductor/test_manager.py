@@ -9,15 +9,25 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
-import fixtures
+import threading
 from unittest import mock
 
+import eventlet
+import fixtures
+
+import oslo_messaging as messaging
 from oslo_utils.fixture import uuidsentinel as uuids
 
 from cyborg.common import exception
+from cyborg.common import service
+from cyborg.conductor import hash_ring
 from cyborg.conductor import manager
+from cyborg.conductor import reconciler
+from cyborg.objects.driver_objects.driver_device import DriverDevice
 from cyborg.tests import base
+from cyborg.tests.unit.db.base import DbTestCase
 from cyborg.tests.unit import fake_driver_device
+from cyborg.tests.unit import fake_placement
 
 
 class ConductorManagerTest(base.TestCase):
@@ -91,6 +101,37 @@ class ConductorManagerTest(base.TestCase):
         uuid = self.cm._get_root_provider(mock.sentinel.context, 'foo')
         self.assertEqual(mock.sentinel.uuid, uuid)
 
+    def test_get_root_provider_cached(self):
+        self.placement_mock.get.return_value.json.return_value = {
+            'resource_providers': [{'uuid': mock.sentinel.uuid}],
+        }
+        self.cm._get_root_provider(mock.sentinel.context, 'foo')
+        uuid = self.cm._get_root_provider(mock.sentinel.context, 'foo')
+        self.assertEqual(mock.sentinel.uuid, uuid)
+        self.placement_mock.get.assert_called_once_with(
+            'resource_providers?name=foo')
+        self.assertEqual(1, self.cm._provider_cache.hits)
+
+    @mock.patch('cyborg.conductor.manager.ConductorManager.'
+                'drv_device_make_diff')
+    @mock.patch('cyborg.objects.driver_objects.driver_device.'
+                'DriverDevice.list')
+    def test_report_data_failure_invalidates_root_provider(
+            self, mock_list, mock_diff):
+        self.cm._provider_cache.put('foo', mock.sentinel.uuid)
+        mock_diff.return_value = False
+        self.cm.report_data(mock.sentinel.context, 'foo',
+                            self.fake_driver_devices)
+        self.assertIsNone(self.cm._provider_cache.get('foo'))
+
+        self.cm._provider_cache.put('foo', mock.sentinel.uuid)
+        mock_diff.side_effect = exception.PlacementResourceProviderNotFound(
+            resource_provider='foo')
+        self.assertRaises(exception.PlacementResourceProviderNotFound,
+                          self.cm.report_data, mock.sentinel.context, 'foo',
+                          self.fake_driver_devices)
+        self.assertIsNone(self.cm._provider_cache.get('foo'))
+
     def test_get_root_provider_not_found(self):
         self.placement_mock.get.return_value.json.return_value = {
             'resource_providers': [],
@@ -135,6 +176,42 @@ class ConductorManagerTest(base.TestCase):
         mock_destroy_driver_device.assert_called_once()
         mock_placement_delete.assert_called_once()
 
+    @mock.patch('cyborg.conductor.manager.ConductorManager.'
+                '_delete_provider_and_sub_providers')
+    @mock.patch('cyborg.conductor.manager.ConductorManager.'
+                'get_placement_needed_info_and_report')
+    @mock.patch('cyborg.objects.driver_objects.driver_device.'
+                'DriverDevice.destroy', autospec=True)
+    @mock.patch('cyborg.objects.driver_objects.driver_device.'
+                'DriverDevice.create')
+    def test_drv_device_make_diff_concurrent_report(
+            self, mock_create_driver_device, mock_destroy_driver_device,
+            mock_placement_report, mock_placement_delete):
+        self.config(placement_report_workers=4, group='conductor')
+        new_driver_dev_list = self.fake_driver_devices
+        failed_dev = new_driver_dev_list[1]
+        self.placement_mock.get.return_value.json.return_value = {
+            'resource_providers': [{'uuid': mock.sentinel.uuid}],
+        }
+
+        def _report(context, driver_dep_obj, parent_uuid):
+            if driver_dep_obj in failed_dev.deployable_list:
+                raise exception.ResourceProviderCreationFailed(
+                    name=driver_dep_obj.name)
+
+        mock_placement_report.side_effect = _report
+
+        self.assertFalse(self.cm.drv_device_make_diff(
+            mock.sentinel.context, 'foo', [], new_driver_dev_list))
+
+        self.assertEqual(2, mock_create_driver_device.call_count)
+        self.assertEqual(2, mock_placement_report.call_count)
+        mock_destroy_driver_device.assert_called_once_with(
+            failed_dev, mock.sentinel.context, 'foo')
+        mock_placement_delete.assert_called_once_with(
+            mock.sentinel.context,
+            self.cm.get_rp_uuid_from_obj(failed_dev.deployable_list[0]))
+
     @mock.patch('cyborg.conductor.manager.ConductorManager.'
                 '_delete_provider_and_sub_providers')
     @mock.patch('cyborg.conductor.manager.ConductorManager.'
@@ -163,3 +240,494 @@ class ConductorManagerTest(base.TestCase):
 
         mock_destroy_driver_deployable.assert_called_once()
         mock_placement_delete.assert_called_once()
+
+    def test_delete_providers_and_sub_providers(self):
+        self.config(placement_delete_workers=4, group='conductor')
+        tree = [
+            {'uuid': uuids.root, 'parent_provider_uuid': None},
+            {'uuid': uuids.rp1, 'parent_provider_uuid': uuids.root},
+            {'uuid': uuids.rp1_child, 'parent_provider_uuid': uuids.rp1},
+            {'uuid': uuids.rp2, 'parent_provider_uuid': uuids.root},
+            {'uuid': uuids.rp3, 'parent_provider_uuid': uuids.root},
+        ]
+        in_tree = set(rp['uuid'] for rp in tree)
+        self.placement_mock.get_providers_in_tree.side_effect = (
+            lambda context, rp_uuid, refresh: (
+                tree if rp_uuid in in_tree else []))
+        context = mock.Mock()
+        self.cm._delete_providers_and_sub_providers(
+            context, [uuids.rp1, uuids.rp2, uuids.missing])
+
+        # the tree is looked up once for the providers in it.
+        self.assertEqual(
+            2, self.placement_mock.get_providers_in_tree.call_count)
+        self.placement_mock.delete_providers.assert_called_once_with(
+            tree[1:4], max_workers=4, global_request_id=context.global_id)
+
+    @mock.patch('cyborg.objects.driver_objects.driver_device.'
+                'DriverDevice.destroy', autospec=True)
+    def test_drv_device_make_diff_all_deleted(self, mock_destroy):
+        dep_names = [dep.name for dev in self.fake_driver_devices
+                     for dep in dev.deployable_list]
+        # a provider of another service, and one Cyborg left behind which
+        # is not in the Cyborg DB anymore.
+        tree = [{'uuid': uuids.root, 'parent_provider_uuid': None,
+                 'name': 'foo'},
+                {'uuid': uuids.vgpu, 'parent_provider_uuid': uuids.root,
+                 'name': 'foo_pci_0000_84_00_0'}] + [
+            {'uuid': reconciler.get_rp_uuid(name),
+             'parent_provider_uuid': uuids.root, 'name': name}
+            for name in dep_names + ['foo_stale']]
+        self.placement_mock.get_providers_in_tree.return_value = tree
+        self.cm._provider_cache.put('foo', uuids.root)
+        context = mock.Mock()
+
+        self.cm.drv_device_make_diff(context, 'foo',
+                                     self.fake_driver_devices, [])
+
+        self.placement_mock.get_providers_in_tree.assert_called_once_with(
+            context, uuids.root, refresh=True)
+        self.placement_mock.delete_providers.assert_called_once_with(
+            tree[2:], max_workers=10, global_request_id=context.global_id)
+        self.assertEqual(len(self.fake_driver_devices),
+                         mock_destroy.call_count)
+
+    @mock.patch('cyborg.conductor.manager.ConductorManager.'
+                'drv_device_make_diff')
+    @mock.patch('cyborg.objects.driver_objects.driver_device.'
+                'DriverDevice.list')
+    def test_report_data_fingerprint(self, mock_list, mock_diff):
+        mock_diff.return_value = True
+        self.assertTrue(self.cm.report_data(
+            mock.sentinel.context, 'foo', self.fake_driver_devices,
+            fingerprint='abc'))
+        mock_list.assert_called_once_with(mock.sentinel.context, 'foo')
+        mock_diff.assert_called_once()
+
+        mock_list.reset_mock()
+        mock_diff.reset_mock()
+        self.assertTrue(self.cm.report_data(
+            mock.sentinel.context, 'foo', None, fingerprint='abc'))
+        mock_list.assert_not_called()
+        mock_diff.assert_not_called()
+
+        self.assertFalse(self.cm.report_data(
+            mock.sentinel.context, 'foo', None, fingerprint='def'))
+        self.assertFalse(self.cm.report_data(
+            mock.sentinel.context, 'bar', None, fingerprint='abc'))
+        mock_list.assert_not_called()
+        mock_diff.assert_not_called()
+
+    @mock.patch('cyborg.conductor.manager.ConductorManager.'
+                'drv_device_make_diff')
+    @mock.patch('cyborg.objects.driver_objects.driver_device.'
+                'DriverDevice.list')
+    def test_report_data_not_applied(self, mock_list, mock_diff):
+        mock_diff.return_value = False
+        self.assertFalse(self.cm.report_data(
+            mock.sentinel.context, 'foo', self.fake_driver_devices,
+            fingerprint='abc'))
+        self.assertFalse(self.cm.report_data(
+            mock.sentinel.context, 'foo', None, fingerprint='abc'))
+
+    @mock.patch('cyborg.conductor.manager.ConductorManager.'
+                '_process_report')
+    def test_report_data_async_coalesces(self, mock_report):
+        self.cm._agent_api = mock.Mock()
+        context = mock.sentinel.context
+
+        def _report(context, hostname, driver_device_list, fingerprint):
+            # Reports received while the first one is processed.
+            if driver_device_list == 'list1':
+                self.cm.report_data_async(context, 'foo', 'list2', 2)
+                self.cm.report_data_async(context, 'foo', 'list3', 3)
+                # outdated, dropped.
+                self.cm.report_data_async(context, 'foo', 'list0', 0)
+            return driver_device_list != 'list3'
+
+        mock_report.side_effect = _report
+        self.cm.report_data_async(context, 'foo', 'list1', 1,
+                                  fingerprint='abc')
+
+        mock_report.assert_has_calls([
+            mock.call(context, 'foo', 'list1', fingerprint='abc'),
+            mock.call(context, 'foo', 'list3', fingerprint=None)])
+        self.assertEqual(2, mock_report.call_count)
+        self.cm._agent_api.report_ack.assert_has_calls([
+            mock.call(context, 'foo', 1, True, conductor=None),
+            mock.call(context, 'foo', 3, False, conductor=None)])
+        self.assertEqual(2, self.cm._agent_api.report_ack.call_count)
+
+        # outdated reports are dropped after the processing, too.
+        self.cm.report_data_async(context, 'foo', 'list2', 2)
+        self.assertEqual(2, mock_report.call_count)
+
+    @mock.patch('cyborg.conductor.manager.ConductorManager.'
+                '_process_report')
+    def test_report_data_async_failure_nacks(self, mock_report):
+        self.cm._agent_api = mock.Mock()
+        mock_report.side_effect = exception.PlacementServerError(
+            "Placement Server has some error at this time.")
+        self.cm.report_data_async(mock.sentinel.context, 'foo', [], 1)
+        self.cm._agent_api.report_ack.assert_called_once_with(
+            mock.sentinel.context, 'foo', 1, False, conductor=None)
+
+    def _set_hash_ring(self, nodes):
+        self.config(shard_reports=True, group='conductor')
+        self.cm.host = 'cond1'
+        self.cm._hash_ring = hash_ring.HashRing(nodes)
+        ring = self.cm._hash_ring
+        # a host handled by each conductor.
+        return dict((ring.get_node('host%d' % i), 'host%d' % i)
+                    for i in range(100))
+
+    @mock.patch('cyborg.conductor.manager.ConductorManager.'
+                '_process_report')
+    def test_report_data_not_owner(self, mock_report):
+        hosts = self._set_hash_ring(['cond1', 'cond2'])
+        ex = self.assertRaises(messaging.ExpectedException,
+                               self.cm.report_data, mock.sentinel.context,
+                               hosts['cond2'], [])
+        self.assertIsInstance(ex.exc_info[1], exception.ConductorNotOwner)
+        self.assertEqual('cond2', ex.exc_info[1].kwargs['owner'])
+        mock_report.assert_not_called()
+
+        mock_report.return_value = True
+        self.assertTrue(self.cm.report_data(mock.sentinel.context,
+                                            hosts['cond1'], []))
+
+    @mock.patch('cyborg.conductor.manager.ConductorManager.'
+                '_process_report')
+    def test_report_data_async_forwards_to_owner(self, mock_report):
+        hosts = self._set_hash_ring(['cond1', 'cond2'])
+        self.cm._agent_api = mock.Mock()
+        self.cm._conductor_api = mock.Mock()
+        context = mock.sentinel.context
+        self.cm.report_data_async(context, hosts['cond2'], [], 1,
+                                  fingerprint='abc')
+        self.cm._conductor_api.report_data_async.assert_called_once_with(
+            context, hosts['cond2'], [], 1, fingerprint='abc',
+            server='cond2', forwarded=True)
+        mock_report.assert_not_called()
+
+        # a forwarded report is processed even if the rings disagree.
+        mock_report.return_value = True
+        self.cm.report_data_async(context, hosts['cond2'], [], 2,
+                                  forwarded=True)
+        self.cm._agent_api.report_ack.assert_called_once_with(
+            context, hosts['cond2'], 2, True, conductor='cond1')
+        self.cm._conductor_api.report_data_async.assert_called_once()
+
+    @mock.patch('cyborg.db.sqlalchemy.api.Connection.'
+                'conductor_get_alive_hostnames')
+    @mock.patch('cyborg.db.sqlalchemy.api.Connection.conductor_heartbeat')
+    def test_periodic_tasks_rebalances(self, mock_heartbeat, mock_alive):
+        self.config(shard_reports=True, group='conductor')
+        self.cm.host = 'cond1'
+        mock_alive.return_value = ['cond1']
+        self.cm.periodic_tasks(mock.sentinel.context)
+        mock_heartbeat.assert_called_once_with(mock.sentinel.context,
+                                               'cond1')
+        self.assertEqual('cond1', self.cm._get_report_owner(
+            mock.sentinel.context, 'host0'))
+
+        mock_alive.return_value = ['cond1', 'cond2']
+        self.cm.periodic_tasks(mock.sentinel.context)
+        owners = set(self.cm._get_report_owner(mock.sentinel.context,
+                                               'host%d' % i)
+                     for i in range(100))
+        self.assertEqual(set(['cond1', 'cond2']), owners)
+
+    def test_get_timers(self):
+        self.assertEqual([(3600, self.cm._audit_placement_task)],
+                         self.cm.get_timers())
+        self.config(placement_audit_interval=0, group='conductor')
+        self.assertEqual([], self.cm.get_timers())
+
+    @mock.patch.object(manager.ConductorManager, 'audit_placement')
+    def test_audit_placement_task_error(self, mock_audit):
+        mock_audit.side_effect = exception.PlacementServerError()
+        self.cm._audit_placement_task(mock.sentinel.context)
+        mock_audit.assert_called_once_with(mock.sentinel.context)
+
+    @mock.patch('cyborg.db.sqlalchemy.api.Connection.conductor_unregister')
+    @mock.patch('cyborg.db.sqlalchemy.api.Connection.'
+                'conductor_get_alive_hostnames', return_value=['cond1'])
+    @mock.patch('cyborg.db.sqlalchemy.api.Connection.conductor_heartbeat')
+    @mock.patch('cyborg.common.rpc.get_server')
+    @mock.patch.object(manager.ConductorManager, 'audit_placement')
+    def test_heartbeat_during_audit(self, mock_audit, mock_get_server,
+                                    mock_heartbeat, mock_alive,
+                                    mock_unregister):
+        self.config(periodic_interval=1)
+        self.config(shard_reports=True, placement_audit_interval=1,
+                    group='conductor')
+        audit_started = threading.Event()
+        audit_done = threading.Event()
+
+        def _audit(context):
+            audit_started.set()
+            audit_done.wait(10)
+
+        mock_audit.side_effect = _audit
+        rpc_service = service.RPCService('cyborg.conductor.manager',
+                                         'ConductorManager', 'conductor',
+                                         host='cond1')
+        rpc_service.start()
+        self.addCleanup(rpc_service.stop)
+        self.addCleanup(audit_done.set)
+        self.assertTrue(audit_started.wait(10))
+        heartbeats = mock_heartbeat.call_count
+        for _ in range(100):
+            if mock_heartbeat.call_count > heartbeats:
+                break
+            eventlet.sleep(0.05)
+        self.assertGreater(mock_heartbeat.call_count, heartbeats)
+        self.assertFalse(audit_done.is_set())
+
+    @mock.patch('cyborg.conductor.manager.ConductorManager.'
+                'drv_deployable_make_diff')
+    @mock.patch('cyborg.objects.control_path.ControlpathID.list')
+    @mock.patch('cyborg.objects.device.Device.get_list_by_hostname')
+    def test_drv_device_make_diff_updated(self, mock_get_devs,
+                                          mock_list_cpids, mock_dep_diff):
+        old_driver_dev_list = self.fake_driver_devices
+        new_driver_dev_list = fake_driver_device.get_fake_driver_devices_objs()
+        for driver_dev_obj in new_driver_dev_list:
+            driver_dev_obj.model = 'new model'
+        dev_objs = [mock.Mock(id=1), mock.Mock(id=2)]
+        mock_get_devs.return_value = dev_objs
+        mock_list_cpids.return_value = [
+            mock.Mock(id=10 + i, device_id=dev.id,
+                      cpid_info=driver_dev.controlpath_id.cpid_info)
+            for i, (dev, driver_dev) in enumerate(
+                zip(dev_objs, old_driver_dev_list))]
+        mock_dep_diff.return_value = True
+        self.placement_mock.get.return_value.json.return_value = {
+            'resource_providers': [{'uuid': mock.sentinel.uuid}],
+        }
+
+        self.assertTrue(self.cm.drv_device_make_diff(
+            mock.sentinel.context, 'foo',
+            old_driver_dev_list, new_driver_dev_list))
+
+        mock_get_devs.assert_called_once_with(mock.sentinel.context, 'foo')
+        mock_list_cpids.assert_called_once_with(mock.sentinel.context,
+                                                {'device_id': [1, 2]})
+        for dev in dev_objs:
+            self.assertEqual('new model', dev.model)
+            dev.save.assert_called_once_with(mock.sentinel.context)
+        self.assertEqual(2, mock_dep_diff.call_count)
+
+    def test_drv_device_make_diff_unchanged(self):
+        self.assertTrue(self.cm.drv_device_make_diff(
+            mock.sentinel.context, 'foo', self.fake_driver_devices,
+            fake_driver_device.get_fake_driver_devices_objs()))
+        self.placement_mock.get.assert_not_called()
+
+
+class ConductorManagerDbTest(DbTestCase):
+    def setUp(self):
+        super(ConductorManagerDbTest, self).setUp()
+        self.placement_mock = self.useFixture(fixtures.MockPatch(
+            'cyborg.common.placement_client.PlacementClient')
+        ).mock.return_value
+        self.placement_mock.get.return_value.json.return_value = {
+            'resource_providers': [{'uuid': uuids.compute_node}],
+        }
+        self.placement_mock.get_inventories.return_value = {
+            'resource_provider_generation': 1,
+            'inventories': {'PGPU': {'total': 1, 'max_unit': 1}},
+        }
+        self.placement_mock.update_inventory.return_value = {
+            'resource_provider_generation': 2,
+        }
+        self.placement_mock.get_traits.return_value = {
+            'resource_provider_generation': 2,
+            'traits': ['CUSTOM_GPU_NVIDIA', 'CUSTOM_GPU_PRODUCT_ID_1DB6',
+                       'CUSTOM_FPGA_FUNCTION_ID_FOO'],
+        }
+        self.cm = manager.ConductorManager(
+            mock.sentinel.topic, mock.sentinel.host)
+        driver_dev_list = fake_driver_device.get_fake_driver_devices_objs()
+        for driver_dev_obj in driver_dev_list:
+            driver_dev_obj.create(self.context, 'foo')
+
+    def test_drv_device_make_diff_updates_db(self):
+        old_driver_dev_list = DriverDevice.list(self.context, 'foo')
+        new_driver_dev_list = fake_driver_device.get_fake_driver_devices_objs()
+        new_dev = new_driver_dev_list[0]
+        new_dev.model = 'new model'
+        new_dep = new_dev.deployable_list[0]
+        new_dep.num_accelerators = 2
+        new_dep.attribute_list[0].value = 'CUSTOM_NEW_TRAIT'
+        new_dep.attribute_list.pop(1)
+        new_dep.attach_handle_list[0].attach_type = 'TEST_PCI'
+
+        self.assertTrue(self.cm.drv_device_make_diff(
+            self.context, 'foo', old_driver_dev_list, new_driver_dev_list))
+
+        driver_dev_list = DriverDevice.list(self.context, 'foo')
+        driver_dev = [d for d in driver_dev_list
+                      if d.controlpath_id.cpid_info ==
+                      new_dev.controlpath_id.cpid_info][0]
+        self.assertEqual('new model', driver_dev.model)
+        driver_dep = driver_dev.deployable_list[0]
+        self.assertEqual(2, driver_dep.num_accelerators)
+        self.assertEqual(
+            sorted([('trait0', 'CUSTOM_NEW_TRAIT'), ('rc', 'PGPU')]),
+            sorted((a.key, a.value) for a in driver_dep.attribute_list))
+        self.assertEqual(['TEST_PCI'],
+                         [ah.attach_type
+                          for ah in driver_dep.attach_handle_list])
+        # the inventory and traits are written once, the runtime traits
+        # are kept.
+        rp_uuid = self.cm.get_rp_uuid_from_obj(new_dep)
+        self.placement_mock.update_inventory.assert_called_once_with(
+            rp_uuid, {'PGPU': {'total': 2, 'max_unit': 2}},
+            resource_provider_generation=1)
+        self.placement_mock.ensure_traits.assert_called_once_with(
+            ['CUSTOM_NEW_TRAIT'])
+        self.placement_mock.set_traits.assert_called_once_with(
+            rp_uuid, set(['CUSTOM_NEW_TRAIT', 'CUSTOM_FPGA_FUNCTION_ID_FOO']),
+            2)
+        self.placement_mock.delete_trait_by_name.assert_not_called()
+        self.placement_mock.add_traits_to_rp.assert_not_called()
+
+    def test_audit_placement(self):
+        driver_dep_list = [
+            driver_dep_obj
+            for driver_dev_obj in DriverDevice.list(self.context, 'foo')
+            for driver_dep_obj in driver_dev_obj.deployable_list]
+        rp_uuids = [self.cm.get_rp_uuid_from_obj(driver_dep_obj)
+                    for driver_dep_obj in driver_dep_list]
+        # the provider of the first deployable is missing.
+        self.placement_mock.get_providers_in_tree.return_value = [
+            {'uuid': uuids.compute_node}] + [
+            {'uuid': rp_uuid} for rp_uuid in rp_uuids[1:]]
+        self.placement_mock.get_traits.return_value = {
+            'resource_provider_generation': 1,
+            'traits': [],
+        }
+        self.cm.audit_placement(self.context)
+
+        self.placement_mock.get_providers_in_tree.assert_called_once_with(
+            self.context, uuids.compute_node, refresh=True)
+        self.placement_mock.ensure_resource_provider.assert_called_once_with(
+            self.context, rp_uuids[0], name=driver_dep_list[0].name,
+            parent_provider_uuid=uuids.compute_node)
+        self.assertEqual(len(rp_uuids),
+                         self.placement_mock.set_traits.call_count)
+
+    @mock.patch('cyborg.objects.driver_objects.driver_device.'
+                'DriverDevice.list', autospec=True,
+                side_effect=DriverDevice.list)
+    def test_report_data_inventory_cache(self, mock_list):
+        self.config(shard_reports=True, group='conductor')
+        self.cm.host = 'cond1'
+        self.cm._hash_ring = hash_ring.HashRing(['cond1'])
+        driver_dev_list = fake_driver_device.get_fake_driver_devices_objs()
+        self.assertTrue(self.cm.report_data(self.context, 'foo',
+                                            driver_dev_list))
+        mock_list.assert_called_once_with(self.context, 'foo')
+
+        # the next reports are diffed with the device list written by the
+        # previous one.
+        driver_dev_list = fake_driver_device.get_fake_driver_devices_objs()
+        driver_dev_list[0].deployable_list[0].num_accelerators = 2
+        self.assertTrue(self.cm.report_data(self.context, 'foo',
+                                            driver_dev_list))
+        dep = self.dbapi.deployable_get_by_filters(
+            self.context, {'name': driver_dev_list[0].deployable_list[0].name})
+        self.assertEqual(2, dep[0]['num_accelerators'])
+        driver_dev_list = fake_driver_device.get_fake_driver_devices_objs()
+        self.assertTrue(self.cm.report_data(self.context, 'foo',
+                                            driver_dev_list))
+        dep = self.dbapi.deployable_get_by_filters(
+            self.context, {'name': driver_dev_list[0].deployable_list[0].name})
+        self.assertEqual(1, dep[0]['num_accelerators'])
+        mock_list.assert_called_once()
+
+        # another conductor may have written the host meanwhile.
+        with mock.patch.object(self.cm.dbapi, 'conductor_heartbeat'), \
+                mock.patch.object(self.cm.dbapi,
+                                  'conductor_get_alive_hostnames') as alive:
+            alive.return_value = ['cond1', 'cond2']
+            self.cm._refresh_hash_ring(self.context)
+            alive.return_value = ['cond1']
+            self.cm._refresh_hash_ring(self.context)
+        self.assertTrue(self.cm.report_data(self.context, 'foo',
+                                            driver_dev_list))
+        self.assertEqual(2, mock_list.call_count)
+
+    @mock.patch('cyborg.objects.driver_objects.driver_device.'
+                'DriverDevice.list', autospec=True,
+                side_effect=DriverDevice.list)
+    def test_report_data_inventory_cache_not_sharded(self, mock_list):
+        driver_dev_list = fake_driver_device.get_fake_driver_devices_objs()
+        self.assertTrue(self.cm.report_data(self.context, 'foo',
+                                            driver_dev_list))
+        self.assertTrue(self.cm.report_data(self.context, 'foo',
+                                            driver_dev_list))
+        # other conductors may write the host.
+        self.assertEqual(2, mock_list.call_count)
+
+
+class ConductorManagerPlacementTest(DbTestCase):
+    def setUp(self):
+        super(ConductorManagerPlacementTest, self).setUp()
+        self.placement = self.useFixture(
+            fake_placement.PlacementFixture()).placement
+        self.root_uuid = self.placement.add_compute_node('foo')
+        self.cm = manager.ConductorManager(
+            mock.sentinel.topic, mock.sentinel.host)
+
+    def _get_children(self):
+        return dict((rp['name'], rp)
+                    for rp in self.placement.providers.values()
+                    if rp['parent_provider_uuid'] == self.root_uuid)
+
+    def test_report_data(self):
+        driver_dev_list = fake_driver_device.get_fake_driver_devices_objs()
+        self.assertTrue(self.cm.report_data(self.context, 'foo',
+                                            driver_dev_list))
+        children = self._get_children()
+        self.assertEqual(
+            set(dep.name for dev in driver_dev_list
+                for dep in dev.deployable_list), set(children))
+        for rp in children.values():
+            self.assertEqual({'PGPU': {'total': 1, 'max_unit': 1}},
+                             rp['inventories'])
+            self.assertEqual(set(['CUSTOM_GPU_NVIDIA',
+                                  'CUSTOM_GPU_PRODUCT_ID_1DB6']),
+                             rp['traits'])
+
+        # an unchanged report makes no Placement call.
+        call_count = self.placement.call_count
+        self.assertTrue(self.cm.report_data(
+            self.context, 'foo',
+            fake_driver_device.get_fake_driver_devices_objs()))
+        self.assertEqual(call_count, self.placement.call_count)
+
+        self.assertTrue(self.cm.report_data(self.context, 'foo',
+                                            driver_dev_list[:1]))
+        self.assertEqual(
+            set(dep.name for dep in driver_dev_list[0].deployable_list),
+            set(self._get_children()))
+
+    def test_delete_providers_and_sub_providers_not_cached(self):
+        driver_dev_list = fake_driver_device.get_fake_driver_devices_objs()
+        self.assertTrue(self.cm.report_data(self.context, 'foo',
+                                            driver_dev_list))
+        self.cm.placement_client.get_providers_in_tree(self.context,
+                                                       self.root_uuid)
+        child = sorted(self._get_children().values(),
+                       key=lambda rp: rp['name'])[0]
+        # a provider created under the child by another service, once the
+        # tree was read by the conductor.
+        self.placement._add_provider(uuids.other, 'other', child['uuid'])
+
+        self.cm._delete_providers_and_sub_providers(self.context,
+                                                    [child['uuid']])
+        self.assertNotIn(child['uuid'], self.placement.providers)
+        self.assertNotIn(uuids.other, self.placement.providers)
@@ -0,0 +1,102 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from oslo_utils.fixture import uuidsentinel as uuids
+
+from cyborg.common import exception
+from cyborg.conductor import reconciler
+from cyborg.tests import base
+from cyborg.tests.unit import fake_driver_device
+
+
+class PlacementReconcilerTest(base.TestCase):
+
+    def setUp(self):
+        super(PlacementReconcilerTest, self).setUp()
+        self.client = mock.Mock()
+        self.reconciler = reconciler.PlacementReconciler(self.client)
+        self.driver_dep = (fake_driver_device.
+                           get_fake_driver_deployable_objs()[0])
+        self.state = reconciler.ProviderState(self.driver_dep)
+        self.client.get_inventories.return_value = {
+            'resource_provider_generation': 1,
+            'inventories': {
+                self.state.resource_class: {
+                    'total': self.driver_dep.num_accelerators,
+                    'max_unit': self.driver_dep.num_accelerators,
+                    'reserved': 0,
+                },
+            },
+        }
+        self.client.get_traits.return_value = {
+            'resource_provider_generation': 1,
+            'traits': sorted(self.state.traits),
+        }
+
+    def test_in_sync(self):
+        self.assertEqual([], self.reconciler.reconcile(
+            mock.sentinel.context, uuids.root, [self.driver_dep]))
+        self.client.update_inventory.assert_not_called()
+        self.client.set_traits.assert_not_called()
+        # the known state is checked in Placement before skipping the
+        # writes.
+        self.client.get_inventories.assert_called_with(self.state.uuid,
+                                                       refresh=True)
+        self.client.get_traits.assert_called_with(self.state.uuid,
+                                                  refresh=True)
+
+    def test_stale_known_state(self):
+        in_sync = self.client.get_inventories.return_value
+        self.client.get_inventories.side_effect = [
+            in_sync, dict(in_sync, inventories={})]
+        self.client.update_inventory.return_value = {
+            'resource_provider_generation': 2}
+        self.assertEqual([self.state.uuid], self.reconciler.reconcile(
+            mock.sentinel.context, uuids.root, [self.driver_dep]))
+        self.client.update_inventory.assert_called_once_with(
+            self.state.uuid, self.state.inventories,
+            resource_provider_generation=1)
+
+    def test_traits_drift(self):
+        self.client.get_traits.return_value['traits'] = [
+            'CUSTOM_STALE', 'CUSTOM_FPGA_FUNCTION_ID_FOO']
+        self.assertEqual([self.state.uuid], self.reconciler.reconcile(
+            mock.sentinel.context, uuids.root, [self.driver_dep]))
+        self.client.update_inventory.assert_not_called()
+        self.client.set_traits.assert_called_once_with(
+            self.state.uuid,
+            self.state.traits | set(['CUSTOM_FPGA_FUNCTION_ID_FOO']), 1)
+
+    def test_inventory_drift(self):
+        self.client.get_inventories.return_value['inventories'] = {}
+        self.client.update_inventory.return_value = {
+            'resource_provider_generation': 2}
+        self.reconciler.reconcile(mock.sentinel.context, uuids.root,
+                                  [self.driver_dep])
+        self.client.update_inventory.assert_called_once_with(
+            self.state.uuid, self.state.inventories,
+            resource_provider_generation=1)
+        self.client.set_traits.assert_not_called()
+
+    def test_missing_provider(self):
+        self.client.get_inventories.side_effect = [
+            exception.PlacementResourceProviderNotFound(
+                resource_provider=self.state.uuid),
+            self.client.get_inventories.return_value,
+            self.client.get_inventories.return_value]
+        self.reconciler.reconcile(mock.sentinel.context, uuids.root,
+                                  [self.driver_dep])
+        self.client.ensure_resource_provider.assert_called_once_with(
+            mock.sentinel.context, self.state.uuid,
+            name=self.driver_dep.name, parent_provider_uuid=uuids.root)
@@ -15,12 +15,15 @@
 """Unit tests for the DB api."""
 
 import datetime
+from unittest import mock
 
 from oslo_utils import timeutils
 
 from cyborg.db import api as dbapi
 from cyborg.db.sqlalchemy import api as sqlalchemyapi
+from cyborg.db.sqlalchemy import models
 from cyborg.tests.unit.db import base
+from cyborg.tests.unit.db import utils
 
 
 def _quota_reserve(context, project_id):
@@ -149,3 +152,29 @@ class DBAPIReservationTestCase(base.DbTestCase):
             result[v.resource] = dict(in_use=v.in_use,
                                       reserved=v.reserved)
         self.assertEqual(expected, result)
+
+
+class DBAPIReplicaTestCase(base.DbTestCase):
+
+    @mock.patch.object(sqlalchemyapi.enginefacade, 'reader')
+    def test_replica_reads(self, mock_reader):
+        sqlalchemyapi._session_for_read(self.context)
+        mock_reader.using.assert_called_once_with(sqlalchemyapi._CONTEXT)
+        with dbapi.replica_reads(self.context):
+            sqlalchemyapi._session_for_read(self.context)
+            mock_reader.async_.using.assert_called_once_with(
+                sqlalchemyapi._CONTEXT)
+            with dbapi.primary_reads(self.context):
+                sqlalchemyapi._session_for_read(self.context)
+                self.assertEqual(2, mock_reader.using.call_count)
+            self.assertTrue(self.context.read_replica)
+        self.assertFalse(self.context.read_replica)
+
+    def test_replica_reads_in_write_transaction(self):
+        with dbapi.replica_reads(self.context):
+            with sqlalchemyapi._session_for_write():
+                device = utils.create_test_device(self.context)
+                query = sqlalchemyapi.model_query(self.context,
+                                                  models.Device)
+                self.assertEqual([device.uuid],
+                                 [ref.uuid for ref in query])
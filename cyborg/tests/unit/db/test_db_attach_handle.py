@@ -15,9 +15,12 @@
 
 """Tests for manipulating AttachHandle via the DB API"""
 
+from unittest import mock
+
 from oslo_utils import uuidutils
 
 from cyborg.common import exception
+from cyborg.db.sqlalchemy import api as sqlalchemy_api
 from cyborg.tests.unit.db import base
 from cyborg.tests.unit.db import utils
 
@@ -102,6 +105,68 @@ class TestDbAttachHandle(base.DbTestCase):
             self.context, deployable_id=1)
         self.assertTrue(allocate_ah['in_use'])
 
+    def test_allocate_many(self):
+        for i in range(1, 4):
+            utils.create_test_attach_handle(
+                self.context, id=i, uuid=uuidutils.generate_uuid(),
+                deployable_id=1, attach_info='attach_info%d' % i)
+        allocated = self.dbapi.attach_handle_allocate_many(
+            self.context, 1, 2)
+        self.assertEqual([1, 2], [ah['id'] for ah in allocated])
+        self.assertTrue(all(ah['in_use'] for ah in allocated))
+
+        self.assertRaises(exception.ResourceNotFound,
+                          self.dbapi.attach_handle_allocate_many,
+                          self.context, 1, 2)
+        self.assertFalse(
+            self.dbapi.attach_handle_get_by_id(self.context, 3)['in_use'])
+        allocated = self.dbapi.attach_handle_allocate(self.context, 1)
+        self.assertEqual(3, allocated['id'])
+
+    def _get_num_accel_in_use(self):
+        return self.dbapi.deployable_get_by_filters(
+            self.context, {'id': 1})[0]['num_accel_in_use']
+
+    def test_num_accel_in_use(self):
+        utils.create_test_deployable(self.context, id=1)
+        ahs = [utils.create_test_attach_handle(
+            self.context, id=i, uuid=uuidutils.generate_uuid(),
+            deployable_id=1, attach_info='attach_info%d' % i)
+            for i in range(1, 4)]
+        self.assertEqual(0, self._get_num_accel_in_use())
+
+        self.dbapi.attach_handle_allocate_many(self.context, 1, 2)
+        self.assertEqual(2, self._get_num_accel_in_use())
+        self.dbapi.attach_handle_update(self.context, ahs[0]['uuid'],
+                                        {'in_use': False})
+        self.assertEqual(1, self._get_num_accel_in_use())
+        self.dbapi.attach_handle_delete(self.context, ahs[1]['uuid'])
+        self.assertEqual(0, self._get_num_accel_in_use())
+        utils.create_test_attach_handle(
+            self.context, id=4, uuid=uuidutils.generate_uuid(),
+            deployable_id=1, attach_info='attach_info4', in_use=True)
+        self.assertEqual(1, self._get_num_accel_in_use())
+        self.dbapi.attach_handle_bulk_update(
+            self.context, 1, 1, update={'attach_info3': {'in_use': True}})
+        self.assertEqual(2, self._get_num_accel_in_use())
+
+    def test_supports_skip_locked(self):
+        def _supports(name, version, mariadb=False):
+            session = mock.Mock()
+            dialect = session.get_bind.return_value.dialect
+            dialect.name = name
+            dialect.server_version_info = version
+            dialect.is_mariadb = mariadb
+            return sqlalchemy_api._supports_skip_locked(session)
+
+        self.assertTrue(_supports('postgresql', (12, 4)))
+        self.assertFalse(_supports('postgresql', (9, 4)))
+        self.assertTrue(_supports('mysql', (8, 0, 21)))
+        self.assertFalse(_supports('mysql', (5, 7, 30)))
+        self.assertTrue(_supports('mysql', (10, 6, 4, 'MariaDB'), True))
+        self.assertFalse(_supports('mysql', (10, 3, 27, 'MariaDB'), True))
+        self.assertFalse(_supports('sqlite', (3, 31, 1)))
+
     def test_delete(self):
         created_ah = utils.create_test_attach_handle(self.context)
         return_value = self.dbapi.attach_handle_delete(
@@ -135,8 +200,23 @@ class TestDbAttachHandle(base.DbTestCase):
                           self.dbapi.attach_handle_delete,
                           self.context, random_uuid)
 
-    def test_do_allocate_attach_handle(self):
+    def test_allocate_without_free_handle(self):
         dep_id = 100
         self.assertRaises(exception.ResourceNotFound,
-                          self.dbapi._do_allocate_attach_handle,
+                          self.dbapi.attach_handle_allocate,
                           self.context, dep_id)
+
+    def test_bulk_update(self):
+        for i, attach_info in enumerate(['ah0', 'ah1'], 1):
+            utils.create_test_attach_handle(
+                self.context, id=i, uuid=uuidutils.generate_uuid(),
+                attach_info=attach_info)
+        self.dbapi.attach_handle_bulk_update(
+            self.context, 1, 1,
+            create=[{'attach_type': 'PCI', 'attach_info': 'ah2'}],
+            update={'ah1': {'attach_type': 'TEST_PCI'}}, delete=['ah0'])
+        ahs = self.dbapi.attach_handle_get_by_filters(
+            self.context, {'deployable_id': 1})
+        self.assertEqual([('ah1', 'TEST_PCI'), ('ah2', 'PCI')],
+                         sorted((ah['attach_info'], ah['attach_type'])
+                                for ah in ahs))
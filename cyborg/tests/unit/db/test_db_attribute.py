@@ -34,3 +34,20 @@ class TestDbAttributeTestCase(base.DbTestCase):
         self.assertRaises(exception.ResourceNotFound,
                           self.dbapi.attribute_delete,
                           self.context, random_uuid)
+
+    def test_bulk_update(self):
+        dep = self.dbapi.deployable_tree_create(
+            self.context, 1, 1, [{'name': 'dep0', 'num_accelerators': 1,
+                                  'attributes': [
+                                      {'key': 'rc', 'value': 'PGPU'},
+                                      {'key': 'trait0', 'value': 'OLD'}]}]
+        )[0]
+        self.dbapi.attribute_bulk_update(
+            self.context, dep['id'],
+            create=[{'key': 'trait1', 'value': 'NEW'}],
+            update={'rc': 'VGPU'}, delete=['trait0'])
+        attrs = self.dbapi.attribute_get_by_deployable_id(self.context,
+                                                          dep['id'])
+        self.assertEqual([('rc', 'VGPU'), ('trait1', 'NEW')],
+                         sorted((attr['key'], attr['value'])
+                                for attr in attrs))
@@ -0,0 +1,47 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for manipulating Conductor via the DB API"""
+
+import datetime
+
+from oslo_utils import timeutils
+
+from cyborg.tests.unit.db import base
+
+
+class TestDbConductor(base.DbTestCase):
+
+    def test_heartbeat(self):
+        self.dbapi.conductor_heartbeat(self.context, 'cond1')
+        self.dbapi.conductor_heartbeat(self.context, 'cond2')
+        # a second heartbeat refreshes the same row.
+        self.dbapi.conductor_heartbeat(self.context, 'cond1')
+        self.assertEqual(['cond1', 'cond2'],
+                         self.dbapi.conductor_get_alive_hostnames(
+                             self.context, 60))
+
+    def test_dead_conductor(self):
+        self.dbapi.conductor_heartbeat(self.context, 'cond1')
+        later = timeutils.utcnow() + datetime.timedelta(seconds=120)
+        timeutils.set_time_override(later)
+        self.addCleanup(timeutils.clear_time_override)
+        self.dbapi.conductor_heartbeat(self.context, 'cond2')
+        self.assertEqual(['cond2'],
+                         self.dbapi.conductor_get_alive_hostnames(
+                             self.context, 60))
+
+    def test_unregister(self):
+        self.dbapi.conductor_heartbeat(self.context, 'cond1')
+        self.dbapi.conductor_unregister(self.context, 'cond1')
+        self.assertEqual([], self.dbapi.conductor_get_alive_hostnames(
+            self.context, 60))
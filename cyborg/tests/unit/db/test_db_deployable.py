@@ -115,3 +115,25 @@ class TestDbDeployable(base.DbTestCase):
         self.assertRaises(exception.ResourceNotFound,
                           self.dbapi.deployable_delete,
                           self.context, random_uuid)
+
+    def test_tree_create_and_delete(self):
+        deployables = utils.get_test_device_tree()['deployables']
+        created_deps = self.dbapi.deployable_tree_create(
+            self.context, 1, 1, deployables)
+        self.assertEqual(['dep0', 'dep1'],
+                         [dep['name'] for dep in created_deps])
+        self.dbapi.deployable_tree_delete(self.context, created_deps[0]['id'])
+        deps = self.dbapi.deployable_get_by_filters(
+            self.context, {'device_id': 1})
+        self.assertEqual(['dep1'], [dep['name'] for dep in deps])
+        attrs = self.dbapi.attribute_get_by_filter(
+            self.context, {'deployable_id': created_deps[0]['id']})
+        self.assertEqual([], attrs)
+        ahs = self.dbapi.attach_handle_get_by_filters(
+            self.context, {'deployable_id': [dep['id'] for dep in deps]})
+        self.assertEqual(['dep1'], [ah['attach_info'] for ah in ahs])
+
+    def test_tree_delete_not_exist(self):
+        self.assertRaises(exception.ResourceNotFound,
+                          self.dbapi.deployable_tree_delete,
+                          self.context, 1)
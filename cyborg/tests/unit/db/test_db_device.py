@@ -62,6 +62,16 @@ class TestDbDevice(base.DbTestCase):
         dev_uuids = [item.uuid for item in devs]
         self.assertEqual(sorted(uuids), sorted(dev_uuids))
 
+    def test_get_hostnames(self):
+        for i, hostname in enumerate(['host2', 'host1', 'host2'], 1):
+            utils.create_test_device(
+                self.context,
+                id=i,
+                uuid=uuidutils.generate_uuid(),
+                hostname=hostname)
+        self.assertEqual(['host1', 'host2'],
+                         self.dbapi.device_get_hostnames(self.context))
+
     def test_list_by_filters(self):
         dev1 = utils.create_test_device(
             self.context,
@@ -116,3 +126,58 @@ class TestDbDevice(base.DbTestCase):
         self.assertRaises(exception.ResourceNotFound,
                           self.dbapi.device_delete,
                           self.context, random_uuid)
+
+    def _get_tree_rows(self, device_id):
+        deps = self.dbapi.deployable_get_by_filters(
+            self.context, {'device_id': device_id})
+        dep_ids = [dep['id'] for dep in deps]
+        attrs = self.dbapi.attribute_get_by_filter(
+            self.context, {'deployable_id': dep_ids})
+        ahs = self.dbapi.attach_handle_get_by_filters(
+            self.context, {'deployable_id': dep_ids})
+        cpids = self.dbapi.control_path_get_by_filters(
+            self.context, {'device_id': device_id})
+        return deps, attrs, ahs, cpids
+
+    def test_tree_create(self):
+        created_dev = self.dbapi.device_tree_create(
+            self.context, utils.get_test_device_tree())
+        queried_dev = self.dbapi.device_get(self.context,
+                                            created_dev['uuid'])
+        deps, attrs, ahs, cpids = self._get_tree_rows(queried_dev['id'])
+        self.assertEqual(['dep0', 'dep1'],
+                         sorted(dep['name'] for dep in deps))
+        self.assertEqual(4, len(attrs))
+        self.assertEqual(1, len(cpids))
+        dep_names = {dep['id']: dep['name'] for dep in deps}
+        self.assertEqual(
+            {'CUSTOM_dep0': 'dep0', 'CUSTOM_dep1': 'dep1'},
+            {attr['value']: dep_names[attr['deployable_id']]
+             for attr in attrs if attr['key'] == 'trait0'})
+        self.assertEqual(
+            {'dep0': 'dep0', 'dep1': 'dep1'},
+            {ah['attach_info']: dep_names[ah['deployable_id']]
+             for ah in ahs})
+        self.assertEqual([cpids[0]['id']] * 2, [ah['cpid_id'] for ah in ahs])
+
+    def test_tree_delete(self):
+        created_dev = self.dbapi.device_tree_create(
+            self.context, utils.get_test_device_tree())
+        other_dev = self.dbapi.device_tree_create(
+            self.context, utils.get_test_device_tree(
+                uuid=uuidutils.generate_uuid(), cpid_info='other',
+                deployable_names=['other']))
+        self.dbapi.device_tree_delete(self.context, created_dev['id'])
+        self.assertRaises(exception.ResourceNotFound,
+                          self.dbapi.device_get,
+                          self.context, created_dev['uuid'])
+        for rows in self._get_tree_rows(created_dev['id']):
+            self.assertEqual([], rows)
+        deps, attrs, ahs, cpids = self._get_tree_rows(other_dev['id'])
+        self.assertEqual((1, 2, 1, 1),
+                         (len(deps), len(attrs), len(ahs), len(cpids)))
+
+    def test_tree_delete_not_exist(self):
+        self.assertRaises(exception.ResourceNotFound,
+                          self.dbapi.device_tree_delete,
+                          self.context, sys.maxsize)
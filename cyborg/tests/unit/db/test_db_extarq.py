@@ -30,6 +30,35 @@ class TestDbExtArq(base.DbTestCase):
         created_extarq = utils.create_test_extarq(self.context, **kw)
         self.assertEqual(random_uuid, created_extarq['uuid'])
 
+    def test_create_many(self):
+        devprof = utils.create_test_device_profile(self.context)
+        values_list = [
+            {'state': 'Initial', 'device_profile_name': devprof['name'],
+             'device_profile_group_id': i} for i in range(3)]
+        values_list[1]['uuid'] = uuidutils.generate_uuid()
+        extarqs = self.dbapi.extarq_create_many(self.context, values_list)
+        self.assertEqual([0, 1, 2], [extarq['device_profile_group_id']
+                                     for extarq in extarqs])
+        self.assertEqual(values_list[1]['uuid'], extarqs[1]['uuid'])
+        for extarq in extarqs:
+            self.assertEqual(devprof['id'], extarq['device_profile_id'])
+            self.assertIsNotNone(extarq['id'])
+            self.assertIsNotNone(extarq['created_at'])
+        self.assertEqual(
+            sorted(extarq['uuid'] for extarq in extarqs),
+            sorted(extarq['uuid'] for extarq in
+                   self.dbapi.extarq_list(self.context)))
+
+    def test_create_many_with_wrong_device_profile(self):
+        self.assertRaises(
+            exception.ResourceNotFound, self.dbapi.extarq_create_many,
+            self.context, [{'state': 'Initial',
+                            'device_profile_name': 'wrong_name'}])
+        self.assertRaises(
+            exception.DeviceProfileNameNeeded, self.dbapi.extarq_create_many,
+            self.context, [{'state': 'Initial'}])
+        self.assertEqual([], self.dbapi.extarq_list(self.context))
+
     def test_get_by_uuid(self):
         created_extarq = utils.create_test_extarq(self.context)
         queried_extarq = self.dbapi.extarq_get(
@@ -54,6 +83,103 @@ class TestDbExtArq(base.DbTestCase):
         extarq_uuids = [item.uuid for item in extarqs]
         self.assertEqual(sorted(uuids), sorted(extarq_uuids))
 
+    def test_list_by_filters(self):
+        instance_uuid = uuidutils.generate_uuid()
+        extarqs = []
+        for i in range(1, 4):
+            extarqs.append(utils.create_test_extarq(
+                self.context, id=i, uuid=uuidutils.generate_uuid()))
+        for extarq in extarqs[:2]:
+            self.dbapi.extarq_update(self.context, extarq['uuid'],
+                                     {'instance_uuid': instance_uuid})
+        self.dbapi.extarq_update(self.context, extarqs[0]['uuid'],
+                                 {'state': 'Initial'})
+
+        result = self.dbapi.extarq_list_by_filters(
+            self.context, {'instance_uuid': instance_uuid})
+        self.assertEqual(sorted(extarq['uuid'] for extarq in extarqs[:2]),
+                         sorted(extarq['uuid'] for extarq in result))
+        result = self.dbapi.extarq_list_by_filters(
+            self.context, {'instance_uuid': instance_uuid,
+                           'state': ['Bound', 'BindFailed']})
+        self.assertEqual([extarqs[1]['uuid']],
+                         [extarq['uuid'] for extarq in result])
+        self.assertEqual([], self.dbapi.extarq_list_by_filters(
+            self.context, {'state': []}))
+
+    def test_list_by_filters_paginated(self):
+        extarqs = [utils.create_test_extarq(
+            self.context, id=i, uuid=uuidutils.generate_uuid())
+            for i in range(1, 6)]
+        uuids = [extarq['uuid'] for extarq in extarqs]
+
+        result = self.dbapi.extarq_list_by_filters(
+            self.context, {}, sort_key='id', sort_dir='asc', limit=2)
+        self.assertEqual(uuids[:2], [extarq['uuid'] for extarq in result])
+        result = self.dbapi.extarq_list_by_filters(
+            self.context, {}, sort_key='id', sort_dir='asc', limit=2,
+            marker=result[-1])
+        self.assertEqual(uuids[2:4], [extarq['uuid'] for extarq in result])
+        result = self.dbapi.extarq_list_by_filters(
+            self.context, {}, sort_key='id', sort_dir='desc', limit=2,
+            marker=result[0])
+        self.assertEqual(uuids[1::-1], [extarq['uuid'] for extarq in result])
+
+    def _create_bound_extarqs(self, instance_uuid, count):
+        extarqs = []
+        for i in range(count):
+            ah = utils.create_test_attach_handle(
+                self.context, id=i + 1, uuid=uuidutils.generate_uuid(),
+                in_use=True)
+            extarq = utils.create_test_extarq(
+                self.context, id=i + 1, uuid=uuidutils.generate_uuid())
+            extarqs.append(self.dbapi.extarq_update(
+                self.context, extarq['uuid'],
+                {'instance_uuid': instance_uuid,
+                 'attach_handle_id': ah['id']}))
+        return extarqs
+
+    def _get_in_use(self, extarqs):
+        return [self.dbapi.attach_handle_get_by_id(
+            self.context, extarq['attach_handle_id'])['in_use']
+            for extarq in extarqs]
+
+    def test_delete_many_by_instance(self):
+        instance_uuid = uuidutils.generate_uuid()
+        extarqs = self._create_bound_extarqs(instance_uuid, 3)
+        self.dbapi.extarq_update(self.context, extarqs[2]['uuid'],
+                                 {'instance_uuid': None})
+
+        self.assertEqual(2, self.dbapi.extarq_delete_many(
+            self.context, instance_uuid=instance_uuid))
+        self.assertEqual([False, False, True], self._get_in_use(extarqs))
+        self.assertEqual([extarqs[2]['uuid']],
+                         [extarq['uuid'] for extarq in
+                          self.dbapi.extarq_list(self.context)])
+        self.assertEqual(0, self.dbapi.extarq_delete_many(
+            self.context, instance_uuid=instance_uuid))
+
+    def test_delete_many_by_uuid(self):
+        utils.create_test_deployable(self.context, id=1)
+        extarqs = self._create_bound_extarqs(None, 3)
+        self.assertEqual(3, self.dbapi.deployable_get_by_filters(
+            self.context, {'id': 1})[0]['num_accel_in_use'])
+        uuids = [extarq['uuid'] for extarq in extarqs]
+
+        self.assertRaises(exception.ResourceNotFound,
+                          self.dbapi.extarq_delete_many, self.context,
+                          uuids=uuids[:2] + [uuidutils.generate_uuid()])
+        self.assertEqual([True, True, True], self._get_in_use(extarqs))
+        self.assertEqual(3, len(self.dbapi.extarq_list(self.context)))
+
+        self.assertEqual(2, self.dbapi.extarq_delete_many(
+            self.context, uuids=uuids[:2]))
+        self.assertEqual([False, False, True], self._get_in_use(extarqs))
+        self.assertEqual(1, self.dbapi.deployable_get_by_filters(
+            self.context, {'id': 1})[0]['num_accel_in_use'])
+        self.assertEqual(uuids[2:], [extarq['uuid'] for extarq in
+                                     self.dbapi.extarq_list(self.context)])
+
     def test_delete(self):
         created_extarq = utils.create_test_extarq(self.context)
         return_value = self.dbapi.extarq_delete(
@@ -0,0 +1,117 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests that the hot queries of the DB API use an index.
+
+Each DB API call is run against seeded data, and every SELECT, UPDATE and
+DELETE statement it sends is checked with SQLite's EXPLAIN QUERY PLAN for
+a full table scan.
+"""
+
+import re
+
+from oslo_db.sqlalchemy import enginefacade
+from oslo_utils import uuidutils
+from sqlalchemy import event
+
+from cyborg.tests.unit.db import base
+from cyborg.tests.unit.db import utils
+
+# A full scan of a table, or of one of its indexes, in the plan of a
+# statement. SQLite before 3.36 says 'SCAN TABLE <table>'.
+_SCAN_RE = re.compile(r'^SCAN (TABLE )?(?!CONSTANT ROW)\w+')
+
+
+class TestDbQueryPlan(base.DbTestCase):
+
+    def setUp(self):
+        super(TestDbQueryPlan, self).setUp()
+        self.devices = []
+        for i in range(3):
+            values = utils.get_test_device_tree(
+                uuid=uuidutils.generate_uuid(), hostname='host%d' % i,
+                cpid_info='cpid%d' % i,
+                deployable_names=['host%d_dep%d' % (i, j) for j in range(2)])
+            for dep_values in values['deployables']:
+                dep_values['rp_uuid'] = uuidutils.generate_uuid()
+            self.devices.append(
+                self.dbapi.device_tree_create(self.context, values))
+        self.deployables = self.dbapi.deployable_get_by_filters(
+            self.context, {'device_id': self.devices[0]['id']})
+        for i, state in enumerate(['Initial', 'Bound', 'BindFailed'], 1):
+            utils.create_test_extarq(
+                self.context, id=i, uuid=uuidutils.generate_uuid(),
+                state=state)
+
+    def _get_table_scans(self, func, *args):
+        """Call a DB API function and get the table scans of its
+        statements.
+
+        :returns: a list of (statement, plan detail) of the scans.
+        """
+        scans = []
+
+        def _explain(conn, cursor, statement, parameters, context,
+                     executemany):
+            if executemany or not re.match(r'\s*(SELECT|UPDATE|DELETE)\b',
+                                           statement):
+                return
+            plan_cursor = conn.connection.cursor()
+            try:
+                plan_cursor.execute('EXPLAIN QUERY PLAN ' + statement,
+                                    parameters)
+                for row in plan_cursor.fetchall():
+                    if _SCAN_RE.match(row[-1]):
+                        scans.append((statement, row[-1]))
+            finally:
+                plan_cursor.close()
+
+        engine = enginefacade.get_legacy_facade().get_engine()
+        event.listen(engine, 'before_cursor_execute', _explain)
+        try:
+            func(self.context, *args)
+        finally:
+            event.remove(engine, 'before_cursor_execute', _explain)
+        return scans
+
+    def test_device_list_by_hostname(self):
+        self.assertEqual([], self._get_table_scans(
+            self.dbapi.device_list_by_filters, {'hostname': 'host1'}))
+
+    def test_control_path_get_by_device_id_cpid_info(self):
+        self.assertEqual([], self._get_table_scans(
+            self.dbapi.control_path_get_by_filters,
+            {'device_id': self.devices[1]['id'], 'cpid_info': 'cpid1'}))
+
+    def test_deployable_get_by_name_device_id(self):
+        self.assertEqual([], self._get_table_scans(
+            self.dbapi.deployable_get_by_filters,
+            {'name': 'host0_dep1', 'device_id': self.devices[0]['id']}))
+
+    def test_deployable_get_by_rp_uuid(self):
+        self.assertEqual([], self._get_table_scans(
+            self.dbapi.deployable_get_by_rp_uuid,
+            self.deployables[0]['rp_uuid']))
+
+    def test_attribute_get_by_deployable_id_key(self):
+        self.assertEqual([], self._get_table_scans(
+            self.dbapi.attribute_get_by_filter,
+            {'deployable_id': self.deployables[0]['id'], 'key': 'rc'}))
+
+    def test_attach_handle_allocate(self):
+        self.assertEqual([], self._get_table_scans(
+            self.dbapi.attach_handle_allocate, self.deployables[0]['id']))
+
+    def test_extarq_list_by_state(self):
+        self.assertEqual([], self._get_table_scans(
+            self.dbapi.extarq_list_by_filters,
+            {'state': ['Bound', 'BindFailed']}))
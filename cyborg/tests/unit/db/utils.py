@@ -80,6 +80,24 @@ def create_test_device(context, **kwargs):
     return dbapi.device_create(context, device)
 
 
+def get_test_device_tree(**kw):
+    """Return device values with a controlpath_id and two deployables,
+    in the format of device_tree_create.
+    """
+    device = get_test_device(**kw)
+    device.pop('id')
+    device['controlpath_id'] = {'cpid_type': 'PCI',
+                                'cpid_info': kw.get('cpid_info', 'cpid')}
+    device['deployables'] = [
+        {'name': name, 'num_accelerators': 1, 'driver_name': 'NVIDIA',
+         'attributes': [{'key': 'rc', 'value': 'PGPU'},
+                        {'key': 'trait0', 'value': 'CUSTOM_' + name}],
+         'attach_handles': [{'attach_type': 'PCI', 'attach_info': name,
+                             'in_use': False}]}
+        for name in kw.get('deployable_names', ['dep0', 'dep1'])]
+    return device
+
+
 def get_test_extarq(**kwargs):
     return {
         'uuid': kwargs.get('uuid', '10efe63d-dfea-4a37-ad94-4116fba50986'),
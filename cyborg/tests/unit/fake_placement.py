@@ -0,0 +1,264 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""An in-process fake of the Placement API used by Cyborg.
+
+FakePlacement stands in for the adapter returned by
+cyborg.common.utils.get_sdk_adapter('placement'). It implements the
+resource provider, inventory, trait and resource class endpoints the
+PlacementClient calls, with the generation checks of Placement, and can
+wait a configurable latency on each call.
+"""
+
+import collections
+import json
+import re
+import threading
+import time
+
+import fixtures
+import os_resource_classes as orc
+from oslo_utils import uuidutils
+from six.moves.urllib import parse
+
+from cyborg.common import metrics
+from cyborg.common import placement_client
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self._body = body
+        self.text = json.dumps(body) if body is not None else ''
+        self.headers = {'openstack-request-id': 'req-' +
+                        uuidutils.generate_uuid()}
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def __bool__(self):
+        return self.ok
+
+    def json(self):
+        return self._body
+
+
+class FakePlacement(object):
+    """A fake Placement service, with the interface of an sdk adapter.
+
+    :param latency: the number of seconds each call waits.
+    """
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.providers = {}
+        self.traits = set()
+        self.resource_classes = set()
+        # The number of calls per (method, endpoint).
+        self.calls = collections.Counter()
+        self._lock = threading.Lock()
+        self._routes = [
+            ('GET', r'resource_providers', self._list_providers),
+            ('POST', r'resource_providers', self._create_provider),
+            ('GET', r'resource_providers/([^/]+)', self._get_provider),
+            ('DELETE', r'resource_providers/([^/]+)',
+             self._delete_provider),
+            ('GET', r'resource_providers/([^/]+)/inventories',
+             self._get_inventories),
+            ('PUT', r'resource_providers/([^/]+)/inventories',
+             self._put_inventories),
+            ('GET', r'resource_providers/([^/]+)/traits', self._get_traits),
+            ('PUT', r'resource_providers/([^/]+)/traits', self._put_traits),
+            ('PUT', r'traits/([^/]+)', self._put_trait),
+            ('PUT', r'resource_classes/([^/]+)', self._put_resource_class),
+        ]
+
+    @property
+    def call_count(self):
+        return sum(self.calls.values())
+
+    def add_compute_node(self, hostname):
+        """Create the root provider of a host, as Nova does.
+
+        :returns: the uuid of the provider.
+        """
+        rp_uuid = uuidutils.generate_uuid()
+        with self._lock:
+            self._add_provider(rp_uuid, hostname, None)
+        return rp_uuid
+
+    def request(self, url, method, json=None, microversion=None,
+                global_request_id=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        url = parse.urlsplit(url.lstrip('/'))
+        query = dict(parse.parse_qsl(url.query))
+        with self._lock:
+            self.calls[(method, metrics.get_endpoint('/' + url.path))] += 1
+            for route_method, pattern, handler in self._routes:
+                match = re.match(pattern + '$', url.path)
+                if route_method == method and match:
+                    return handler(*match.groups(), query=query, body=json)
+        return FakeResponse(404)
+
+    def get(self, url, **kwargs):
+        return self.request(url, 'GET', **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request(url, 'POST', **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request(url, 'PUT', **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request(url, 'DELETE', **kwargs)
+
+    def _add_provider(self, rp_uuid, name, parent_uuid):
+        root_uuid = rp_uuid
+        if parent_uuid is not None:
+            root_uuid = self.providers[parent_uuid]['root_provider_uuid']
+        self.providers[rp_uuid] = {
+            'uuid': rp_uuid,
+            'name': name,
+            'generation': 0,
+            'parent_provider_uuid': parent_uuid,
+            'root_provider_uuid': root_uuid,
+            'inventories': {},
+            'traits': set(),
+        }
+        return self._provider_repr(rp_uuid)
+
+    def _provider_repr(self, rp_uuid):
+        provider = self.providers[rp_uuid]
+        return dict((key, provider[key]) for key in (
+            'uuid', 'name', 'generation', 'parent_provider_uuid',
+            'root_provider_uuid'))
+
+    def _generation_conflict(self, provider, body):
+        return body.get('resource_provider_generation') != \
+            provider['generation']
+
+    def _list_providers(self, query, body):
+        rps = list(self.providers.values())
+        if 'name' in query:
+            rps = [rp for rp in rps if rp['name'] == query['name']]
+        if 'in_tree' in query:
+            tree = self.providers.get(query['in_tree'])
+            root_uuid = tree['root_provider_uuid'] if tree else None
+            rps = [rp for rp in rps if rp['root_provider_uuid'] == root_uuid]
+        return FakeResponse(200, {'resource_providers': [
+            self._provider_repr(rp['uuid']) for rp in rps]})
+
+    def _create_provider(self, query, body):
+        rp_uuid = body.get('uuid') or uuidutils.generate_uuid()
+        if rp_uuid in self.providers or any(
+                rp['name'] == body['name']
+                for rp in self.providers.values()):
+            return FakeResponse(409)
+        parent_uuid = body.get('parent_provider_uuid')
+        if parent_uuid is not None and parent_uuid not in self.providers:
+            return FakeResponse(400)
+        return FakeResponse(
+            200, self._add_provider(rp_uuid, body['name'], parent_uuid))
+
+    def _get_provider(self, rp_uuid, query, body):
+        if rp_uuid not in self.providers:
+            return FakeResponse(404)
+        return FakeResponse(200, self._provider_repr(rp_uuid))
+
+    def _delete_provider(self, rp_uuid, query, body):
+        if rp_uuid not in self.providers:
+            return FakeResponse(404)
+        if any(rp['parent_provider_uuid'] == rp_uuid
+               for rp in self.providers.values()):
+            return FakeResponse(409)
+        del self.providers[rp_uuid]
+        return FakeResponse(204)
+
+    def _get_inventories(self, rp_uuid, query, body):
+        provider = self.providers.get(rp_uuid)
+        if provider is None:
+            return FakeResponse(404)
+        return FakeResponse(200, {
+            'inventories': provider['inventories'],
+            'resource_provider_generation': provider['generation']})
+
+    def _put_inventories(self, rp_uuid, query, body):
+        provider = self.providers.get(rp_uuid)
+        if provider is None:
+            return FakeResponse(404)
+        if self._generation_conflict(provider, body):
+            return FakeResponse(409)
+        for rc in body['inventories']:
+            if rc not in orc.STANDARDS and rc not in self.resource_classes:
+                return FakeResponse(400)
+        provider['inventories'] = dict(body['inventories'])
+        provider['generation'] += 1
+        return self._get_inventories(rp_uuid, query, None)
+
+    def _get_traits(self, rp_uuid, query, body):
+        provider = self.providers.get(rp_uuid)
+        if provider is None:
+            return FakeResponse(404)
+        return FakeResponse(200, {
+            'traits': sorted(provider['traits']),
+            'resource_provider_generation': provider['generation']})
+
+    def _put_traits(self, rp_uuid, query, body):
+        provider = self.providers.get(rp_uuid)
+        if provider is None:
+            return FakeResponse(404)
+        if self._generation_conflict(provider, body):
+            return FakeResponse(409)
+        for trait in body['traits']:
+            if trait.startswith('CUSTOM_') and trait not in self.traits:
+                return FakeResponse(400)
+        provider['traits'] = set(body['traits'])
+        provider['generation'] += 1
+        return self._get_traits(rp_uuid, query, None)
+
+    def _put_trait(self, name, query, body):
+        if name in self.traits:
+            return FakeResponse(204)
+        self.traits.add(name)
+        return FakeResponse(201)
+
+    def _put_resource_class(self, name, query, body):
+        if name in self.resource_classes:
+            return FakeResponse(204)
+        self.resource_classes.add(name)
+        return FakeResponse(201)
+
+
+class PlacementFixture(fixtures.Fixture):
+    """Make the PlacementClients use a FakePlacement.
+
+    The provider tree and known traits shared by the clients are reset.
+    """
+
+    def __init__(self, latency=0):
+        super(PlacementFixture, self).__init__()
+        self.latency = latency
+
+    def _setUp(self):
+        self.placement = metrics.instrument(
+            FakePlacement(latency=self.latency), 'placement')
+        self.useFixture(fixtures.MockPatch(
+            'cyborg.common.utils.get_sdk_adapter',
+            return_value=self.placement))
+        self.useFixture(fixtures.MockPatchObject(
+            placement_client, '_PROVIDER_TREE',
+            placement_client.ProviderTree()))
+        self.useFixture(fixtures.MockPatchObject(
+            placement_client, '_KNOWN_TRAITS', set()))
@@ -110,6 +110,18 @@ class TestAttachHandleObject(base.DbTestCase):
                 mock.ANY,
                 self.fake_attach_handle)
 
+    def test_attach_handle_allocate_many(self):
+        deployable_id = self.fake_attach_handle['deployable_id']
+        with mock.patch.object(self.dbapi, 'attach_handle_allocate_many',
+                               autospec=True) as mock_ah_allocate:
+            mock_ah_allocate.return_value = [self.fake_attach_handle]
+            obj_ahs = objects.AttachHandle.allocate_many(
+                self.context, deployable_id, 1)
+            mock_ah_allocate.assert_called_once_with(
+                self.context, deployable_id, 1)
+            self.assertEqual([self.fake_attach_handle['uuid']],
+                             [obj_ah.uuid for obj_ah in obj_ahs])
+
     def test_attach_handle_deallocate(self):
         attach_handle_uuid = self.fake_attach_handle['uuid']
         with mock.patch.object(self.dbapi, 'attach_handle_update',
@@ -124,6 +124,14 @@ class TestDeployableObject(DbTestCase):
                           objects.Deployable.get, self.context,
                           dpl.uuid)
 
+    def test_has_free_accelerators(self):
+        dpl = fake_deployable.fake_deployable_obj(self.context,
+                                                  num_accelerators=2)
+        self.assertEqual(0, dpl.num_accel_in_use)
+        self.assertTrue(dpl.has_free_accelerators())
+        dpl.num_accel_in_use = 2
+        self.assertFalse(dpl.has_free_accelerators())
+
 
 class TestDeployableObject(test_objects._LocalTest,
                            TestDeployableObject):
@@ -73,6 +73,14 @@ class TestDeviceObject(base.DbTestCase):
             self.assertIsInstance(devices[0], objects.Device)
             self.assertEqual(self.context, devices[0]._context)
 
+    def test_get_hostnames(self):
+        with mock.patch.object(self.dbapi, 'device_get_hostnames',
+                               autospec=True) as mock_get_hostnames:
+            mock_get_hostnames.return_value = ['host1', 'host2']
+            hostnames = objects.Device.get_hostnames(self.context)
+            mock_get_hostnames.assert_called_once_with(self.context)
+            self.assertEqual(['host1', 'host2'], hostnames)
+
     def test_list_with_filter(self):
         with mock.patch.object(self.dbapi, 'device_list_by_filters',
                                autospec=True) as mock_device_with_filter_list:
@@ -14,6 +14,8 @@
 
 from unittest import mock
 
+from oslo_utils import uuidutils
+
 from cyborg import objects
 from cyborg.tests.unit.db import base
 from cyborg.tests.unit.db import utils
@@ -62,6 +64,30 @@ class TestDeviceProfileObject(base.DbTestCase):
             self.assertEqual(self.fake_device_profile['description'],
                              obj_devprofs[0].description)
 
+    def test_list_by_filters(self):
+        db_devprofs = [
+            utils.create_test_device_profile(
+                self.context, id=i, uuid=uuidutils.generate_uuid(),
+                name='name%d' % i)
+            for i in range(1, 5)]
+        obj_devprofs = objects.DeviceProfile.list_by_filters(
+            self.context, {}, limit=2)
+        self.assertEqual(['name1', 'name2'],
+                         [obj_devprof.name for obj_devprof in obj_devprofs])
+        obj_devprofs = objects.DeviceProfile.list_by_filters(
+            self.context, {}, limit=2, marker=obj_devprofs[-1].uuid)
+        self.assertEqual(['name3', 'name4'],
+                         [obj_devprof.name for obj_devprof in obj_devprofs])
+        obj_devprofs = objects.DeviceProfile.list_by_filters(
+            self.context, {'name': ['name1', 'name4']}, sort_key='name',
+            sort_dir='desc')
+        self.assertEqual(['name4', 'name1'],
+                         [obj_devprof.name for obj_devprof in obj_devprofs])
+        self.assertEqual(
+            db_devprofs[0]['uuid'],
+            objects.DeviceProfile.list_by_filters(
+                self.context, {'uuid': db_devprofs[0]['uuid']})[0].uuid)
+
     def test_create(self):
         api_devprofs = fake_device_profile.get_api_devprofs()
         api_devprof = api_devprofs[0]
@@ -0,0 +1,60 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import fixtures
+
+from cyborg.db import api as dbapi
+from cyborg.objects.driver_objects.driver_device import DriverDevice
+from cyborg.tests.unit.db.base import DbTestCase
+from cyborg.tests.unit import fake_driver_device
+
+
+class TestDriverDeviceObject(DbTestCase):
+
+    def setUp(self):
+        super(TestDriverDeviceObject, self).setUp()
+        self.fake_driver_devices = (fake_driver_device.
+                                    get_fake_driver_devices_objs())
+        for driver_dev_obj in self.fake_driver_devices:
+            driver_dev_obj.create(self.context, 'fake-host')
+
+    def test_list(self):
+        driver_dev_obj_list = DriverDevice.list(self.context, 'fake-host')
+        self.assertEqual(2, len(driver_dev_obj_list))
+        self.assertEqual(_summary(self.fake_driver_devices),
+                         _summary(driver_dev_obj_list))
+        self.assertEqual([], DriverDevice.list(self.context, 'other-host'))
+
+    def test_list_uses_one_query_per_table(self):
+        db = dbapi.get_instance()
+        methods = ['device_list_by_filters', 'control_path_get_by_filters',
+                   'deployable_get_by_filters', 'attribute_get_by_filter',
+                   'attach_handle_get_by_filters']
+        mocks = {}
+        for method in methods:
+            mocks[method] = self.useFixture(fixtures.MockPatchObject(
+                db, method, wraps=getattr(db, method))).mock
+        DriverDevice.list(self.context, 'fake-host')
+        for method in methods:
+            self.assertEqual(1, mocks[method].call_count, method)
+
+
+def _summary(driver_dev_obj_list):
+    return sorted(
+        (dev.controlpath_id.cpid_info, dev.vendor,
+         sorted((dep.name, dep.num_accelerators,
+                 sorted((attr.key, attr.value)
+                        for attr in dep.attribute_list),
+                 sorted((ah.attach_type, ah.attach_info)
+                        for ah in dep.attach_handle_list))
+                for dep in dev.deployable_list))
+        for dev in driver_dev_obj_list)
@@ -62,6 +62,58 @@ class TestExtARQObject(base.DbTestCase):
             for obj_extarq in obj_extarqs:
                 self.assertEqual(obj_extarqs[0].arq.uuid, db_extarq['uuid'])
 
+    @mock.patch('cyborg.objects.ExtARQ._from_db_object')
+    def test_list_by_filters(self, mock_from_db_obj):
+        db_extarq = self.fake_db_extarqs[0]
+        mock_from_db_obj.return_value = self.fake_obj_extarqs[0]
+        filters = {'instance_uuid': db_extarq['instance_uuid']}
+        with mock.patch.object(self.dbapi, 'extarq_list_by_filters',
+                               autospec=True) as mock_get_list:
+            mock_get_list.return_value = [db_extarq]
+            obj_extarqs = objects.ExtARQ.list_by_filters(self.context,
+                                                         filters)
+            mock_get_list.assert_called_once_with(
+                self.context, filters, sort_key='id', sort_dir='asc',
+                limit=None, marker=None)
+            self.assertThat(obj_extarqs, HasLength(1))
+
+    @mock.patch('cyborg.objects.ExtARQ._from_db_object_list')
+    def test_list_by_filters_with_marker(self, mock_from_db_obj_list):
+        db_extarqs = self.fake_db_extarqs[:2]
+        with mock.patch.object(self.dbapi, 'extarq_get',
+                               autospec=True) as mock_extarq_get, \
+            mock.patch.object(self.dbapi, 'extarq_list_by_filters',
+                              autospec=True) as mock_get_list:
+            mock_extarq_get.return_value = db_extarqs[0]
+            mock_get_list.return_value = db_extarqs[1:]
+            objects.ExtARQ.list_by_filters(
+                self.context, {}, sort_key='created_at', sort_dir='desc',
+                limit=1, marker=db_extarqs[0]['uuid'])
+            mock_extarq_get.assert_called_once_with(
+                self.context, db_extarqs[0]['uuid'])
+            mock_get_list.assert_called_once_with(
+                self.context, {}, sort_key='created_at', sort_dir='desc',
+                limit=1, marker=db_extarqs[0])
+            mock_from_db_obj_list.assert_called_once_with(
+                db_extarqs[1:], self.context)
+
+    def test_delete_by_instance(self):
+        instance_uuid = self.fake_obj_extarqs[0].arq.instance_uuid
+        with mock.patch.object(self.dbapi, 'extarq_delete_many',
+                               autospec=True) as mock_delete_many:
+            mock_delete_many.return_value = 2
+            objects.ExtARQ.delete_by_instance(self.context, instance_uuid)
+            mock_delete_many.assert_called_once_with(
+                self.context, instance_uuid=instance_uuid)
+
+    def test_delete_by_uuid(self):
+        uuids = [extarq.arq.uuid for extarq in self.fake_obj_extarqs]
+        with mock.patch.object(self.dbapi, 'extarq_delete_many',
+                               autospec=True) as mock_delete_many:
+            objects.ExtARQ.delete_by_uuid(self.context, uuids)
+            mock_delete_many.assert_called_once_with(self.context,
+                                                     uuids=uuids)
+
     @mock.patch('cyborg.objects.ExtARQ._from_db_object')
     def test_create(self, mock_from_db_obj):
         db_extarq = self.fake_db_extarqs[0]
@@ -74,6 +126,42 @@ class TestExtARQObject(base.DbTestCase):
             extarq.create(self.context)
             mock_extarq_create.assert_called_once()
 
+    @mock.patch('cyborg.objects.DeviceProfile.get_by_id')
+    def test_create_many(self, mock_get_devprof):
+        obj_devprof = fake_device_profile.get_obj_devprofs()[0]
+        db_extarqs = self.fake_db_extarqs[:2]
+        extarqs = []
+        for i, db_extarq in enumerate(db_extarqs):
+            db_extarq.update({
+                'state': constants.ARQ_INITIAL, 'substate': 'Initial',
+                'created_at': None, 'updated_at': None,
+                'attach_handle_id': None, 'deployable_id': None,
+                'device_profile_id': obj_devprof.id,
+                'device_profile_group_id': i})
+            arq = objects.ARQ(self.context,
+                              device_profile_name=obj_devprof.name,
+                              device_profile_group_id=i)
+            extarqs.append(objects.ExtARQ(self.context, arq=arq))
+        with mock.patch.object(self.dbapi, 'extarq_create_many',
+                               autospec=True) as mock_create_many:
+            mock_create_many.return_value = db_extarqs
+            created = objects.ExtARQ.create_many(
+                self.context, extarqs, {obj_devprof.name: obj_devprof})
+            mock_create_many.assert_called_once()
+            values_list = mock_create_many.call_args[0][1]
+        self.assertEqual([obj_devprof.id] * 2,
+                         [values['device_profile_id']
+                          for values in values_list])
+        self.assertEqual([constants.ARQ_INITIAL] * 2,
+                         [values['state'] for values in values_list])
+        mock_get_devprof.assert_not_called()
+        for i, extarq in enumerate(created):
+            self.assertEqual(db_extarqs[i]['uuid'], extarq.arq.uuid)
+            self.assertEqual(obj_devprof.groups[i],
+                             extarq.device_profile_group)
+            self.assertEqual(obj_devprof.name,
+                             extarq.arq.device_profile_name)
+
     @mock.patch('openstack.connection.Connection')
     @mock.patch('cyborg.common.nova_client.NovaAPI.notify_binding')
     @mock.patch('cyborg.objects.ExtARQ.bind')
@@ -316,6 +404,21 @@ class TestExtARQObject(base.DbTestCase):
         mock_check_state.assert_called_once_with(
             self.context, constants.ARQ_BIND_FAILED)
 
+    @mock.patch('cyborg.objects.attach_handle.AttachHandle.allocate')
+    @mock.patch('cyborg.objects.ExtARQ.update_check_state')
+    def test_allocate_attach_handle_without_capacity(self, mock_check_state,
+                                                     mock_allocate):
+        obj_extarq = self.fake_obj_extarqs[0]
+        fake_dep = fake_deployable.fake_deployable_obj(
+            self.context, uuid=self.deployable_uuids[0], num_accelerators=1,
+            num_accel_in_use=1)
+        self.assertRaises(
+            exception.ResourceNotFound,
+            obj_extarq._allocate_attach_handle, self.context, fake_dep)
+        mock_allocate.assert_not_called()
+        mock_check_state.assert_called_once_with(
+            self.context, constants.ARQ_BIND_FAILED)
+
     @mock.patch('logging.LoggerAdapter.error')
     @mock.patch('cyborg.objects.attach_handle.AttachHandle.allocate')
     @mock.patch('cyborg.objects.ExtARQ.update_check_state')
@@ -404,3 +507,74 @@ class TestExtARQObject(base.DbTestCase):
         devprof_group_id = out_db_extarq['device_profile_group_id']
         self.assertEqual(out_db_extarq['device_profile_group'],
                          obj_devprof['groups'][devprof_group_id])
+
+    @mock.patch('cyborg.db.sqlalchemy.api.Connection.'
+                'deployable_get_by_filters')
+    @mock.patch('cyborg.db.sqlalchemy.api.Connection.'
+                'attach_handle_get_by_filters')
+    @mock.patch('cyborg.db.sqlalchemy.api.Connection.'
+                'device_profile_list_by_filters')
+    @mock.patch('cyborg.db.sqlalchemy.api.Connection.'
+                'device_profile_get_by_id')
+    def test_from_db_object_list(self, mock_get_devprof, mock_list_devprof,
+                                 mock_get_ahs, mock_get_deps):
+        db_devprof = fake_device_profile.get_db_devprofs()[0]
+        db_extarqs = self.fake_db_extarqs[:2]
+        for i, db_extarq in enumerate(db_extarqs):
+            db_extarq.update({
+                'state': constants.ARQ_BOUND, 'substate': 'Bound',
+                'created_at': None, 'updated_at': None,
+                'attach_handle_id': i + 1, 'deployable_id': 1,
+                'device_profile_group_id': i,
+                'device_profile_id': db_devprof['id']})
+        mock_list_devprof.return_value = [db_devprof]
+        mock_get_ahs.return_value = [
+            {'id': i + 1, 'attach_type': 'PCI',
+             'attach_info': '{"bus": "%02x"}' % i}
+            for i in range(2)]
+        mock_get_deps.return_value = [
+            {'id': 1, 'uuid': self.deployable_uuids[0]}]
+
+        extarqs = objects.ExtARQ._from_db_object_list(db_extarqs,
+                                                      self.context)
+
+        mock_get_devprof.assert_not_called()
+        mock_list_devprof.assert_called_once_with(
+            self.context, {'id': [db_devprof['id']]})
+        mock_get_ahs.assert_called_once_with(self.context, {'id': [1, 2]})
+        mock_get_deps.assert_called_once_with(self.context, {'id': [1]})
+        self.assertEqual([{'bus': '00'}, {'bus': '01'}],
+                         [extarq.arq.attach_handle_info
+                          for extarq in extarqs])
+        for i, extarq in enumerate(extarqs):
+            self.assertEqual(db_devprof['name'],
+                             extarq.arq.device_profile_name)
+            self.assertEqual(self.deployable_uuids[0], extarq.deployable_uuid)
+            self.assertEqual(
+                fake_device_profile.get_obj_devprofs()[0]['groups'][i],
+                extarq.device_profile_group)
+
+    @mock.patch('cyborg.db.sqlalchemy.api.Connection.'
+                'attach_handle_get_by_filters')
+    @mock.patch('cyborg.db.sqlalchemy.api.Connection.'
+                'device_profile_list_by_filters')
+    def test_from_db_object_list_missing_attach_handle(
+            self, mock_list_devprof, mock_get_ahs):
+        db_extarq = self.fake_db_extarqs[0]
+        db_extarq.update({'state': constants.ARQ_BOUND,
+                          'attach_handle_id': 1, 'deployable_id': None})
+        mock_list_devprof.return_value = [
+            fake_device_profile.get_db_devprofs()[0]]
+        db_extarq['device_profile_id'] = 1
+        mock_get_ahs.return_value = []
+        self.assertRaises(exception.ResourceNotFound,
+                          objects.ExtARQ._from_db_object_list,
+                          [db_extarq], self.context)
+
+    @mock.patch('cyborg.common.metrics.instrument')
+    @mock.patch('openstack.connection.Connection')
+    def test_get_glance_connection(self, mock_conn, mock_instrument):
+        obj_extarq = self.fake_obj_extarqs[0]
+        conn = obj_extarq._get_glance_connection()
+        self.assertEqual(mock_conn.return_value, conn)
+        mock_instrument.assert_called_once_with(conn.image, 'image')
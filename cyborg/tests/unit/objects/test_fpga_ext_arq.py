@@ -166,18 +166,14 @@ class TestFPGAExtARQObject(base.DbTestCase):
 
     @mock.patch('openstack.connection.Connection')
     def test_get_bitstream_md_from_bitstream_id(self, mock_conn):
-        mock_conn.return_value = type(
-            "Connection", (object,),
-            {"image": type("image", (object,), {"get": self.images_get})})
+        mock_conn.return_value.image = mock.Mock(get=self.images_get)
         obj_extarq = self.class_fgpa_objects["bitstream_program"]
         md = obj_extarq._get_bitstream_md_from_bitstream_id(self.bitstream_id)
         self.assertDictEqual(self.images_md["/images"][0], md)
 
     @mock.patch('openstack.connection.Connection')
     def test_get_bitstream_md_from_function_id(self, mock_conn):
-        mock_conn.return_value = type(
-            "Connection", (object,),
-            {"image": type("image", (object,), {"get": self.images_get})})
+        mock_conn.return_value.image = mock.Mock(get=self.images_get)
         obj_extarq = self.class_fgpa_objects["function_program"]
         md = obj_extarq._get_bitstream_md_from_function_id(self.function_id)
         self.assertDictEqual(self.images_md["/images"][0], md)
@@ -185,9 +181,7 @@ class TestFPGAExtARQObject(base.DbTestCase):
     @mock.patch('openstack.connection.Connection')
     @mock.patch('cyborg.objects.ExtARQ.update_check_state')
     def test_needs_programming(self, mock_check_state, mock_conn):
-        mock_conn.return_value = type(
-            "Connection", (object,),
-            {"image": type("image", (object,), {"get": self.images_get})})
+        mock_conn.return_value.image = mock.Mock(get=self.images_get)
         dep_uuid = self.deployable_uuids[0]
         fake_dep = fake_deployable.fake_deployable_obj(
             self.context, uuid=dep_uuid)
@@ -216,9 +210,7 @@ class TestFPGAExtARQObject(base.DbTestCase):
     @mock.patch('openstack.connection.Connection')
     @mock.patch('cyborg.objects.ExtARQ.update_check_state')
     def test_get_bitstream_md(self, mock_check_state, mock_conn):
-        mock_conn.return_value = type(
-            "Connection", (object,),
-            {"image": type("image", (object,), {"get": self.images_get})})
+        mock_conn.return_value.image = mock.Mock(get=self.images_get)
         dep_uuid = self.deployable_uuids[0]
         fake_dep = fake_deployable.fake_deployable_obj(
             self.context, uuid=dep_uuid)
@@ -258,9 +250,7 @@ class TestFPGAExtARQObject(base.DbTestCase):
     @mock.patch('openstack.connection.Connection')
     @mock.patch('cyborg.objects.ExtARQ.update_check_state')
     def test_need_extra_bind_job(self, mock_check_state, mock_conn):
-        mock_conn.return_value = type(
-            "Connection", (object,),
-            {"image": type("image", (object,), {"get": self.images_get})})
+        mock_conn.return_value.image = mock.Mock(get=self.images_get)
         dep_uuid = self.deployable_uuids[0]
         fake_dep = fake_deployable.fake_deployable_obj(
             self.context, uuid=dep_uuid)
@@ -310,11 +300,8 @@ class TestFPGAExtARQObject(base.DbTestCase):
     @mock.patch('cyborg.common.placement_client.PlacementClient.'
                 '__init__')
     @mock.patch('cyborg.common.placement_client.PlacementClient.'
-                'add_traits_to_rp')
-    @mock.patch('cyborg.common.placement_client.PlacementClient.'
-                'delete_traits_with_prefixes')
-    def test_update_placement(
-        self, mock_delete_traits, mock_add_traits, mock_placement_init):
+                'update_traits')
+    def test_update_placement(self, mock_update_traits, mock_placement_init):
         mock_placement_init.return_value = None
         dep_uuid = self.deployable_uuids[0]
         fake_dep = fake_deployable.fake_deployable_obj(
@@ -333,9 +320,9 @@ class TestFPGAExtARQObject(base.DbTestCase):
         vendor = fake_dep.driver_name.upper()
         trait_names = ["_".join((
             constants.FPGA_FUNCTION_ID, vendor, function_id))]
-        mock_add_traits.assert_called_once_with(rp_uuid, trait_names)
-        mock_delete_traits.assert_called_once_with(
-            rp_uuid, [constants.FPGA_FUNCTION_ID])
+        mock_update_traits.assert_called_once_with(
+            rp_uuid, add=trait_names,
+            remove_prefixes=[constants.FPGA_FUNCTION_ID])
 
     @mock.patch('cyborg.agent.rpcapi.AgentAPI.fpga_program_v2')
     @mock.patch('cyborg.objects.Deployable.get_cpid_list')
@@ -343,21 +330,17 @@ class TestFPGAExtARQObject(base.DbTestCase):
     @mock.patch('cyborg.common.placement_client.PlacementClient.'
                 '__init__')
     @mock.patch('cyborg.common.placement_client.PlacementClient.'
-                'add_traits_to_rp')
-    @mock.patch('cyborg.common.placement_client.PlacementClient.'
-                'delete_traits_with_prefixes')
+                'update_traits')
     @mock.patch('openstack.connection.Connection')
     @mock.patch('cyborg.objects.ExtARQ.update_check_state')
     @mock.patch('cyborg.objects.ExtARQ.bind')
     def test_bind(
-        self, mock_bind, mock_check_state, mock_conn, mock_delete_traits,
-        mock_add_traits, mock_placement_init, mock_dp_update,
+        self, mock_bind, mock_check_state, mock_conn, mock_update_traits,
+        mock_placement_init, mock_dp_update,
         mock_cpid_list, mock_program):
 
         mock_placement_init.return_value = None
-        mock_conn.return_value = type(
-            "Connection", (object,),
-            {"image": type("image", (object,), {"get": self.images_get})})
+        mock_conn.return_value.image = mock.Mock(get=self.images_get)
 
         dep_uuid = self.deployable_uuids[0]
         fake_dep = fake_deployable.fake_deployable_obj(
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark the device reports of the conductor.
+
+ConductorManager.report_data is driven for simulated hosts, each with the
+same number of devices, against the in-process fake Placement of the unit
+tests and a SQLite database. For each round of reports, the reports per
+second and the Placement calls per report are printed:
+
+- create: the first report of each host, which creates its providers.
+- unchanged: the same report again.
+- update: a report where one deployable of each host has more
+  accelerators.
+- delete: a report where one device of each host is gone.
+
+The fake Placement is imported from cyborg.tests.unit.fake_placement, the
+test requirements must be installed to run the benchmark.
+
+Example::
+
+    python tools/report_benchmark.py --hosts 1000 --devices 4 \\
+        --latency 0.002
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from oslo_config import cfg
+from oslo_context import context
+from oslo_db.sqlalchemy import enginefacade
+
+from cyborg.common import config as cyborg_config
+from cyborg.conductor import manager
+from cyborg.db.sqlalchemy import models
+from cyborg.objects.driver_objects import driver_attach_handle
+from cyborg.objects.driver_objects import driver_attribute
+from cyborg.objects.driver_objects import driver_controlpath_id
+from cyborg.objects.driver_objects import driver_deployable
+from cyborg.objects.driver_objects import driver_device
+from cyborg.tests.unit import fake_placement
+
+CONF = cfg.CONF
+
+
+def get_driver_devices(hostname, count, accelerators=1):
+    """Get the driver-side devices of a simulated host."""
+    devices = []
+    for i in range(count):
+        pci_address = ('{"bus": "%02x", "device": "00", "domain": "0000", '
+                       '"function": "0"}' % i)
+        attributes = [
+            driver_attribute.DriverAttribute(key='rc', value='PGPU'),
+            driver_attribute.DriverAttribute(key='trait0',
+                                             value='CUSTOM_GPU_NVIDIA'),
+            driver_attribute.DriverAttribute(
+                key='trait1', value='CUSTOM_GPU_PRODUCT_ID_1DB6'),
+        ]
+        deployable = driver_deployable.DriverDeployable(
+            name='%s_0000:%02x:00.0' % (hostname, i),
+            num_accelerators=accelerators,
+            driver_name='NVIDIA',
+            attribute_list=attributes,
+            attach_handle_list=[driver_attach_handle.DriverAttachHandle(
+                attach_type='PCI', attach_info=pci_address, in_use=False)])
+        devices.append(driver_device.DriverDevice(
+            vendor='10de',
+            model='Tesla V100',
+            type='GPU',
+            std_board_info='{"product_id": "1db6"}',
+            vendor_board_info='fake_vendor_info',
+            stub=False,
+            controlpath_id=driver_controlpath_id.DriverControlPathID(
+                cpid_type='PCI', cpid_info=pci_address),
+            deployable_list=[deployable]))
+    return devices
+
+
+def run_round(cm, placement, ctxt, name, reports):
+    """Report the device lists of the hosts and print the rates."""
+    call_count = placement.call_count
+    start = time.monotonic()
+    for hostname, driver_device_list in reports:
+        if not cm.report_data(ctxt, hostname, driver_device_list):
+            print('Report of host %s was not applied' % hostname,
+                  file=sys.stderr)
+    duration = time.monotonic() - start
+    calls = placement.call_count - call_count
+    print('%-10s %8d reports %10.1f reports/s %8.2f Placement calls/report'
+          % (name, len(reports), len(reports) / duration,
+             float(calls) / len(reports)))
+
+
+def run_benchmark(args, db_dir):
+    """Run the rounds of reports, with the database in db_dir."""
+    CONF.set_override('connection',
+                      'sqlite:///%s' % os.path.join(db_dir, 'cyborg.db'),
+                      group='database')
+    models.Base.metadata.create_all(
+        enginefacade.get_legacy_facade().get_engine())
+
+    fixture = fake_placement.PlacementFixture(latency=args.latency)
+    fixture.setUp()
+    try:
+        placement = fixture.placement
+        hostnames = ['host%d' % i for i in range(args.hosts)]
+        for hostname in hostnames:
+            placement.add_compute_node(hostname)
+        cm = manager.ConductorManager('cyborg-conductor', 'benchmark')
+        ctxt = context.get_admin_context()
+
+        run_round(cm, placement, ctxt, 'create', [
+            (hostname, get_driver_devices(hostname, args.devices))
+            for hostname in hostnames])
+        run_round(cm, placement, ctxt, 'unchanged', [
+            (hostname, get_driver_devices(hostname, args.devices))
+            for hostname in hostnames])
+        reports = []
+        for hostname in hostnames:
+            devices = get_driver_devices(hostname, args.devices)
+            devices[0].deployable_list[0].num_accelerators = 2
+            reports.append((hostname, devices))
+        run_round(cm, placement, ctxt, 'update', reports)
+        run_round(cm, placement, ctxt, 'delete', [
+            (hostname, reports[i][1][1:])
+            for i, hostname in enumerate(hostnames)])
+    finally:
+        fixture.cleanUp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=100,
+                        help='The number of simulated hosts.')
+    parser.add_argument('--devices', type=int, default=4,
+                        help='The number of devices of each host.')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='The seconds each Placement call waits.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='[conductor]placement_report_workers.')
+    args = parser.parse_args()
+
+    cyborg_config.parse_args([sys.argv[0]], default_config_files=[])
+    if args.workers is not None:
+        CONF.set_override('placement_report_workers', args.workers,
+                          group='conductor')
+    db_dir = tempfile.mkdtemp()
+    try:
+        run_benchmark(args, db_dir)
+    finally:
+        shutil.rmtree(db_dir)
+
+
+if __name__ == '__main__':
+    main()